@@ -2,7 +2,12 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 import os
+import secrets
 from flask_login import LoginManager
+from app.engine import engine_options_from_env, install_sqlite_pragmas
+from app.metrics import install_metrics
+from app.slowlog import install_slow_query_log
+from app.compression import install_compression
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -10,23 +15,94 @@ app = Flask(__name__)
 # Set up base and parent directories
 basedir = os.path.abspath(os.path.dirname(__file__))
 parent_dir = os.path.dirname(basedir)
-# Configure SQLite database URI
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'app.db')
+# Configure SQLite database URI (DATABASE_URL points the app at another database)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'app.db')
 # Set secret key from environment variable
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
 # Disable SQLAlchemy event system
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Connection pool sizing and per-connection SQLite tuning (WAL so readers
+# never block on a committing writer; NORMAL sync is safe under WAL)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env()
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negative = KiB
+# Default and maximum page size for the keyset-paginated listings
+app.config['PAGE_SIZE'] = int(os.environ.get('PAGE_SIZE', 20))
+app.config['MAX_PAGE_SIZE'] = 100
+# Statements slower than SLOW_QUERY_MS are logged, with their query plan, to a
+# rotating JSONL file (SLOW_QUERY_LOG='' turns the log off)
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 200))
+app.config['SLOW_QUERY_LOG'] = os.environ.get('SLOW_QUERY_LOG', os.path.join(parent_dir, 'slow_queries.jsonl'))
+app.config['SLOW_QUERY_LOG_MAX_BYTES'] = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+app.config['SLOW_QUERY_LOG_BACKUPS'] = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', 5))
+# Application cache: 'sqlite' (one file shared by all workers on the host, with
+# keys namespaced by SQLALCHEMY_DATABASE_URI),
+# 'memory' (per process: invalidations never reach other workers, so only
+# correct with a single worker process) or 'null' (off)
+app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'sqlite')
+app.config['CACHE_DEFAULT_TTL'] = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 4096))
+app.config['CACHE_SQLITE_PATH'] = os.environ.get('CACHE_SQLITE_PATH', os.path.join(parent_dir, 'cache.db'))
+# Dashboard leaderboard: songs shown, reviews a song needs to qualify, and how
+# long a snapshot may live without any rating change invalidating it
+app.config['LEADERBOARD_SIZE'] = int(os.environ.get('LEADERBOARD_SIZE', 5))
+app.config['LEADERBOARD_MIN_REVIEWS'] = int(os.environ.get('LEADERBOARD_MIN_REVIEWS', 3))
+app.config['LEADERBOARD_TTL'] = int(os.environ.get('LEADERBOARD_TTL', 3600))
+# Search results cache: pages of song ids per normalized query
+app.config['SEARCH_CACHE_SIZE'] = int(os.environ.get('SEARCH_CACHE_SIZE', 1024))
+app.config['SEARCH_CACHE_TTL'] = int(os.environ.get('SEARCH_CACHE_TTL', 600))
+# Mixed into every ETag. The per-process default means a restart (e.g. a deploy
+# with new templates) never answers 304 for a page rendered by the old code;
+# set ETAG_SALT to share validators between workers.
+app.config['ETAG_SALT'] = os.environ.get('ETAG_SALT') or secrets.token_hex(8)
+# Gzip responses of at least COMPRESS_MIN_SIZE bytes at COMPRESS_LEVEL (1-9;
+# 0 turns compression off)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))
+# Content-hashed static files: where `flask build-assets` writes them and how
+# long browsers may keep them
+app.config['ASSETS_BUILD_FOLDER'] = os.environ.get('ASSETS_BUILD_FOLDER', os.path.join(basedir, 'static_build'))
+app.config['ASSETS_MAX_AGE'] = int(os.environ.get('ASSETS_MAX_AGE', 31536000))
+# Flask-Login identity cache: entries per process and seconds before a re-check
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1024))
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 300))
+# Most reviews accepted by one POST /api/v1/reviews/batch
+app.config['REVIEW_BATCH_MAX'] = int(os.environ.get('REVIEW_BATCH_MAX', 1000))
+# Default and maximum number of /search-suggestions results
+app.config['SUGGESTIONS_LIMIT'] = 8
+app.config['SUGGESTIONS_MAX_LIMIT'] = 25
 
 # Initialize database and migration
 db = SQLAlchemy(app)
 migrate = Migrate(app,db,render_as_batch=True)
+with app.app_context():
+    install_sqlite_pragmas(db.engine, app.config)
+    # Per-endpoint latency, SQL and pool counters, served at /metrics
+    install_metrics(app, db.engine)
+    slow_query_log = install_slow_query_log(db.engine, app.config)
+install_compression(app)
 # Set up login manager
 login = LoginManager(app)
 login.login_view = 'index'
 
-from app import routes, models  # Import routes and models
+from app import routes, models, assets, user_cache, leaderboard, search_index, suggestions, song_stats, pagination  # Import routes, models and helpers
+
+# JSON API under /api/v1
+from app.api import api as api_blueprint
+app.register_blueprint(api_blueprint)
 
 # Register CLI commands
-from app.commands import init_db_command, seed_db_command
+from app.commands import init_db_command, seed_db_command, rebuild_search_index_command, rebuild_song_stats_command, \
+    check_query_plans_command, import_songs_command, import_reviews_command, loadtest_command, build_assets_command
 app.cli.add_command(init_db_command)
-app.cli.add_command(seed_db_command)
\ No newline at end of file
+app.cli.add_command(seed_db_command)
+app.cli.add_command(rebuild_search_index_command)
+app.cli.add_command(rebuild_song_stats_command)
+app.cli.add_command(check_query_plans_command)
+app.cli.add_command(import_songs_command)
+app.cli.add_command(import_reviews_command)
+app.cli.add_command(loadtest_command)
+app.cli.add_command(build_assets_command)
\ No newline at end of file
@@ -0,0 +1,261 @@
+import json
+from functools import wraps
+from flask import Blueprint, abort, request
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+from app import app, db
+from app.models import Song, Review, ReviewShares
+from app.conditional import conditional
+from app.pagination import fits_sqlite_integer, keyset_paginate, requested_page_size
+from app.reviews import ReviewError, save_review, save_reviews, validate_review
+from app.search_cache import search_page
+from app.sharing import ShareError, share_reviews
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Fields clients may ask for with ?fields=, mapped to the columns they come
+# from; 'id' is always included. Listings select just these columns, so no
+# ORM objects are built.
+SONG_FIELDS = {
+    'id': Song.id,
+    'title': Song.title,
+    'artist': Song.artist,
+    'rating_avg': Song.rating_avg,
+    'rating_count': Song.rating_count,
+}
+REVIEW_FIELDS = {
+    'id': Review.id,
+    'rating': Review.rating,
+    'comment': Review.comment,
+    'reviewer': Review.username,
+    'song_id': Review.song_id,
+    'song_title': Song.title,
+    'song_artist': Song.artist,
+}
+
+
+class APIError(HTTPException):
+    """An error answered as JSON; `field` names the offending input, if any."""
+
+    def __init__(self, code, message, field=None):
+        super().__init__(message)
+        self.code = code
+        self.field = field
+
+
+@api.errorhandler(HTTPException)
+def handle_http_error(error):
+    body = {'status': error.code, 'message': error.description}
+    if getattr(error, 'field', None):
+        body['field'] = error.field
+    return json_response({'error': body}, error.code)
+
+
+# Compact JSON (no whitespace); clients that want it pretty can reformat
+def json_response(payload, status=200):
+    return app.response_class(json.dumps(payload, separators=(',', ':'), ensure_ascii=False),
+                              status=status, mimetype='application/json')
+
+
+def api_login_required(view):
+    """Like login_required, but answers 401 JSON instead of redirecting to the login page."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            abort(401, 'Log in first.')
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+# Names of the fields asked for with ?fields=a,b (all when absent), in the
+# resource's canonical order
+def requested_fields(available):
+    raw = request.args.get('fields')
+    if not raw:
+        return list(available)
+    wanted = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = sorted(wanted - set(available))
+    if unknown:
+        raise APIError(400, f"Unknown field(s): {', '.join(unknown)}. "
+                            f"Available: {', '.join(available)}.", field='fields')
+    return [name for name in available if name == 'id' or name in wanted]
+
+
+def select_columns(available, names):
+    return [available[name].label(name) for name in names]
+
+
+def rows_to_dicts(names, rows):
+    return [dict(zip(names, row)) for row in rows]
+
+
+def page_response(names, page):
+    return json_response({'items': rows_to_dicts(names, page),
+                          'next': page.next_cursor,
+                          'prev': page.prev_cursor})
+
+
+# Review columns, joined to Song only when a song field was asked for
+def review_query(names, *extra):
+    query = db.session.query(*extra, *select_columns(REVIEW_FIELDS, names)).select_from(Review)
+    if any(name.startswith('song_') and name != 'song_id' for name in names):
+        query = query.join(Song, Song.id == Review.song_id)
+    return query
+
+
+def parse_ids(raw):
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(',') if part.strip()))
+        if not all(fits_sqlite_integer(song_id) for song_id in ids):
+            raise ValueError(raw)
+    except ValueError:
+        raise APIError(400, 'ids must be a comma-separated list of integers.', field='ids')
+    if len(ids) > app.config['MAX_PAGE_SIZE']:
+        raise APIError(400, f"At most {app.config['MAX_PAGE_SIZE']} ids per request.", field='ids')
+    return ids
+
+
+def json_body():
+    if not request.is_json:
+        raise APIError(415, 'Send a JSON body (Content-Type: application/json).')
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise APIError(400, 'The body must be a JSON object.')
+    return payload
+
+
+# `plural` as a list, or `singular` as a one-item list, from a JSON payload
+def listed(payload, plural, singular, valid, message):
+    values = payload[plural] if plural in payload else [payload.get(singular)]
+    if not isinstance(values, list) or not values or not all(valid(value) for value in values):
+        raise APIError(422, message, field=plural)
+    return values
+
+
+def counted(results):
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    return counts
+
+
+# Song catalog: ?q= searches, ?ids=1,2,3 fetches a batch, neither lists by id
+@api.route('/songs')
+@api_login_required
+@conditional('song', 'song:stats')
+def songs():
+    names = requested_fields(SONG_FIELDS)
+    columns = select_columns(SONG_FIELDS, names)
+    if request.args.get('ids') is not None:
+        ids = parse_ids(request.args['ids'])
+        found = {row.id: row for row in db.session.query(*columns).filter(Song.id.in_(ids))} if ids else {}
+        return json_response({'items': rows_to_dicts(names, (found[i] for i in ids if i in found)),
+                              'missing': [i for i in ids if i not in found]})
+    if request.args.get('q'):
+        page = search_page(request.args['q'], cursor=request.args.get('cursor'),
+                           per_page=requested_page_size(), columns=columns)
+        return page_response(names, page)
+    page = keyset_paginate(db.session.query(*columns), [Song.id], lambda row: [row.id],
+                           cursor=request.args.get('cursor'), per_page=requested_page_size())
+    return page_response(names, page)
+
+
+@api.route('/songs/<int:song_id>')
+@api_login_required
+@conditional('song', 'song:stats')
+def song(song_id):
+    names = requested_fields(SONG_FIELDS)
+    row = db.session.query(*select_columns(SONG_FIELDS, names)).filter(Song.id == song_id).first()
+    if row is None:
+        raise APIError(404, 'Song not found.')
+    return json_response(dict(zip(names, row)))
+
+
+# The current user's review of a song: GET it, or PUT {"rating", "comment"}
+# to create or replace it (one upsert, so the answer is 200 either way)
+@api.route('/songs/<int:song_id>/review', methods=['GET', 'PUT'])
+@api_login_required
+@conditional('review:user:{username}', 'song')
+def song_review(song_id):
+    username = current_user.get_id()
+    if request.method == 'PUT':
+        payload = json_body()
+        song = db.session.query(Song.title, Song.artist).filter(Song.id == song_id).first()
+        if song is None:
+            raise APIError(404, 'Song not found.')
+        try:
+            rating, comment = validate_review(payload.get('rating'), payload.get('comment'))
+            review_id = save_review(username, song_id, rating, comment)
+        except ReviewError as error:
+            raise APIError(422, str(error), field=error.field)
+        review = {'id': review_id, 'rating': rating, 'comment': comment, 'reviewer': username,
+                  'song_id': song_id, 'song_title': song.title, 'song_artist': song.artist}
+        return json_response(review)
+
+    names = requested_fields(REVIEW_FIELDS)
+    row = review_query(names).filter(Review.username == username, Review.song_id == song_id).first()
+    if row is None:
+        raise APIError(404, 'You have not reviewed this song.')
+    return json_response(dict(zip(names, row)))
+
+
+# The current user's reviews, newest first
+@api.route('/reviews')
+@api_login_required
+@conditional('review:user:{username}', 'song')
+def reviews():
+    names = requested_fields(REVIEW_FIELDS)
+    query = review_query(names).filter(Review.username == current_user.get_id())
+    page = keyset_paginate(query, [Review.id], lambda row: [row.id], cursor=request.args.get('cursor'),
+                           per_page=requested_page_size(), descending=True)
+    return page_response(names, page)
+
+
+# Create or update up to REVIEW_BATCH_MAX reviews in one transaction:
+# {"reviews": [{"song_id", "rating", "comment"}, ...]} -> one result per item
+@api.route('/reviews/batch', methods=['POST'])
+@api_login_required
+def reviews_batch():
+    items = json_body().get('reviews')
+    if not isinstance(items, list):
+        raise APIError(400, 'reviews must be a list.', field='reviews')
+    if len(items) > app.config['REVIEW_BATCH_MAX']:
+        raise APIError(413, f"At most {app.config['REVIEW_BATCH_MAX']} reviews per batch.", field='reviews')
+    results = save_reviews(current_user.get_id(), items)
+    return json_response({'results': results, 'counts': counted(results)})
+
+
+# GET: reviews shared with the current user, newest share first.
+# POST {"review_ids": [...], "recipients": [...]} (or a single "review_id" /
+# "recipient"): share the user's reviews; one result per recipient.
+@api.route('/shares', methods=['GET', 'POST'])
+@api_login_required
+@conditional('share:user:{username}', 'review', 'song')
+def shares():
+    username = current_user.get_id()
+    if request.method == 'POST':
+        payload = json_body()
+        review_ids = listed(payload, 'review_ids', 'review_id',
+                            lambda value: isinstance(value, int) and not isinstance(value, bool)
+                            and fits_sqlite_integer(value),
+                            'review_ids must be a list of integers.')
+        recipients = listed(payload, 'recipients', 'recipient', lambda value: isinstance(value, str) and value,
+                            'recipients must be a list of usernames.')
+        if len(review_ids) * len(recipients) > app.config['REVIEW_BATCH_MAX']:
+            raise APIError(413, f"At most {app.config['REVIEW_BATCH_MAX']} shares per request.", field='recipients')
+        try:
+            results = share_reviews(username, review_ids, recipients)
+        except ShareError as error:
+            raise APIError(422, str(error), field=error.field)
+        counts = counted(results)
+        return json_response({'results': results, 'counts': counts}, 201 if 'shared' in counts else 200)
+
+    names = requested_fields(REVIEW_FIELDS)
+    query = review_query(names, ReviewShares.share_id.label('share_id')).\
+        join(ReviewShares, ReviewShares.review_id == Review.id).\
+        filter(ReviewShares.username == username)
+    page = keyset_paginate(query, [ReviewShares.share_id], lambda row: [row.share_id],
+                           cursor=request.args.get('cursor'), per_page=requested_page_size(), descending=True)
+    return page_response(['share_id'] + names, page)
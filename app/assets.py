@@ -0,0 +1,154 @@
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import threading
+import zlib
+from flask import abort, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+from app import app
+from app.compression import accepts_gzip, is_compressible
+
+HASH_LENGTH = 12
+MANIFEST_NAME = 'manifest.json'
+# style_Main.<hash>.css -> ('style_Main', '.css')
+HASHED_NAME = re.compile(rf'(?P<stem>.+)\.[0-9a-f]{{{HASH_LENGTH}}}(?P<ext>\.[^./]*)?')
+
+
+# style_Main.css -> style_Main.<hash>.css (directories are kept)
+def hashed_filename(filename, digest):
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}.{digest[:HASH_LENGTH]}{ext}'
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(65536), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class AssetManifest:
+    """Content-hashed names for the files in the static folder.
+
+    A file's hash is recomputed only when its size or mtime changes, so an
+    edited file gets a new URL without a restart and a stale hashed URL
+    stops resolving instead of serving the new content under the old
+    name. A hashed URL is resolved from the name alone (strip the digest,
+    hash the source, compare), so any worker can serve it whether or not
+    it has rendered a page linking it. Files produced by `flask
+    build-assets` are served from `build_folder` when they match the
+    current source.
+    """
+
+    def __init__(self, static_folder, build_folder):
+        self.static_folder = static_folder
+        self.build_folder = build_folder
+        self._entries = {}  # filename -> (mtime_ns, size, hashed filename)
+        self._lock = threading.Lock()
+
+    def hashed_name(self, filename):
+        """Return the hashed name of a static file, or None if it does not exist."""
+        path = safe_join(self.static_folder, filename)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        entry = self._entries.get(filename)
+        if entry and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+            return entry[2]
+        hashed = hashed_filename(filename, file_digest(path))
+        with self._lock:
+            self._entries[filename] = (stat.st_mtime_ns, stat.st_size, hashed)
+        return hashed
+
+    def source_for(self, hashed):
+        """Return the static file a hashed name stands for while it is current."""
+        match = HASHED_NAME.fullmatch(hashed)
+        if match is None:
+            return None
+        filename = match['stem'] + (match['ext'] or '')
+        if self.hashed_name(filename) != hashed:
+            return None
+        return filename
+
+    def scan(self):
+        """Hash every file under the static folder; return {filename: hashed}."""
+        manifest = {}
+        build = os.path.abspath(self.build_folder)
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != build)
+            for name in sorted(files):
+                filename = os.path.relpath(os.path.join(root, name), self.static_folder).replace(os.sep, '/')
+                manifest[filename] = self.hashed_name(filename)
+        return manifest
+
+
+def build_assets(manifest, gzip_level=9):
+    """Copy every static file to its hashed name in the build folder.
+
+    Text files also get a .gz variant when it is smaller. Writes
+    manifest.json and returns the {filename: hashed} mapping.
+    """
+    mapping = manifest.scan()
+    os.makedirs(manifest.build_folder, exist_ok=True)
+    for filename, hashed in mapping.items():
+        source = os.path.join(manifest.static_folder, filename)
+        target = os.path.join(manifest.build_folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+        if gzip_level and is_compressible(mimetypes.guess_type(filename)[0]):
+            with open(source, 'rb') as handle:
+                data = handle.read()
+            compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            compressed = compressor.compress(data) + compressor.flush()
+            if len(compressed) < len(data):
+                with open(target + '.gz', 'wb') as handle:
+                    handle.write(compressed)
+    with open(os.path.join(manifest.build_folder, MANIFEST_NAME), 'w', encoding='utf-8') as handle:
+        json.dump(mapping, handle, indent=2, sort_keys=True)
+    return mapping
+
+
+assets = AssetManifest(app.static_folder, app.config['ASSETS_BUILD_FOLDER'])
+
+
+def send_asset(hashed):
+    """Response for a hashed asset URL: the prebuilt copy (its .gz variant
+    if the client accepts gzip) or else the source file, cacheable for a year."""
+    filename = assets.source_for(hashed)
+    if filename is None:
+        abort(404)
+    max_age = app.config['ASSETS_MAX_AGE']
+    prebuilt = os.path.join(assets.build_folder, hashed)
+    if os.path.isfile(prebuilt + '.gz') and accepts_gzip(request.headers.get('Accept-Encoding', '')):
+        response = send_from_directory(assets.build_folder, hashed + '.gz', max_age=max_age,
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        if response.status_code in (200, 206):
+            response.headers['Content-Encoding'] = 'gzip'
+    elif os.path.isfile(prebuilt):
+        response = send_from_directory(assets.build_folder, hashed, max_age=max_age)
+    else:
+        response = send_from_directory(assets.static_folder, filename, max_age=max_age)
+    # The URL changes with the content, so browsers never need to revalidate
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+# Template helper: url_for('static', filename=...) but with the hashed name,
+# so the file can be cached for a year
+def asset_url(filename, **values):
+    hashed = assets.hashed_name(filename)
+    if hashed is None:
+        return url_for('static', filename=filename, **values)
+    return url_for('asset', filename=hashed, **values)
+
+
+app.jinja_env.globals['asset_url'] = asset_url
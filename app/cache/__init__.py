@@ -0,0 +1,182 @@
+import functools
+import hashlib
+import inspect
+import threading
+from app import app, db
+from app.metrics import metrics
+from app.cache.backends import MISSING, MemoryBackend, NamespacedBackend, NullBackend, SQLiteBackend
+
+
+class CacheStats:
+    """Hit/miss/set counters, updated under a lock so they stay exact."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_set(self):
+        with self._lock:
+            self.sets += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = self.sets = 0
+
+
+class Cache:
+    """Key/value cache with tag-based invalidation over a pluggable backend.
+
+    Every entry remembers the versions of its tags when it was computed;
+    invalidating a tag bumps its version, so all entries carrying that tag
+    miss from then on without having to be found and deleted.
+    """
+
+    def __init__(self, backend, default_ttl=300):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+    def _lookup(self, key):
+        entry = self.backend.get(key)
+        if entry is not MISSING:
+            versions, value = entry
+            if not versions or self.backend.tag_versions(versions) == versions:
+                return value
+        return MISSING
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        self.stats.record(value is not MISSING)
+        return default if value is MISSING else value
+
+    # get() without counting a hit or miss, for bookkeeping reads
+    def peek(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is MISSING else value
+
+    def set(self, key, value, ttl=None, tags=(), versions=None):
+        # Callers computing a value pass the versions read *before* computing
+        # it, so a write that commits in the meantime still invalidates it
+        if versions is None:
+            versions = self.backend.tag_versions(tags)
+        self.backend.set(key, (versions, value), ttl if ttl is not None else self.default_ttl)
+        self.stats.record_set()
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def invalidate(self, *tags):
+        if tags:
+            self.backend.bump_tags(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def info(self):
+        return {'backend': type(self.backend).__name__, 'entries': len(self.backend),
+                'hits': self.stats.hits, 'misses': self.stats.misses, 'sets': self.stats.sets,
+                'evictions': self.backend.evictions}
+
+    def cached(self, key=None, ttl=None, tags=()):
+        """Memoize a function's return value.
+
+        `key` and each tag may be format strings filled from the call's
+        arguments by name (e.g. 'dashboard-stats:{username}'), or callables
+        taking the same arguments. The default key is the function's name
+        plus its arguments. Cache plain data (tuples, dicts, ids): ORM
+        objects would outlive their session.
+        """
+
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            def render(template, arguments, args, kwargs):
+                return template(*args, **kwargs) if callable(template) else template.format(**arguments)
+
+            def cache_key(args, kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                if key is None:
+                    name = f'{func.__module__}.{func.__qualname__}'
+                    return f'{name}:{bound.args!r}:{sorted(bound.kwargs.items())!r}', bound.arguments
+                return render(key, bound.arguments, args, kwargs), bound.arguments
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                entry_key, arguments = cache_key(args, kwargs)
+                value = self.get(entry_key, MISSING)
+                if value is not MISSING:
+                    return value
+                entry_tags = [render(tag, arguments, args, kwargs) for tag in tags]
+                versions = self.backend.tag_versions(entry_tags)
+                value = func(*args, **kwargs)
+                self.set(entry_key, value, ttl, versions=versions)
+                return value
+
+            wrapper.uncached = func
+            wrapper.cache_key = lambda *args, **kwargs: cache_key(args, kwargs)[0]
+            return wrapper
+
+        return decorator
+
+
+def database_namespace(uri):
+    """A short, stable cache namespace for the database at `uri`."""
+    return hashlib.sha1(uri.encode()).hexdigest()[:12]
+
+
+def create_backend(config):
+    """Build the backend named by CACHE_BACKEND.
+
+    Keys and tags are namespaced by SQLALCHEMY_DATABASE_URI, so processes
+    on different databases that share a cache file never see each other's
+    entries.
+    """
+    name = config.get('CACHE_BACKEND', 'sqlite')
+    if name == 'memory':
+        backend = MemoryBackend(maxsize=config.get('CACHE_MAX_ENTRIES', 4096))
+    elif name == 'sqlite':
+        backend = SQLiteBackend(config['CACHE_SQLITE_PATH'], maxsize=config.get('CACHE_MAX_ENTRIES', 4096))
+    elif name == 'null':
+        return NullBackend()
+    else:
+        raise ValueError(f'Unknown CACHE_BACKEND {name!r} (expected memory, sqlite or null)')
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    return NamespacedBackend(backend, database_namespace(uri)) if uri else backend
+
+
+# Namespace by the database the engine was created for: the configured URI
+# may be reassigned once the engine exists
+with app.app_context():
+    _database_uri = db.engine.url.render_as_string(hide_password=False)
+cache = Cache(create_backend(dict(app.config, SQLALCHEMY_DATABASE_URI=_database_uri)),
+              default_ttl=app.config.get('CACHE_DEFAULT_TTL', 300))
+cached = cache.cached
+
+
+# Expose a cache's counters at /metrics, labelled with `name`
+def register_cache_metrics(name, instance):
+    labels = (('cache', name),)
+
+    def collect():
+        info = instance.info()
+        return {('flask_cache_hits_total', labels): info['hits'],
+                ('flask_cache_misses_total', labels): info['misses'],
+                ('flask_cache_evictions_total', labels): info['evictions'],
+                ('flask_cache_entries', labels): info['entries']}
+
+    metrics.add_collector(collect)
+
+
+register_cache_metrics('default', cache)
+
+from app.cache import invalidation  # Tag invalidation from ORM commits
@@ -0,0 +1,223 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by Backend.get() when there is no live entry; cached values may
+# legitimately be None
+MISSING = object()
+
+
+class NullBackend:
+    """Stores nothing: every lookup misses. Turns caching off."""
+
+    def __init__(self):
+        self.evictions = 0
+
+    def get(self, key):
+        return MISSING
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def tag_versions(self, tags):
+        return {tag: 0 for tag in tags}
+
+    def bump_tags(self, tags):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class MemoryBackend:
+    """In-process LRU with a per-entry TTL.
+
+    Tag versions live in their own dict, outside the LRU, so evicting
+    entries can never roll a tag back to an older version.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return {tag: self._tags.get(tag, 0) for tag in tags}
+
+    def bump_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._tags[tag] = self._tags.get(tag, 0) + 1
+
+    # Tag versions only ever grow: resetting them could let an entry stored
+    # by a request still in flight match a future version
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Cache in a SQLite file, shared by every worker process on the host.
+
+    Values are pickled. Each thread keeps its own connection in autocommit
+    WAL mode. Once the table holds more than `maxsize` entries, expired
+    rows go first and then the oldest-written ones (checked every
+    `prune_every` writes).
+    """
+
+    def __init__(self, path, maxsize=4096, prune_every=64):
+        self.path = path
+        self.maxsize = maxsize
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.evictions = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_entries '
+                               '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, '
+                               'stored REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_stored ON cache_entries (stored)')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_tags '
+                               '(tag TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return MISSING
+        if row[1] < time.time():
+            self.delete(key)
+            return MISSING
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        connection = self._connection()
+        connection.execute('INSERT OR REPLACE INTO cache_entries (key, value, expires, stored) VALUES (?, ?, ?, ?)',
+                           (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl, now))
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM cache_entries WHERE expires < ?', (time.time(),))
+        evicted = connection.execute(
+            'DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries ORDER BY stored DESC '
+            'LIMIT -1 OFFSET ?)', (self.maxsize,)).rowcount
+        if evicted > 0:
+            with self._lock:
+                self.evictions += evicted
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+    def tag_versions(self, tags):
+        tags = list(tags)
+        if not tags:
+            return {}
+        rows = self._connection().execute(
+            f'SELECT tag, version FROM cache_tags WHERE tag IN ({", ".join("?" * len(tags))})', tags).fetchall()
+        versions = dict(rows)
+        return {tag: versions.get(tag, 0) for tag in tags}
+
+    def bump_tags(self, tags):
+        self._connection().executemany(
+            'INSERT INTO cache_tags (tag, version) VALUES (?, 1) '
+            'ON CONFLICT(tag) DO UPDATE SET version = version + 1', [(tag,) for tag in tags])
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
+
+    def __len__(self):
+        return self._connection().execute('SELECT count(*) FROM cache_entries').fetchone()[0]
+
+
+class NamespacedBackend:
+    """Prefixes every key and tag of another backend with `namespace`.
+
+    Several databases can then share one backend (e.g. one SQLite cache
+    file) without reading each other's entries or tag versions. Tag
+    versions come back keyed by the caller's own tag names.
+    """
+
+    def __init__(self, backend, namespace):
+        self.backend = backend
+        self.prefix = f'{namespace}:'
+
+    @property
+    def evictions(self):
+        return self.backend.evictions
+
+    def get(self, key):
+        return self.backend.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.backend.set(self.prefix + key, value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(self.prefix + key)
+
+    def tag_versions(self, tags):
+        versions = self.backend.tag_versions([self.prefix + tag for tag in tags])
+        return {tag[len(self.prefix):]: version for tag, version in versions.items()}
+
+    def bump_tags(self, tags):
+        self.backend.bump_tags([self.prefix + tag for tag in tags])
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self):
+        return len(self.backend)
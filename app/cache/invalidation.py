@@ -0,0 +1,78 @@
+from sqlalchemy import bindparam, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.cache import cache
+from app.models import Song, Review, ReviewShares, DataVersion
+
+# Tags each model write invalidates. 'song' covers titles and artists;
+# review writes bump 'song:stats' because the rating triggers update the
+# song's aggregates in the same transaction.
+TAGGED_MODELS = {
+    Review: lambda review: ['review', f'review:user:{review.username}', 'song:stats'],
+    Song: lambda song: ['song'],
+    ReviewShares: lambda share: ['share', f'share:user:{share.username}'],
+}
+
+
+# Collect tags during the flush; they are only bumped once the transaction
+# commits, after which no request can read the old rows any more. Bulk writes
+# that bypass the ORM events record their tags with this directly.
+def record_tags(session, tags):
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+
+def _record_tags(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        record_tags(session, TAGGED_MODELS[type(target)](target))
+
+
+for _model in TAGGED_MODELS:
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _record_tags)
+
+
+_versions = DataVersion.__table__
+BUMP_VERSIONS = sqlite_insert(_versions).values(tag=bindparam('tag'), version=1).on_conflict_do_update(
+    index_elements=['tag'], set_={'version': _versions.c.version + 1},
+).returning(_versions.c.tag, _versions.c.version)
+
+
+def data_versions(tags):
+    """Committed versions of `tags` from the database (0 for a tag never bumped).
+
+    Unlike the cache backend's tag versions these are the same in every
+    worker process, so they can back validators handed out to clients.
+    """
+    tags = list(tags)
+    if not tags:
+        return {}
+    versions = dict(db.session.query(DataVersion.tag, DataVersion.version).filter(DataVersion.tag.in_(tags)))
+    return {tag: versions.get(tag, 0) for tag in tags}
+
+
+# Bump the database versions inside the committing transaction, so readers
+# see the new rows and the new versions together. The new values are left
+# in session.info['committed_versions'] for the after-commit hooks.
+@event.listens_for(Session, 'before_commit')
+def _bump_data_versions(session):
+    session.info.pop('committed_versions', None)
+    session.flush()
+    tags = session.info.get('cache_tags')
+    if tags:
+        rows = session.execute(BUMP_VERSIONS, [{'tag': tag} for tag in sorted(tags)])
+        session.info['committed_versions'] = dict(rows.all())
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_tags(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        cache.invalidate(*sorted(tags))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_tags(session):
+    session.info.pop('cache_tags', None)
+    session.info.pop('committed_versions', None)
@@ -1,7 +1,17 @@
+import json
+import secrets
 import click
+from flask import current_app
 from flask.cli import with_appcontext
 from app import db
 from app.models import User, Song, Review
+from app.search_index import rebuild_search_index
+from app.song_stats import rebuild_song_stats
+from app.query_plans import check_query_plans, default_username
+from app.importer import import_songs, import_reviews
+from app.datagen import generate_dataset, generated_usernames, existing_usernames, SEED_PASSWORD
+from app.loadtest import run_load_test, InProcessTransport, HttpTransport
+from app.assets import assets, build_assets
 
 # Command to initialize the database
 @click.command('init-db')
@@ -11,11 +21,36 @@ def init_db_command():
     db.create_all()
     click.echo('Initialized the database.')
 
-# Command to seed the database with sample data
+# Command to seed the database with sample data, or a synthetic data set at scale
 @click.command('seed-db')
+@click.option('--users', type=int, help='Generate this many users.')
+@click.option('--songs', type=int, help='Generate this many songs.')
+@click.option('--reviews', type=int, help='Generate this many reviews.')
+@click.option('--shares', type=int, help='Generate this many review shares.')
+@click.option('--seed', default=0, show_default=True, help='Random seed; the same seed gives the same data.')
+@click.option('--batch-size', default=50000, show_default=True, help='Rows per insert statement batch.')
+@click.option('--user-prefix', default='user', show_default=True, help='Generated usernames are PREFIX1, PREFIX2, ...')
 @with_appcontext
-def seed_db_command():
-    """Seed the database with sample data."""
+def seed_db_command(users, songs, reviews, shares, seed, batch_size, user_prefix):
+    """Seed the database with sample data.
+
+    Without options this adds a handful of demo rows. With any of --users,
+    --songs, --reviews or --shares it generates a reproducible synthetic data
+    set (Zipfian song popularity, heavy-tailed reviewers) for benchmarking;
+    generated users all have the password 'password'.
+    """
+    if any(count is not None for count in (users, songs, reviews, shares)):
+        taken = existing_usernames(generated_usernames(user_prefix, users or 0))
+        if taken:
+            raise click.ClickException(f"{len(taken)} generated usernames already exist (e.g. '{taken[0]}'); "
+                                       f"pass another --user-prefix.")
+        counts = generate_dataset(users=users or 0, songs=songs or 0, reviews=reviews or 0,
+                                  shares=shares or 0, seed=seed, batch_size=batch_size,
+                                  user_prefix=user_prefix, progress=lambda message: click.echo(f'  {message}'))
+        click.echo(f"Generated {counts['users']} users, {counts['songs']} songs, {counts['reviews']} reviews "
+                   f"and {counts['shares']} shares in {counts['seconds']:.1f}s.")
+        return
+
     users = [
         User(username='demo', password='demo123'),
         User(username='test', password='test123')
@@ -51,4 +86,157 @@ def seed_db_command():
         db.session.add(review)
     
     db.session.commit()
-    click.echo('Database seeded with sample data.')
\ No newline at end of file
+    click.echo('Database seeded with sample data.')
+
+# Command to rebuild the full-text song index from the song table
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the full-text search index for songs."""
+    rebuild_search_index()
+    click.echo(f'Rebuilt the search index for {Song.query.count()} songs.')
+
+# Command to recompute the per-song rating aggregates from the review table
+@click.command('rebuild-song-stats')
+@click.option('--chunk-size', default=1000, show_default=True, help='Song ids per transaction.')
+@with_appcontext
+def rebuild_song_stats_command(chunk_size):
+    """Recompute per-song rating aggregates."""
+    processed = 0
+    for processed in rebuild_song_stats(chunk_size):
+        click.echo(f'  {processed} songs updated')
+    click.echo(f'Rebuilt rating stats for {processed} songs.')
+
+# Command to fail when any hot route's query falls back to a full table scan
+@click.command('check-query-plans')
+@click.option('--username', help='User to run the routes as (default: first user).')
+@click.option('--verbose', is_flag=True, help='Print every plan, not just failures.')
+@with_appcontext
+def check_query_plans_command(username, verbose):
+    """EXPLAIN QUERY PLAN every query issued by the hot routes."""
+    username = username or default_username()
+    if username is None:
+        raise click.ClickException('The database has no users to run the routes as.')
+
+    checked = 0
+    failures = 0
+    for path, statement, plan, scans in check_query_plans(username):
+        checked += 1
+        if scans:
+            failures += 1
+        if scans or verbose:
+            click.echo(f'{"FULL SCAN" if scans else "ok"}  {path}')
+            click.echo(f'    {" ".join(statement.split())}')
+            for detail in plan:
+                click.echo(f'    -> {detail}')
+
+    if checked == 0:
+        raise click.ClickException('The database has no songs to exercise the routes with.')
+    if failures:
+        raise click.ClickException(f'{failures} of {checked} queries do a full table scan.')
+    click.echo(f'All {checked} queries use an index.')
+
+# Command to stream a CSV/JSONL catalog into the song table
+@click.command('import-songs')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Input format (default: from extension).')
+@click.option('--batch-size', default=5000, show_default=True, help='Records per insert batch and transaction.')
+@click.option('--checkpoint', help='Checkpoint file (default: PATH.checkpoint).')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the beginning.')
+@with_appcontext
+def import_songs_command(path, fmt, batch_size, checkpoint, restart):
+    """Import songs (title, artist) from a CSV or JSONL file."""
+    checkpoint = checkpoint or path + '.checkpoint'
+
+    def report(state, rate):
+        click.echo(f"  {state['records']} records read, {state['inserted']} inserted "
+                   f"({rate:,.0f} records/s)")
+
+    state = import_songs(path, fmt=fmt, batch_size=batch_size, checkpoint_path=checkpoint,
+                         resume=not restart, progress=report)
+    if state['resumed_from']:
+        click.echo(f"Resumed after record {state['resumed_from']}.")
+    click.echo(f"Imported {state['inserted']} songs "
+               f"({state['duplicates']} duplicates, {state['invalid']} invalid records skipped).")
+
+# Command to load a user's reviews (e.g. an imported listening history) in batches
+@click.command('import-reviews')
+@click.argument('username')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Input format (default: from extension).')
+@click.option('--batch-size', default=1000, show_default=True, help='Reviews per transaction.')
+@with_appcontext
+def import_reviews_command(username, path, fmt, batch_size):
+    """Create or update USERNAME's reviews (song_id, rating, comment) from a CSV or JSONL file."""
+    if not User.query.filter_by(username=username).first():
+        raise click.ClickException(f"No user named '{username}'.")
+    report = import_reviews(username, path, fmt=fmt, batch_size=batch_size,
+                            progress=lambda records, counts: click.echo(f'  {records} records read'))
+    click.echo(', '.join(f'{count} {status}' for status, count in sorted(report['counts'].items()))
+               or 'No records.')
+    for line, status, message in report['problems'][:20]:
+        click.echo(f'  line {line}: {status}: {message}')
+    if len(report['problems']) > 20:
+        click.echo(f"  ... and {len(report['problems']) - 20} more")
+
+# Command to replay a scripted browse/review/share mix with concurrent users
+@click.command('loadtest')
+@click.option('--url', help='Base URL of a running instance (default: drive the app in-process).')
+@click.option('--users', default=10, show_default=True, help='Concurrent virtual users.')
+@click.option('--iterations', default=10, show_default=True, help='Scripted visits per virtual user.')
+@click.option('--duration', type=float, help='Run for this many seconds instead of a fixed number of visits.')
+@click.option('--accounts', type=int, help='Log in as PREFIX1..PREFIXN (default: one account per virtual user).')
+@click.option('--user-prefix', default='user', show_default=True, help='Account name prefix, as used by seed-db.')
+@click.option('--password', default=SEED_PASSWORD, show_default=True, help='Password of every account.')
+@click.option('--terms', default='midnight,golden,heart,river,summer', show_default=True,
+              help='Comma-separated search terms to pick from.')
+@click.option('--seed', default=0, show_default=True, help='Random seed for the virtual users.')
+@click.option('--think-time', default=0.0, show_default=True, help='Pause after each request, in seconds.')
+@click.option('--timeout', default=30.0, show_default=True, help='HTTP request timeout, in seconds.')
+@click.option('--json', 'json_path', help='Also write the full report to this file.')
+@with_appcontext
+def loadtest_command(url, users, iterations, duration, accounts, user_prefix, password, terms, seed,
+                     think_time, timeout, json_path):
+    """Run concurrent virtual users against the app and report per endpoint."""
+    if url:
+        def transport_factory():
+            return HttpTransport(url, timeout=timeout)
+    else:
+        flask_app = current_app._get_current_object()
+        if not flask_app.config.get('SECRET_KEY'):
+            # Sessions need a key; nothing outside this process sees it
+            flask_app.config['SECRET_KEY'] = secrets.token_hex(16)
+
+        def transport_factory():
+            return InProcessTransport(flask_app)
+
+    usernames = [f'{user_prefix}{n}' for n in range(1, (accounts or users) + 1)]
+    search_terms = [term.strip() for term in terms.split(',') if term.strip()]
+    report = run_load_test(transport_factory, usernames, password, search_terms, users=users,
+                           iterations=iterations, duration=duration, seed=seed, think_time=think_time)
+
+    click.echo(f"{report['requests']} requests in {report['seconds']:.1f}s "
+               f"({report['throughput']:.1f} req/s) from {users} users, {report['errors']} errors")
+    click.echo(f"{'endpoint':<20} {'requests':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, stats in report['endpoints'].items():
+        click.echo(f"{name:<20} {stats['requests']:>8} {stats['errors']:>7} {stats['p50_ms']:>8.1f} "
+                   f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+    click.echo('Latency histogram:')
+    for name, stats in report['endpoints'].items():
+        buckets = ' '.join(f'{bucket}:{count}' for bucket, count in stats['histogram'].items() if count)
+        click.echo(f'  {name:<20} {buckets}')
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+# Command to write content-hashed copies of the static files (and .gz variants)
+@click.command('build-assets')
+@click.option('--gzip-level', default=9, show_default=True, type=click.IntRange(0, 9),
+              help='Level for the pre-compressed .gz variants; 0 writes none.')
+@with_appcontext
+def build_assets_command(gzip_level):
+    """Build hashed static files and manifest.json into ASSETS_BUILD_FOLDER."""
+    mapping = build_assets(assets, gzip_level=gzip_level)
+    for filename, hashed in mapping.items():
+        click.echo(f'  {filename} -> {hashed}')
+    click.echo(f'Built {len(mapping)} assets in {assets.build_folder}.')
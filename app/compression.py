@@ -0,0 +1,138 @@
+import zlib
+from werkzeug.datastructures import Headers
+from werkzeug.wsgi import ClosingIterator
+
+# Content types worth compressing; images, fonts and archives are already
+# compressed and only cost CPU
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                      'image/svg+xml')
+
+
+# Whether an Accept-Encoding header allows gzip ("gzip;q=0" refuses it, even
+# alongside "*")
+def accepts_gzip(accept_encoding):
+    wildcard = None
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = coding.strip().lower()
+        if coding in ('gzip', 'x-gzip'):
+            return quality > 0
+        if coding == '*':
+            wildcard = quality > 0
+    return bool(wildcard)
+
+
+def is_compressible(content_type):
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    return mimetype.startswith(COMPRESSIBLE_TYPES) or mimetype.endswith(('+json', '+xml'))
+
+
+def _add_vary(headers, field):
+    values = [value.strip() for value in headers.get('Vary', '').split(',') if value.strip()]
+    if '*' not in values and field.lower() not in (value.lower() for value in values):
+        headers['Vary'] = ', '.join(values + [field])
+
+
+class GzipMiddleware:
+    """WSGI middleware that gzips text and JSON responses for clients that accept it.
+
+    Responses with a Content-Length are compressed whole (if at least
+    `min_size` bytes) and get the compressed length; streamed responses are
+    compressed chunk by chunk, each flushed so the client receives it right
+    away. Already-encoded, partial, no-transform and non-text responses pass
+    through untouched. Every compressible response gets
+    `Vary: Accept-Encoding`, compressed or not, so shared caches keep the
+    variants apart; strong ETags become weak, since the bytes differ.
+    """
+
+    def __init__(self, app, min_size=500, level=6):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def __call__(self, environ, start_response):
+        captured = []
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        body = self.app(environ, capture)
+        chunks = iter(body)
+        first = []
+        if not captured:
+            # Generator apps only call start_response once iterated
+            first = [chunk for chunk in [next(chunks, None)] if chunk is not None]
+        status, header_list, exc_info = captured
+        headers = Headers(header_list)
+        prefix = written + first
+
+        def rest():
+            yield from prefix
+            yield from chunks
+
+        if not self._should_compress(environ, status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return ClosingIterator(rest(), getattr(body, 'close', None))
+
+        length = headers.get('Content-Length', type=int)
+        if length is not None and length < self.min_size:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return ClosingIterator(rest(), getattr(body, 'close', None))
+
+        headers['Content-Encoding'] = 'gzip'
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = 'W/' + etag
+        if length is not None:
+            try:
+                data = b''.join(rest())
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            compressed = self._compressor()
+            data = compressed.compress(data) + compressed.flush()
+            headers['Content-Length'] = str(len(data))
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return [data]
+
+        headers.pop('Content-Length', None)
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return ClosingIterator(self._stream(rest()), getattr(body, 'close', None))
+
+    def _compressor(self):
+        # wbits 31: zlib deflate with a gzip header and trailer
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def _stream(self, chunks):
+        compressor = self._compressor()
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+    def _should_compress(self, environ, status, headers):
+        if not is_compressible(headers.get('Content-Type')):
+            return False
+        # The representation now depends on Accept-Encoding either way
+        _add_vary(headers, 'Accept-Encoding')
+        code = int(status.split(None, 1)[0])
+        if code < 200 or code in (204, 206, 304) or environ.get('REQUEST_METHOD') == 'HEAD':
+            return False
+        if 'Content-Encoding' in headers or 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        return self.level > 0 and accepts_gzip(environ.get('HTTP_ACCEPT_ENCODING', ''))
+
+
+def install_compression(app):
+    app.wsgi_app = GzipMiddleware(app.wsgi_app, min_size=app.config['COMPRESS_MIN_SIZE'],
+                                  level=app.config['COMPRESS_LEVEL'])
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import time
+from functools import wraps
+from flask import g, make_response, request, session
+from flask_login import current_user
+from app import app
+from app.cache.invalidation import data_versions
+
+
+# Forms on these pages embed CSRF tokens that expire after
+# WTF_CSRF_TIME_LIMIT; changing the ETag every half limit means a page
+# revalidated with 304 never carries a token that is about to expire.
+def _csrf_epoch():
+    limit = app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    return int(time.time() // (limit / 2)) if limit else 0
+
+
+def compute_etag(tags):
+    """ETag for the current GET, from the data versions it depends on.
+
+    Combines the database versions of `tags` (bumped in the same transaction
+    as every write to the data behind them, so all workers agree) with the
+    endpoint, its URL arguments, the user and the query string. Computing it
+    costs one primary-key lookup and no query against the data itself. The
+    versions are kept in `g.data_versions` so the view can reuse them.
+    """
+    username = current_user.get_id() if current_user.is_authenticated else None
+    rendered = [tag.format(username=username) for tag in tags]
+    versions = data_versions(rendered)
+    g.data_versions = versions
+    raw = json.dumps([app.config['ETAG_SALT'], _csrf_epoch(), request.endpoint, username,
+                      sorted((request.view_args or {}).items()), sorted(request.args.items(multi=True)),
+                      sorted(versions.items())])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def conditional(*tags):
+    """Answer GETs whose If-None-Match is still current with 304 Not Modified.
+
+    The check runs before the view, so a 304 costs no queries or template
+    rendering. The comparison is weak, as RFC 9110 requires, so the W/
+    ETags of gzipped responses match too. Tags are cache tags, formatted
+    with `username`. Pages with flashed messages waiting are always rendered
+    and get no ETag, because the message is shown once and must not be
+    replayed from a cached copy.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            etag = compute_etag(tags)
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Only the user's own browser may keep the page, and it must
+            # revalidate before every reuse
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Cookie')
+            return response
+
+        return wrapper
+
+    return decorator
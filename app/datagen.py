@@ -0,0 +1,239 @@
+import random
+import time
+from array import array
+from itertools import accumulate
+from contextlib import contextmanager
+from sqlalchemy import bindparam, func, text, update
+from werkzeug.security import generate_password_hash
+from app import db
+from app.cache.invalidation import record_tags
+from app.models import User, Song, Review, ReviewShares
+from app.search_index import CREATE_FTS_TRIGGERS
+from app.song_stats import CREATE_STATS_TRIGGERS, STAR_VALUES
+
+# Every generated user shares this password; hashing once keeps seeding fast
+SEED_PASSWORD = 'password'
+
+ADJECTIVES = [
+    'Midnight', 'Golden', 'Electric', 'Broken', 'Silent', 'Neon', 'Wild', 'Blue', 'Velvet', 'Burning',
+    'Lonely', 'Crystal', 'Summer', 'Paper', 'Hollow', 'Sweet', 'Restless', 'Distant', 'Crimson', 'Little',
+]
+NOUNS = [
+    'Heart', 'Highway', 'Dreams', 'River', 'Lights', 'Sky', 'Rain', 'Fire', 'Echo', 'Garden',
+    'Moon', 'Shadows', 'Letters', 'Waves', 'Roses', 'Stars', 'City', 'Dance', 'Thunder', 'Memory',
+]
+NAMES = [
+    'Nova', 'Atlas', 'Luna', 'Orion', 'Ivy', 'Jasper', 'Sage', 'Milo', 'Iris', 'Felix',
+    'Aurora', 'Silas', 'Wren', 'Hazel', 'Otis', 'Juno', 'Ezra', 'Cleo', 'Arlo', 'Nell',
+]
+BAND_WORDS = ['Collective', 'Brothers', 'Project', 'Society', 'Kids', 'Machine', 'Union', 'Parade']
+COMMENTS = [
+    'Love this one.', 'On repeat all week.', 'Great production.', 'Not for me.',
+    'Catchy chorus.', 'A bit long.', 'Classic.', 'Underrated.', 'Better live.', None, None, None,
+]
+# Ratings lean positive, like real review sites
+RATING_WEIGHTS = [5, 10, 20, 35, 30]
+
+
+# Cumulative Zipf weights for ranks 1..n, for random.choices(cum_weights=...)
+def zipf_cum_weights(n, exponent):
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+# executemany of plain tuples straight through the driver; at millions of rows
+# per-row parameter processing in a compiled insert() dominates the run time
+def _insert(table, columns, rows):
+    if rows:
+        sql = f'INSERT INTO {table.name} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+        db.session.connection().exec_driver_sql(sql, rows)
+
+
+def _create_insert_triggers():
+    for statement in CREATE_FTS_TRIGGERS + CREATE_STATS_TRIGGERS:
+        db.session.execute(text(statement))
+
+
+# Per-row index/aggregate triggers dominate bulk insert time, so the insert
+# triggers are dropped while seeding and their work is done once at the end.
+# Seeding is an offline operation: concurrent writers would bypass them too.
+@contextmanager
+def _insert_triggers_suspended():
+    for name in ('song_fts_ai', 'review_stats_ai'):
+        db.session.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+    try:
+        yield
+    except BaseException:
+        # pysqlite runs the DROPs outside the data transaction, so rolling
+        # the data back does not restore them: recreate them on their own
+        db.session.rollback()
+        _create_insert_triggers()
+        db.session.commit()
+        raise
+    _create_insert_triggers()
+
+
+def _write_song_stats(first_song_id, song_totals, batch_size):
+    set_stats = update(Song).where(Song.id == bindparam('song_id')).values(
+        rating_count=bindparam('count'),
+        rating_sum=bindparam('total'),
+        rating_avg=bindparam('avg'),
+        **{f'rating_{star}': bindparam(f'r{star}') for star in STAR_VALUES},
+    )
+    counts, totals = song_totals[0], song_totals[1]
+    rows = []
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        rows.append({'song_id': first_song_id + index, 'count': count, 'total': totals[index],
+                     'avg': totals[index] / count,
+                     **{f'r{star}': song_totals[1 + star][index] for star in STAR_VALUES}})
+        if len(rows) >= batch_size:
+            db.session.connection().execute(set_stats, rows)
+            rows = []
+    if rows:
+        db.session.connection().execute(set_stats, rows)
+
+
+def _artist_names(rng, count):
+    names = set()
+    for index in range(count):
+        name = (f'{rng.choice(NAMES)} {rng.choice(NAMES)}' if rng.random() < 0.6
+                else f'The {rng.choice(ADJECTIVES)} {rng.choice(BAND_WORDS)}')
+        if name in names:
+            name = f'{name} {index}'
+        names.add(name)
+        yield name
+
+
+def _song_catalog(rng, count):
+    artists = list(_artist_names(rng, max(1, count // 10)))
+    # A few artists own most of the catalog
+    artist_weights = zipf_cum_weights(len(artists), 1.1)
+    seen = set()
+    for artist in rng.choices(artists, cum_weights=artist_weights, k=count):
+        base = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'
+        title, part = base, 1
+        while (title, artist) in seen:
+            part += 1
+            title = f'{base} (Part {part})'
+        seen.add((title, artist))
+        yield title, artist
+
+
+def generated_usernames(prefix, count):
+    return [f'{prefix}{n}' for n in range(1, count + 1)]
+
+
+def existing_usernames(usernames, chunk_size=500):
+    """Return the names in `usernames` that are already taken, in order."""
+    taken = set()
+    for start in range(0, len(usernames), chunk_size):
+        chunk = usernames[start:start + chunk_size]
+        taken.update(name for name, in db.session.query(User.username).filter(User.username.in_(chunk)))
+    return [name for name in usernames if name in taken]
+
+
+def generate_dataset(users=0, songs=0, reviews=0, shares=0, seed=0, batch_size=50000,
+                     user_prefix='user', progress=None):
+    """Insert a reproducible synthetic data set and return the counts created.
+
+    Song popularity follows a Zipf distribution and review activity is
+    heavy-tailed (a few users write most reviews). Rows are inserted with
+    driver-level executemany in `batch_size` chunks inside a single
+    transaction, and
+    ids are assigned explicitly so the same seed always yields the same rows.
+    """
+    rng = random.Random(seed)
+    report = progress or (lambda message: None)
+    started = time.perf_counter()
+
+    first_song_id = (db.session.query(func.max(Song.id)).scalar() or 0) + 1
+    first_review_id = (db.session.query(func.max(Review.id)).scalar() or 0) + 1
+    first_share_id = (db.session.query(func.max(ReviewShares.share_id)).scalar() or 0) + 1
+    usernames = generated_usernames(user_prefix, users)
+
+    with _insert_triggers_suspended():
+        password = generate_password_hash(SEED_PASSWORD)
+        for start in range(0, users, batch_size):
+            _insert(User.__table__, ('username', 'password'),
+                    [(name, password) for name in usernames[start:start + batch_size]])
+        report(f'{users} users')
+
+        rows = []
+        for offset, (title, artist) in enumerate(_song_catalog(rng, songs)):
+            rows.append((first_song_id + offset, title, artist))
+            if len(rows) >= batch_size:
+                _insert(Song.__table__, ('id', 'title', 'artist'), rows)
+                rows = []
+        _insert(Song.__table__, ('id', 'title', 'artist'), rows)
+        # Index the new songs in one statement instead of row by row
+        db.session.execute(text('INSERT INTO song_fts(rowid, title, artist) '
+                                'SELECT id, title, artist FROM song WHERE id >= :first'),
+                           {'first': first_song_id})
+        report(f'{songs} songs')
+
+        # Reviews: distinct (user, song) pairs, users heavy-tailed, songs Zipfian
+        review_users = array('i')
+        # Per-song rating count, sum and 1-5 histogram, written once at the end
+        song_totals = [array('i', [0]) * songs for _ in range(7)]
+        created_reviews = 0
+        if users and songs and reviews:
+            user_weights = zipf_cum_weights(users, 1.0)
+            song_weights = zipf_cum_weights(songs, 1.0)
+            seen = set()
+            attempts = 0
+            # Stop early if the requested count would need near-saturated pairs
+            while created_reviews < reviews and attempts < reviews * 20:
+                want = min(batch_size, reviews - created_reviews)
+                attempts += want
+                picked_users = rng.choices(range(users), cum_weights=user_weights, k=want)
+                picked_songs = rng.choices(range(songs), cum_weights=song_weights, k=want)
+                ratings = rng.choices(range(1, 6), weights=RATING_WEIGHTS, k=want)
+                comments = rng.choices(COMMENTS, k=want)
+                rows = []
+                for user_index, song_index, rating, comment in zip(picked_users, picked_songs, ratings, comments):
+                    pair = user_index * songs + song_index
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+                    rows.append((first_review_id + created_reviews + len(rows), rating, comment,
+                                 usernames[user_index], first_song_id + song_index))
+                    review_users.append(user_index)
+                    song_totals[0][song_index] += 1
+                    song_totals[1][song_index] += rating
+                    song_totals[1 + rating][song_index] += 1
+                _insert(Review.__table__, ('id', 'rating', 'comment', 'username', 'song_id'), rows)
+                created_reviews += len(rows)
+                report(f'{created_reviews} reviews')
+            del seen
+            _write_song_stats(first_song_id, song_totals, batch_size)
+
+        # Shares: a review sent to some other user, each (review, recipient) once
+        created_shares = 0
+        share_columns = ('share_id', 'review_id', 'username')
+        if created_reviews and users > 1 and shares:
+            seen = set()
+            attempts = 0
+            rows = []
+            while created_shares + len(rows) < shares and attempts < shares * 20:
+                attempts += 1
+                review_index = rng.randrange(created_reviews)
+                recipient = rng.randrange(users)
+                if recipient == review_users[review_index] or (review_index, recipient) in seen:
+                    continue
+                seen.add((review_index, recipient))
+                rows.append((first_share_id + created_shares + len(rows),
+                             first_review_id + review_index, usernames[recipient]))
+                if len(rows) >= batch_size:
+                    _insert(ReviewShares.__table__, share_columns, rows)
+                    created_shares += len(rows)
+                    rows = []
+            _insert(ReviewShares.__table__, share_columns, rows)
+            created_shares += len(rows)
+            report(f'{created_shares} shares')
+
+    # Driver-level inserts bypass the ORM events that invalidate cached data
+    record_tags(db.session, ['review', 'song', 'song:stats', 'share', 'leaderboard'])
+    db.session.commit()
+    return {'users': users, 'songs': songs, 'reviews': created_reviews, 'shares': created_shares,
+            'seconds': time.perf_counter() - started}
@@ -0,0 +1,47 @@
+import os
+from sqlalchemy import event
+
+
+# Engine/pool options for Flask-SQLAlchemy, overridable from the environment.
+# These must be in app.config before SQLAlchemy(app) creates the engine.
+def engine_options_from_env():
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+    }
+
+
+# PRAGMAs applied to every new SQLite connection, in order. Unset (None)
+# config values are skipped so a deployment can opt out of any of them.
+def sqlite_pragmas(config):
+    pragmas = [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS')),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE')),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE')),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+def install_sqlite_pragmas(engine, config):
+    """Run the configured PRAGMAs on each connection `engine` opens.
+
+    WAL lets readers keep going while a writer commits, and busy_timeout
+    makes a second writer wait for the lock instead of failing straight
+    away with "database is locked".
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, SelectField, PasswordField
+from wtforms import StringField, SubmitField, SelectField, SelectMultipleField, PasswordField
 from wtforms.validators import DataRequired, ValidationError, EqualTo
 from app.models import User
 
@@ -29,8 +29,8 @@ class RegistrationForm(FlaskForm):
 # Form to send reviews to another user
 class ReviewSendForm(FlaskForm):
     """Form for sending reviews to a recipient"""
-    recipient_username = StringField('Recipient Username', validators=[DataRequired(message="Please enter a recipient username.")])
-    review = SelectField('Choose a Review', choices = [])
+    recipient_username = StringField('Recipient Usernames (comma-separated)', validators=[DataRequired(message="Please enter a recipient username.")])
+    review = SelectMultipleField('Choose Reviews', choices = [])
     submit = SubmitField('Send Reviews')
 
 # Form for searching songs or artists
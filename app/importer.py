@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from sqlalchemy import tuple_
+from app import db
+from app.cache.invalidation import record_tags
+from app.models import Song
+from app.reviews import save_reviews
+
+# Keep each dedupe lookup well inside SQLite's bound-parameter limit
+LOOKUP_CHUNK = 4000
+
+
+def detect_format(path):
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def _clean(record):
+    if not isinstance(record, dict):
+        return None
+    fields = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+    title = str(fields.get('title') or '').strip()
+    artist = str(fields.get('artist') or '').strip()
+    if not title or not artist or len(title) > 100 or len(artist) > 100:
+        return None
+    return title, artist
+
+
+def iter_song_records(path, fmt):
+    """Stream (title, artist) pairs from a CSV or JSONL file.
+
+    Invalid records yield None so callers can count them while keeping the
+    record numbering (used for checkpoints) stable.
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            for row in csv.DictReader(handle):
+                yield _clean(row)
+        else:
+            for line in handle:
+                if not line.strip():
+                    continue
+                try:
+                    yield _clean(json.loads(line))
+                except ValueError:
+                    yield None
+
+
+def _existing_pairs(pairs):
+    existing = set()
+    pairs = list(pairs)
+    for start in range(0, len(pairs), LOOKUP_CHUNK):
+        chunk = pairs[start:start + LOOKUP_CHUNK]
+        rows = db.session.query(Song.title, Song.artist).\
+            filter(tuple_(Song.title, Song.artist).in_(chunk))
+        existing.update((title, artist) for title, artist in rows)
+    return existing
+
+
+def load_checkpoint(checkpoint_path, source_path):
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, encoding='utf-8') as handle:
+        state = json.load(handle)
+    return state if state.get('source') == os.path.abspath(source_path) else None
+
+
+def save_checkpoint(checkpoint_path, state):
+    # Write-then-rename so a crash never leaves a truncated checkpoint
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump(state, handle)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def import_songs(path, fmt=None, batch_size=5000, checkpoint_path=None, resume=True, progress=None):
+    """Insert new songs from `path` in batches; returns the final counters.
+
+    Each batch is deduplicated in memory and against the song table with one
+    (title, artist) IN lookup, inserted with a single executemany and
+    committed, then recorded in the checkpoint. Re-running after a crash
+    skips the records already committed; a batch that committed without
+    reaching the checkpoint is simply deduplicated again.
+    """
+    fmt = fmt or detect_format(path)
+    state = {'source': os.path.abspath(path), 'records': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0}
+    if resume:
+        state = load_checkpoint(checkpoint_path, path) or state
+    resumed_from = state['records']
+
+    records = iter_song_records(path, fmt)
+    for _ in islice(records, resumed_from):
+        pass
+
+    insert_songs = Song.__table__.insert()
+    started = time.perf_counter()
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+
+        unique = {}
+        for record in batch:
+            if record is None:
+                state['invalid'] += 1
+            elif record in unique:
+                state['duplicates'] += 1
+            else:
+                unique[record] = {'title': record[0], 'artist': record[1]}
+
+        existing = _existing_pairs(unique)
+        rows = [row for pair, row in unique.items() if pair not in existing]
+        state['duplicates'] += len(unique) - len(rows)
+        if rows:
+            db.session.connection().execute(insert_songs, rows)
+            # Core inserts bypass the ORM events that invalidate cached song data
+            record_tags(db.session, ['song'])
+        db.session.commit()
+
+        state['records'] += len(batch)
+        state['inserted'] += len(rows)
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, state)
+        if progress:
+            elapsed = time.perf_counter() - started
+            progress(state, (state['records'] - resumed_from) / elapsed if elapsed else 0.0)
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    state['resumed_from'] = resumed_from
+    return state
+
+
+def iter_review_records(path, fmt):
+    """Stream (line number, record) pairs from CSV or JSONL.
+
+    Records are dicts with song_id, rating and comment. Line numbers count
+    from 1 at the top of the file, header included, so they match what an
+    editor shows. Lines that are not valid JSON yield None, which
+    save_reviews() reports as invalid.
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, {str(key).strip().lower(): value for key, value in row.items()
+                                        if key is not None}
+        else:
+            for number, line in enumerate(handle, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+
+
+def import_reviews(username, path, fmt=None, batch_size=1000, progress=None):
+    """Save `username`'s reviews from `path`, one transaction per batch.
+
+    Returns {'counts': {status: n}, 'problems': [(line number, status,
+    message)]} covering every record that was not saved.
+    """
+    fmt = fmt or detect_format(path)
+    counts, problems = {}, []
+    records = iter_review_records(path, fmt)
+    offset = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        for result in save_reviews(username, [record for line, record in batch]):
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+            if 'error' in result:
+                problems.append((batch[result['index']][0], result['status'], result['error']))
+        offset += len(batch)
+        if progress:
+            progress(offset, counts)
+    return {'counts': counts, 'problems': problems}
@@ -0,0 +1,102 @@
+import threading
+from collections import namedtuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from app import app, db
+from app.cache import cache
+from app.cache.backends import MISSING
+from app.models import Song, Review
+
+CACHE_KEY = 'leaderboard:top-songs'
+# The snapshot is rebuilt when a committed rating could move the top N
+# ('leaderboard') or a song's title/artist changes ('song')
+CACHE_TAGS = ('leaderboard', 'song')
+
+# Plain rows, so the snapshot can be shared between requests and processes
+LeaderboardEntry = namedtuple('LeaderboardEntry', 'id title artist rating_avg rating_count')
+
+_rebuild_lock = threading.Lock()
+
+
+def _settings():
+    return app.config['LEADERBOARD_SIZE'], max(1, app.config['LEADERBOARD_MIN_REVIEWS'])
+
+
+def compute_leaderboard(size, min_reviews):
+    rows = db.session.query(Song.id, Song.title, Song.artist, Song.rating_avg, Song.rating_count).\
+        filter(Song.rating_count >= min_reviews).\
+        order_by(Song.rating_avg.desc(), Song.rating_count.desc()).limit(size)
+    return [LeaderboardEntry(*row) for row in rows]
+
+
+def top_songs():
+    """Return the top-rated songs, from the snapshot when it is current.
+
+    After an invalidation only one request per process recomputes the
+    snapshot; requests arriving meanwhile wait for it and reuse the result
+    instead of running the same query.
+    """
+    snapshot = cache.get(CACHE_KEY, MISSING)
+    if snapshot is not MISSING:
+        return snapshot
+    with _rebuild_lock:
+        snapshot = cache.get(CACHE_KEY, MISSING)
+        if snapshot is MISSING:
+            versions = cache.backend.tag_versions(CACHE_TAGS)
+            snapshot = compute_leaderboard(*_settings())
+            cache.set(CACHE_KEY, snapshot, ttl=app.config['LEADERBOARD_TTL'], versions=versions)
+    return snapshot
+
+
+# Whether a song whose stats are now (avg, count) could appear in, leave, or
+# reorder the snapshot
+def could_move(snapshot, song_id, rating_avg, rating_count, size, min_reviews):
+    if any(entry.id == song_id for entry in snapshot):
+        return True
+    if rating_avg is None or rating_count < min_reviews:
+        return False
+    if len(snapshot) < size:
+        return True
+    last = snapshot[-1]
+    return (rating_avg, rating_count) >= (last.rating_avg, last.rating_count)
+
+
+# Note songs' new aggregates, {song_id: (rating_avg, rating_count)}, for the
+# check made once the session commits. Bulk review writes that bypass the
+# ORM events call this directly.
+def record_rating_changes(session, changes):
+    session.info.setdefault('leaderboard_changes', {}).update(changes)
+
+
+# The rating triggers have already run when the mapper event fires, so the
+# song's new aggregates can be read on the flushing connection
+def _record_rating_change(mapper, connection, target):
+    stats = connection.execute(select(Song.rating_avg, Song.rating_count).
+                               where(Song.id == target.song_id)).first()
+    session = object_session(target)
+    if session is not None:
+        record_rating_changes(session, {target.song_id: (stats.rating_avg, stats.rating_count)
+                                        if stats else (None, 0)})
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Review, _event_name, _record_rating_change)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_if_top_changed(session):
+    changes = session.info.pop('leaderboard_changes', None)
+    if not changes:
+        return
+    snapshot = cache.peek(CACHE_KEY, MISSING)
+    size, min_reviews = _settings()
+    # Without a current snapshot a rebuild may be reading pre-commit data
+    # right now, so it must be invalidated too
+    if snapshot is MISSING or any(could_move(snapshot, song_id, avg, count, size, min_reviews)
+                                  for song_id, (avg, count) in changes.items()):
+        cache.invalidate('leaderboard')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rating_changes(session):
+    session.info.pop('leaderboard_changes', None)
@@ -0,0 +1,204 @@
+import math
+import random
+import re
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+# Upper bounds (ms) of the latency histogram buckets; one more bucket
+# collects everything slower than the last bound
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+_SONG_RE = re.compile(r'<h5 class="card-title">(.*?)</h5>.*?href="/review/(\d+)"', re.S)
+_OPTION_RE = re.compile(r'<option[^>]*value="(\d+)"[^>]*>(.*?)</option>', re.S)
+
+
+# Requests go straight into the WSGI app, one test client (cookie jar) per user
+class InProcessTransport:
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(as_text=True), response.headers.get('Location', '')
+
+
+# A test client already logged in as `username`, for in-process tools that
+# have no password to log in with
+def logged_in_client(flask_app, username):
+    if not flask_app.config.get('SECRET_KEY'):
+        # Sessions need a key; this process only talks to its own test client
+        flask_app.config['SECRET_KEY'] = secrets.token_hex(16)
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = username
+        session['_fresh'] = True
+    return client
+
+
+# Requests go over HTTP to a running instance, one requests.Session per user
+class HttpTransport:
+    def __init__(self, base_url, timeout=30):
+        import requests
+        self.session = requests.Session()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, data=None):
+        response = self.session.request(method, self.base_url + path, data=data,
+                                        allow_redirects=False, timeout=self.timeout)
+        return response.status_code, response.text, response.headers.get('Location', '')
+
+
+# Nearest-rank percentile of an already sorted list
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(1, math.ceil(pct / 100 * len(sorted_values))) - 1]
+
+
+class EndpointStats:
+    """Latencies and errors recorded for one endpoint."""
+
+    def __init__(self):
+        self.latencies_ms = []
+        self.errors = 0
+
+    def merge(self, other):
+        self.latencies_ms.extend(other.latencies_ms)
+        self.errors += other.errors
+
+    def summary(self):
+        ordered = sorted(self.latencies_ms)
+        histogram = {f'<={bound}ms': 0 for bound in HISTOGRAM_BUCKETS_MS}
+        histogram[f'>{HISTOGRAM_BUCKETS_MS[-1]}ms'] = 0
+        for latency in ordered:
+            bound = next((bound for bound in HISTOGRAM_BUCKETS_MS if latency <= bound), None)
+            histogram[f'<={bound}ms' if bound else f'>{HISTOGRAM_BUCKETS_MS[-1]}ms'] += 1
+        return {
+            'requests': len(ordered),
+            'errors': self.errors,
+            'error_rate': self.errors / len(ordered) if ordered else 0.0,
+            'p50_ms': round(percentile(ordered, 50), 3),
+            'p95_ms': round(percentile(ordered, 95), 3),
+            'p99_ms': round(percentile(ordered, 99), 3),
+            'max_ms': round(ordered[-1], 3) if ordered else 0.0,
+            'histogram': histogram,
+        }
+
+
+class VirtualUser:
+    """One simulated visitor following the scripted browse/review/share mix."""
+
+    def __init__(self, transport, username, password, recipient, terms, rng, think_time=0.0):
+        self.transport = transport
+        self.username = username
+        self.password = password
+        self.recipient = recipient
+        self.terms = terms
+        self.rng = rng
+        self.think_time = think_time
+        self.stats = {}
+
+    # Time one request; anything but an expected status counts as an error
+    def call(self, name, method, path, data=None, expect=(200,)):
+        stats = self.stats.setdefault(name, EndpointStats())
+        started = time.perf_counter()
+        try:
+            status, body, location = self.transport.request(method, path, data)
+        except Exception:
+            stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+            stats.errors += 1
+            return None
+        stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+        if status not in expect:
+            stats.errors += 1
+            return None
+        if self.think_time:
+            time.sleep(self.think_time)
+        return body, location
+
+    # POST a form after fetching it, carrying its CSRF token when there is one
+    def submit(self, name, path, data, page):
+        token = _CSRF_RE.search(page)
+        if token:
+            data = dict(data, csrf_token=token.group(1))
+        return self.call(name, 'POST', path, data, expect=(302,))
+
+    def login(self):
+        page = self.call('GET /login', 'GET', '/login')
+        if page is None:
+            return False
+        result = self.submit('POST /login', '/login',
+                             {'username': self.username, 'password': self.password}, page[0])
+        if result is None or 'dashboard' not in result[1]:
+            # Bad credentials redirect back to /login
+            if result is not None:
+                self.stats['POST /login'].errors += 1
+            return False
+        return True
+
+    def run_iteration(self):
+        term = self.rng.choice(self.terms)
+        page = self.call('GET /search', 'GET', f'/search?q={quote(term)}')
+        songs = _SONG_RE.findall(page[0]) if page else []
+        if songs:
+            title, song_id = self.rng.choice(songs)
+            page = self.call('GET /review/<id>', 'GET', f'/review/{song_id}')
+            if page:
+                self.submit('POST /review/<id>', f'/review/{song_id}',
+                            {'rating': str(self.rng.randint(1, 5)), 'comment': 'Load test review'}, page[0])
+            page = self.call('GET /share', 'GET', '/share')
+            options = _OPTION_RE.findall(page[0]) if page else []
+            if options:
+                # Share the review just written; fall back to the newest one
+                review_id = next((value for value, label in options if label.startswith(title)), options[0][0])
+                self.submit('POST /share', '/share',
+                            {'recipient_username': self.recipient, 'review': review_id}, page[0])
+        self.call('GET /dashboard', 'GET', '/dashboard')
+
+
+def run_load_test(transport_factory, usernames, password, terms, users=10, iterations=10,
+                  duration=None, seed=0, think_time=0.0):
+    """Drive `users` concurrent virtual users and return a report dict.
+
+    Each virtual user logs in once as usernames[i % len(usernames)], then
+    repeats the search -> review -> share -> dashboard mix `iterations`
+    times, or until `duration` seconds have passed when that is given.
+    Shares go to the next account in `usernames`.
+    """
+    deadline = time.perf_counter() + duration if duration else None
+
+    def run(index):
+        user = VirtualUser(transport_factory(), usernames[index % len(usernames)], password,
+                           usernames[(index + 1) % len(usernames)], terms,
+                           random.Random(f'{seed}-{index}'), think_time)
+        if user.login():
+            done = 0
+            while (deadline is None and done < iterations) or (deadline and time.perf_counter() < deadline):
+                user.run_iteration()
+                done += 1
+        return user.stats
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        per_user = list(pool.map(run, range(users)))
+    elapsed = time.perf_counter() - started
+
+    merged = {}
+    for stats in per_user:
+        for name, endpoint in stats.items():
+            merged.setdefault(name, EndpointStats()).merge(endpoint)
+    endpoints = {name: merged[name].summary() for name in sorted(merged)}
+    requests = sum(endpoint['requests'] for endpoint in endpoints.values())
+    errors = sum(endpoint['errors'] for endpoint in endpoints.values())
+    return {
+        'users': users,
+        'seconds': round(elapsed, 3),
+        'requests': requests,
+        'errors': errors,
+        'throughput': requests / elapsed if elapsed else 0.0,
+        'endpoints': endpoints,
+    }
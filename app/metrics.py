@@ -0,0 +1,229 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import deque
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Histogram bucket upper bounds; every histogram also has a +Inf bucket
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# name -> (type, help text, histogram buckets)
+METRICS = {
+    'flask_http_requests_total': ('counter', 'HTTP requests handled.', None),
+    'flask_http_request_duration_seconds': ('histogram', 'Time spent handling a request.', LATENCY_BUCKETS),
+    'flask_db_statements_total': ('counter', 'SQL statements executed.', None),
+    'flask_db_statement_seconds_total': ('counter', 'Time spent executing SQL statements.', None),
+    'flask_db_statements_per_request': ('histogram', 'SQL statements executed per request.', STATEMENT_BUCKETS),
+    'flask_db_pool_connections_total': ('counter', 'DBAPI connections opened by the pool.', None),
+    'flask_db_pool_checkouts_total': ('counter', 'Connections checked out of the pool.', None),
+    'flask_db_pool_checkins_total': ('counter', 'Connections returned to the pool.', None),
+    'flask_db_pool_checked_out': ('gauge', 'Connections currently checked out.', None),
+    'flask_db_pool_size': ('gauge', 'Configured pool size.', None),
+    'flask_db_pool_overflow': ('gauge', 'Connections open beyond the pool size.', None),
+    'flask_cache_hits_total': ('counter', 'Cache lookups answered from the cache.', None),
+    'flask_cache_misses_total': ('counter', 'Cache lookups that had to compute the value.', None),
+    'flask_cache_evictions_total': ('counter', 'Cache entries evicted to make room.', None),
+    'flask_cache_entries': ('gauge', 'Entries currently in the cache.', None),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+# Add a shard's {(name, labels): value or [bucket counts..., sum]} into `totals`
+def _add_into(totals, shard):
+    for key, value in shard.items():
+        if isinstance(value, list):
+            current = totals.get(key)
+            totals[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+class _Shard:
+    """One thread's values, held only by that thread's local storage."""
+
+    __slots__ = ('values', '__weakref__')
+
+    def __init__(self):
+        self.values = {}
+
+
+class MetricsRegistry:
+    """Counters and histograms sharded per thread.
+
+    Each thread only ever writes to its own shard, so recording a sample
+    takes no lock; a scrape sums the live shards and the retired totals.
+    When a thread ends its shard is folded into the retired totals, so
+    totals never go backwards and thread-per-request servers don't pile
+    up shards.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}  # id(values) -> values, one per live thread
+        self._retired = {}
+        # Values of finished threads, queued by their finalizers (which may
+        # run anywhere, even inside a locked section, so they take no lock)
+        self._finished = deque()
+        self._shards_lock = threading.Lock()
+        self._collectors = []
+
+    def _shard(self):
+        try:
+            return self._local.shard.values
+        except AttributeError:
+            shard = _Shard()
+            weakref.finalize(shard, self._finished.append, shard.values)
+            with self._shards_lock:
+                self._retire_finished()
+                self._shards[id(shard.values)] = shard.values
+            self._local.shard = shard
+            return shard.values
+
+    # Caller holds _shards_lock
+    def _retire_finished(self):
+        while self._finished:
+            values = self._finished.popleft()
+            self._shards.pop(id(values), None)
+            _add_into(self._retired, values)
+
+    def inc(self, name, labels=(), amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        shard = self._shard()
+        key = (name, labels)
+        counts = shard.get(key)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            counts = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        counts[bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    # Sum the retired totals and every live thread's shard:
+    # {(name, labels): value or [bucket counts..., sum]}
+    def collect(self):
+        totals = {}
+        with self._shards_lock:
+            self._retire_finished()
+            _add_into(totals, self._retired)
+            shards = list(self._shards.values())
+        for shard in shards:
+            _add_into(totals, shard.copy())
+        return totals
+
+    # `collector()` returns {(name, labels): value} read at scrape time, for
+    # values another component already keeps (pool state, cache counters)
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        values = self.collect()
+        for collector in self._collectors:
+            values.update(collector())
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            samples = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+            if not samples:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value[-1]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+# Endpoint label for the current request; raw paths would explode cardinality
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'none'
+
+
+def install_metrics(app, engine, registry=metrics):
+    """Record request latency, SQL statements/time and pool activity."""
+
+    def pool_gauges():
+        pool = engine.pool
+        gauges = {}
+        for name, method in (('flask_db_pool_checked_out', 'checkedout'), ('flask_db_pool_size', 'size'),
+                             ('flask_db_pool_overflow', 'overflow')):
+            if hasattr(pool, method):
+                gauges[(name, ())] = getattr(pool, method)()
+        return gauges
+
+    registry.add_collector(pool_gauges)
+
+    @app.before_request
+    def _start_request_metrics():
+        g._metrics_started = time.perf_counter()
+        g._metrics_statements = 0
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            labels = (('endpoint', _endpoint()),)
+            registry.inc('flask_http_requests_total',
+                         labels + (('method', request.method), ('status', response.status_code)))
+            registry.observe('flask_http_request_duration_seconds', labels, time.perf_counter() - started)
+            registry.observe('flask_db_statements_per_request', labels, g.pop('_metrics_statements', 0))
+        return response
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['_metrics_started'].pop()
+        labels = (('endpoint', _endpoint()),)
+        registry.inc('flask_db_statements_total', labels)
+        registry.inc('flask_db_statement_seconds_total', labels, time.perf_counter() - started)
+        if has_request_context() and '_metrics_statements' in g:
+            g._metrics_statements += 1
+
+    @event.listens_for(engine, 'handle_error')
+    def _drop_statement_timer(exception_context):
+        timers = exception_context.connection.info.get('_metrics_started') if exception_context.connection else None
+        if timers:
+            timers.pop()
+
+    @event.listens_for(engine, 'connect')
+    def _count_connect(dbapi_connection, connection_record):
+        registry.inc('flask_db_pool_connections_total')
+
+    @event.listens_for(engine, 'checkout')
+    def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+        registry.inc('flask_db_pool_checkouts_total')
+
+    @event.listens_for(engine, 'checkin')
+    def _count_checkin(dbapi_connection, connection_record):
+        registry.inc('flask_db_pool_checkins_total')
@@ -1,7 +1,7 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 import os
-from app import app, db, login
+from app import app, db
 from flask_login import UserMixin
 
 # Set up base directory and database config
@@ -23,8 +23,23 @@ class Song(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     artist = db.Column(db.String(100), nullable=False)
+    # Denormalized rating aggregates, kept current by triggers on `review`
+    # (see app/song_stats.py). rating_1..rating_5 form the star histogram.
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float)
     reviews = db.relationship('Review', backref='song', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_song_rating_avg_count', 'rating_avg', 'rating_count'),
+        db.Index('ix_song_title_artist', 'title', 'artist'),
+    )
+
 # Review model for storing reviews
 class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -33,13 +48,39 @@ class Review(db.Model):
     username = db.Column(db.String(20), db.ForeignKey('user.username'), nullable=False)
     song_id = db.Column(db.Integer, db.ForeignKey('song.id'), nullable=False)
 
+    __table_args__ = (
+        # Covers the user's reviews newest-first and the dashboard aggregates
+        db.Index('ix_review_username_id', 'username', 'id', 'song_id', 'rating'),
+        # One review per user and song; also the conflict target of the
+        # single-statement upsert in app/reviews.py
+        db.Index('uq_review_username_song_id', 'username', 'song_id', unique=True),
+        db.Index('ix_review_song_id', 'song_id'),
+    )
+
 # ReviewShares model for sharing reviews with users
 class ReviewShares(db.Model):
     share_id = db.Column(db.Integer, primary_key=True)
     review_id = db.Column(db.Integer, db.ForeignKey('review.id', name="required"), nullable=False)
     username = db.Column(db.String(20), db.ForeignKey('user.username', name="required2"), nullable=False)
 
-# User loader callback for Flask-Login
-@login.user_loader
-def load_user(user):
-    return User.query.filter_by(username=user).first()
+    __table_args__ = (
+        # A review is shared with a user at most once; share_reviews() in
+        # app/sharing.py inserts with ON CONFLICT DO NOTHING against it
+        db.Index('uq_review_shares_username_review_id', 'username', 'review_id', unique=True),
+    )
+
+# Version counter per cache tag, bumped in the same transaction as the writes
+# it describes (see app/cache/invalidation.py), so every worker process reads
+# the same versions. ETags and the catalog generation are built from these.
+class DataVersion(db.Model):
+    tag = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# Songs whose title or artist changed, or that were deleted, appended by
+# triggers on `song` (see app/suggestions.py). New songs need no entry: they
+# are found by id. The suggestion index reads it to refresh incrementally.
+class SongChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    song_id = db.Column(db.Integer, nullable=False)
+
+# The Flask-Login user loader (with its identity cache) is in app/user_cache.py
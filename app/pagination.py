@@ -0,0 +1,117 @@
+import base64
+import binascii
+import json
+from flask import request, url_for
+from sqlalchemy import tuple_
+from app import app
+
+
+class Page:
+    """One page of a keyset-paginated listing with opaque cursors."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+# Cursors are base64 JSON so clients treat them as opaque tokens
+def encode_cursor(direction, key):
+    raw = json.dumps({'d': direction, 'k': list(key)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+# A key value the database can bind: a scalar, with ints in SQLite's 64-bit range
+# SQLite integers are signed 64-bit; binding a larger Python int raises
+# OverflowError, so ids from clients are checked against this first
+def fits_sqlite_integer(value):
+    return -2 ** 63 <= value < 2 ** 63
+
+
+def _valid_key_value(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return fits_sqlite_integer(value)
+    return value is None or isinstance(value, (float, str))
+
+
+# Returns (direction, key) or (None, None) for a missing or malformed cursor
+def decode_cursor(token):
+    if not token:
+        return None, None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        direction, key = data['d'], data['k']
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None, None
+    if direction not in ('next', 'prev') or not isinstance(key, list) or \
+            not all(_valid_key_value(value) for value in key):
+        return None, None
+    return direction, key
+
+
+# Page size from ?per_page=, clamped to the configured maximum
+def requested_page_size():
+    per_page = request.args.get('per_page', app.config['PAGE_SIZE'], type=int)
+    return max(1, min(per_page, app.config['MAX_PAGE_SIZE']))
+
+
+def _after(keys, values, descending):
+    if len(keys) == 1:
+        return keys[0] < values[0] if descending else keys[0] > values[0]
+    left, right = tuple_(*keys), tuple_(*values)
+    return left < right if descending else left > right
+
+
+def keyset_paginate(query, keys, key_of, cursor=None, per_page=20, descending=False):
+    """Paginate `query` on the unique ordering `keys` without OFFSET.
+
+    `key_of(row)` returns the key values of a result row, in the same order
+    as `keys`. Every page is one indexed range scan of per_page + 1 rows;
+    the extra row only tells us whether another page exists.
+    """
+    direction, key = decode_cursor(cursor)
+    if key is not None and len(key) != len(keys):
+        direction, key = None, None
+
+    if direction == 'prev':
+        # Walk backwards from the cursor, then restore display order
+        query = query.filter(_after(keys, key, not descending))
+        order = [k.asc() if descending else k.desc() for k in keys]
+    else:
+        if direction == 'next':
+            query = query.filter(_after(keys, key, descending))
+        order = [k.desc() if descending else k.asc() for k in keys]
+
+    rows = query.order_by(*order).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == 'prev':
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, direction == 'next'
+
+    next_cursor = encode_cursor('next', key_of(rows[-1])) if rows and has_next else None
+    prev_cursor = encode_cursor('prev', key_of(rows[0])) if rows and has_prev else None
+    return Page(rows, next_cursor, prev_cursor)
+
+
+# URL of the current view with its query string and a different cursor
+@app.template_global()
+def page_url(cursor):
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
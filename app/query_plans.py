@@ -0,0 +1,121 @@
+import re
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import app, db
+from app.cache import cache
+from app.cache.backends import NullBackend
+from app.loadtest import logged_in_client
+from app.models import User, Song, Review
+from app.search_cache import search_results
+
+# A plan step like "SCAN review" (no index at all) reads the whole table.
+# "SCAN x USING INDEX" walks an index in order and is bounded by LIMIT, and
+# "SCAN x VIRTUAL TABLE" is the FTS index answering a MATCH.
+_FULL_SCAN_RE = re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)(?!.*\b(USING|VIRTUAL TABLE)\b)')
+
+
+# Plan details (strings) that are full table scans
+def full_scans(plan_details):
+    return [detail for detail in plan_details if _FULL_SCAN_RE.match(detail)]
+
+
+# GET paths exercised by the check; POST /review runs the same lookup as GET
+def _route_paths(username):
+    song = db.session.query(Song.id, Song.title).\
+        join(Review, Review.song_id == Song.id).filter(Review.username == username).first() \
+        or db.session.query(Song.id, Song.title).first()
+    if song is None:
+        return None
+    term = song.title.split()[0] if song.title.split() else song.title
+    return [
+        '/dashboard',
+        '/my-reviews',
+        '/my-reviews?per_page=1&cursor={my_reviews_next}',
+        '/shared-reviews',
+        '/share',
+        f'/search?q={term}',
+        f'/search?q={term}&per_page=1&cursor={{search_next}}',
+        f'/review/{song.id}',
+    ]
+
+
+class _StatementRecorder:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.statements.append((statement, parameters))
+
+
+# Cached dashboard counters, leaderboard snapshots and search pages would skip
+# their SQL, so the routes are requested with the caches switched off. The
+# swap is process-wide: the check is meant for the CLI, not a serving worker.
+@contextmanager
+def caches_disabled():
+    saved = [(instance, instance.backend) for instance in (cache, search_results)]
+    for instance, _ in saved:
+        instance.backend = NullBackend()
+    try:
+        yield
+    finally:
+        for instance, backend in saved:
+            instance.backend = backend
+
+
+def capture_route_queries(username):
+    """Request every hot route as `username`; return {path: [(sql, params)]}."""
+    with caches_disabled():
+        return _capture_route_queries(username)
+
+
+def _capture_route_queries(username):
+    paths = _route_paths(username)
+    if paths is None:
+        return {}
+
+    client = logged_in_client(app, username)
+
+    # Follow one real "next" cursor so the keyset predicates are checked too
+    cursors = {'my_reviews_next': '', 'search_next': ''}
+    first = client.get('/my-reviews?per_page=1&format=json').get_json() or {}
+    cursors['my_reviews_next'] = first.get('next') or ''
+    search_path = next(path for path in paths if path.startswith('/search?'))
+    first = client.get(search_path + '&per_page=1&format=json').get_json() or {}
+    cursors['search_next'] = first.get('next') or ''
+
+    captured = {}
+    engine = db.engine
+    for path in paths:
+        path = path.format(**cursors)
+        recorder = _StatementRecorder()
+        event.listen(engine, 'before_cursor_execute', recorder)
+        try:
+            client.get(path)
+        finally:
+            event.remove(engine, 'before_cursor_execute', recorder)
+        captured[path] = recorder.statements
+    return captured
+
+
+def explain(statement, parameters):
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans(username):
+    """Yield (path, statement, plan details, full scans) for every captured query."""
+    for path, statements in capture_route_queries(username).items():
+        seen = set()
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = explain(statement, parameters)
+            yield path, statement, plan, full_scans(plan)
+
+
+# Username to run the check as when none is given
+def default_username():
+    return db.session.query(User.username).order_by(User.username).limit(1).scalar()
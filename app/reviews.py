@@ -0,0 +1,145 @@
+from sqlalchemy import and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.cache.invalidation import record_tags
+from app.leaderboard import record_rating_changes
+from app.models import Song, Review
+from app.pagination import fits_sqlite_integer
+
+RATINGS = (1, 2, 3, 4, 5)
+
+
+class ReviewError(ValueError):
+    """A review write rejected before touching the database; `field` names the bad input."""
+
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+
+
+def validate_review(rating, comment):
+    """Return (rating, comment) normalized, or raise ReviewError.
+
+    Ratings may be ints or digit strings (as HTML forms send them); a
+    missing comment becomes ''.
+    """
+    if isinstance(rating, bool) or not isinstance(rating, (int, str)):
+        raise ReviewError('rating', 'Rating must be a whole number from 1 to 5.')
+    try:
+        rating = int(rating)
+    except ValueError:
+        raise ReviewError('rating', 'Rating must be a whole number from 1 to 5.')
+    if rating not in RATINGS:
+        raise ReviewError('rating', 'Rating must be a whole number from 1 to 5.')
+    if comment is None:
+        comment = ''
+    if not isinstance(comment, str):
+        raise ReviewError('comment', 'Comment must be text.')
+    return rating, comment
+
+
+# INSERT ... ON CONFLICT (username, song_id) DO UPDATE: a review is created or
+# replaced in one statement, so concurrent submits can never leave two rows
+def _upsert():
+    statement = sqlite_insert(Review.__table__)
+    return statement.on_conflict_do_update(
+        index_elements=['username', 'song_id'],
+        set_={'rating': statement.excluded.rating, 'comment': statement.excluded.comment},
+    ).returning(Review.id, Review.song_id)
+
+
+# Core writes skip the ORM events, so record the cache tags and the songs' new
+# rating aggregates for the after-commit hooks
+def _record_changes(username, song_ids):
+    stats = db.session.query(Song.id, Song.rating_avg, Song.rating_count).filter(Song.id.in_(song_ids))
+    record_rating_changes(db.session, {song_id: (avg, count) for song_id, avg, count in stats})
+    record_tags(db.session, ['review', f'review:user:{username}', 'song:stats'])
+
+
+def save_review(username, song_id, rating, comment):
+    """Create or replace `username`'s review of a song and commit; return its id.
+
+    The song must exist; callers check it.
+    """
+    rating, comment = validate_review(rating, comment)
+    review_id = db.session.execute(_upsert(), {'rating': rating, 'comment': comment, 'username': username,
+                                               'song_id': song_id}).first().id
+    _record_changes(username, [song_id])
+    db.session.commit()
+    return review_id
+
+
+def _song_id(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ReviewError('song_id', 'song_id must be an integer.')
+    try:
+        song_id = int(value)
+    except ValueError:
+        raise ReviewError('song_id', 'song_id must be an integer.')
+    if not fits_sqlite_integer(song_id):
+        raise ReviewError('song_id', 'song_id is out of range.')
+    return song_id
+
+
+def save_reviews(username, items):
+    """Create or update many of `username`'s reviews in one transaction.
+
+    `items` are dicts with song_id, rating and an optional comment. All of
+    them are validated first; when a song appears more than once the last
+    item wins. Existing reviews and songs are found with one IN query, then
+    every new or changed review is written with one executemany of the
+    upsert; the rating triggers keep the song aggregates current inside the
+    same transaction. Returns one result dict per item, in order, with a
+    `status` of created, updated, unchanged, superseded, not_found or
+    invalid.
+    """
+    results = []
+    latest = {}
+    for index, item in enumerate(items):
+        result = {'index': index}
+        results.append(result)
+        try:
+            if not isinstance(item, dict):
+                raise ReviewError(None, 'Each review must be an object.')
+            song_id = _song_id(item.get('song_id'))
+            rating, comment = validate_review(item.get('rating'), item.get('comment'))
+        except ReviewError as error:
+            result.update(status='invalid', field=error.field, error=str(error))
+            continue
+        result['song_id'] = song_id
+        if song_id in latest:
+            results[latest[song_id][0]]['status'] = 'superseded'
+        latest[song_id] = (index, rating, comment)
+
+    if not latest:
+        return results
+
+    rows = db.session.query(Song.id, Review.id, Review.rating, Review.comment).\
+        outerjoin(Review, and_(Review.song_id == Song.id, Review.username == username)).\
+        filter(Song.id.in_(latest))
+    existing = {song_id: (review_id, rating, comment) for song_id, review_id, rating, comment in rows}
+
+    writes = []
+    for song_id, (index, rating, comment) in latest.items():
+        result = results[index]
+        if song_id not in existing:
+            result.update(status='not_found', error='Song not found.')
+            continue
+        review_id, old_rating, old_comment = existing[song_id]
+        if review_id is None:
+            result['status'] = 'created'
+        elif (old_rating, old_comment or '') == (rating, comment):
+            result.update(status='unchanged', review_id=review_id)
+            continue
+        else:
+            result['status'] = 'updated'
+        writes.append({'rating': rating, 'comment': comment, 'username': username, 'song_id': song_id})
+
+    if writes:
+        # One executemany of the upsert; a review created by a concurrent
+        # request since the lookup is simply updated
+        for review_id, song_id in db.session.execute(_upsert(), writes):
+            results[latest[song_id][0]]['review_id'] = review_id
+        _record_changes(username, [write['song_id'] for write in writes])
+    db.session.commit()
+    return results
@@ -5,7 +5,18 @@ from app.models import User, Song, Review, ReviewShares
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
+from sqlalchemy.orm import joinedload
 from app.forms import ReviewSendForm, LoginForm, RegistrationForm, SearchForm, AddSongForm, ReviewForm
+from app.search_cache import search_page
+from app.pagination import Page, keyset_paginate, requested_page_size
+from app.suggestions import song_suggestions
+from app.metrics import metrics
+from app.cache import cached
+from app.leaderboard import top_songs
+from app.conditional import conditional
+from app.assets import send_asset
+from app.reviews import save_review
+from app.sharing import ShareError, parse_recipients, share_reviews
 import datetime
 
 # Redirect root and /index to login page
@@ -56,31 +67,36 @@ def register():
     return render_template('login.html', title="Welcome to TUN'D", form=login_form, register_form=form)
 
 
+# The user's review counters for the dashboard, kept until their reviews (or
+# song titles/artists) change. All three come from one aggregate pass.
+@cached(key='dashboard-stats:{username}', tags=('review:user:{username}', 'song'))
+def dashboard_stats(username):
+    return tuple(db.session.query(
+        db.func.count(Review.id),
+        db.func.count(db.distinct(Review.song_id)),
+        db.func.count(db.distinct(Song.artist)),
+    ).join(Song, Song.id == Review.song_id).filter(Review.username == username).one())
+
 @app.route('/dashboard')
 @login_required
+@conditional('review:user:{username}', 'song', 'song:stats')
 def dashboard():
     # Dashboard for logged-in user, shows stats and recent/top reviews
     username = current_user.get_id()
-    user = User.query.filter_by(username=username).first()
-    
-    user_reviews = Review.query.filter_by(username=username).all()
-    
-    total_reviews = len(user_reviews)
-    reviewed_songs = db.session.query(Review.song_id).filter_by(username=username).distinct().count()
-    reviewed_artists = db.session.query(Song.artist).join(Review).filter(Review.username == username).distinct().count()
-    
-    recent_reviews = Review.query.filter_by(username=username).order_by(Review.id.desc()).limit(5).all()
+
+    total_reviews, reviewed_songs, reviewed_artists = dashboard_stats(username)
     
-    top_songs = db.session.query(Song).join(Review).group_by(Song.id).order_by(db.func.avg(Review.rating).desc()).limit(5).all()
+    recent_reviews = Review.query.options(joinedload(Review.song)).\
+        filter_by(username=username).order_by(Review.id.desc()).limit(5).all()
     
     return render_template('dashboard.html', 
                            title="Dashboard",
-                           user=user,
+                           user=current_user,
                            total_reviews=total_reviews,
                            reviewed_songs=reviewed_songs,
                            reviewed_artists=reviewed_artists,
                            recent_reviews=recent_reviews,
-                           top_songs=top_songs)
+                           top_songs=top_songs())
 
 # Logout route for users
 @app.route('/logout')
@@ -88,18 +104,38 @@ def logout():
     logout_user()
     return redirect(url_for('index'))
 
+# JSON shapes for the paginated listings' ?format=json variant
+def song_to_dict(song):
+    return {'id': song.id, 'title': song.title, 'artist': song.artist}
+
+def review_to_dict(review):
+    return {'id': review.id, 'rating': review.rating, 'comment': review.comment,
+            'reviewer': review.username, 'song': song_to_dict(review.song)}
+
+def page_to_json(page, serialize):
+    return jsonify({'items': [serialize(item) for item in page],
+                    'next': page.next_cursor,
+                    'prev': page.prev_cursor})
+
 # Route to display user's own reviews
 @app.route('/my-reviews')
 @login_required
+@conditional('review:user:{username}', 'song')
 def my_reviews():
     username = current_user.get_id()
-    user_reviews = Review.query.filter_by(username=username).order_by(Review.id.desc()).all()
+    user_reviews = Review.query.options(joinedload(Review.song)).filter_by(username=username)
+    page = keyset_paginate(user_reviews, [Review.id], lambda review: [review.id],
+                           cursor=request.args.get('cursor'),
+                           per_page=requested_page_size(), descending=True)
     
-    return render_template('my_reviews.html', title="My Reviews", reviews=user_reviews)
+    if request.args.get('format') == 'json':
+        return page_to_json(page, review_to_dict)
+    return render_template('my_reviews.html', title="My Reviews", reviews=page)
 
 # Route for searching songs and artists
 @app.route('/search', methods=['GET', 'POST'])
 @login_required
+@conditional('song')
 def search():
     search_form = SearchForm()
     add_song_form = AddSongForm()
@@ -108,15 +144,14 @@ def search():
         return redirect(url_for('search', q=search_form.query.data))
     
     query = request.args.get('q', '')
+    results = Page([])
     if query:
         search_form.query.data = query
         
-        results = Song.query.filter(
-            (Song.title.ilike(f'%{query}%')) | (Song.artist.ilike(f'%{query}%'))
-        ).all()
-    else:
-        results = []
+        results = search_page(query, cursor=request.args.get('cursor'), per_page=requested_page_size())
     
+    if request.args.get('format') == 'json':
+        return page_to_json(results, song_to_dict)
     return render_template('search.html', 
                           title="Search Music", 
                           search_form=search_form, 
@@ -124,6 +159,25 @@ def search():
                           results=results, 
                           query=query)
 
+# Route for search-as-you-type suggestions (JSON)
+@app.route('/search-suggestions')
+@login_required
+def search_suggestions():
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', app.config['SUGGESTIONS_LIMIT'], type=int)
+    limit = max(0, min(limit, app.config['SUGGESTIONS_MAX_LIMIT']))
+    return jsonify({'suggestions': song_suggestions.suggest(query, limit)})
+
+# Route exposing request, SQL and pool metrics in Prometheus text format
+@app.route('/metrics')
+def metrics_endpoint():
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+# Route serving content-hashed static files (see asset_url)
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    return send_asset(filename)
+
 # Route to add a new song
 @app.route('/add-song', methods=['POST'])
 @login_required
@@ -157,29 +211,17 @@ def review(song_id):
     song = Song.query.get_or_404(song_id)
     form = ReviewForm()
     
-    existing_review = Review.query.filter_by(username=current_user.get_id(), song_id=song_id).first()
-    
-    if existing_review and request.method == 'GET':
-        form.rating.data = str(existing_review.rating)
-        form.comment.data = existing_review.comment
-        form.submit.label.text = 'Update Review'
+    if request.method == 'GET':
+        # Prefill the form when the user already reviewed this song
+        existing_review = Review.query.filter_by(username=current_user.get_id(), song_id=song_id).first()
+        if existing_review:
+            form.rating.data = str(existing_review.rating)
+            form.comment.data = existing_review.comment
+            form.submit.label.text = 'Update Review'
     
     if form.validate_on_submit():
-        rating = int(form.rating.data)
-        comment = form.comment.data
-        username = current_user.get_id()
-        
-        if existing_review:
-            existing_review.rating = rating
-            existing_review.comment = comment
-            db.session.commit()
-            flash('Your review has been updated!')
-        else:
-            new_review = Review(rating=rating, comment=comment, username=username, song_id=song_id)
-            db.session.add(new_review)
-            db.session.commit()
-            flash('Your review has been added!')
-        
+        save_review(current_user.get_id(), song_id, form.rating.data, form.comment.data)
+        flash('Your review has been saved!')
         return redirect(url_for('my_reviews'))
     
     return render_template('review.html', title=f"Review - {song.title}", song=song, form=form)
@@ -187,19 +229,23 @@ def review(song_id):
 # Route to view reviews shared with the current user
 @app.route('/shared-reviews')
 @login_required
+@conditional('share:user:{username}', 'review', 'song')
 def shared_reviews():
     username = current_user.get_id()
     
     shared_reviews = db.session.query(Review).\
         join(ReviewShares, Review.id == ReviewShares.review_id).\
-        filter(ReviewShares.username == username).all()
-    
-    for review in shared_reviews:
-        review.song_details = Song.query.get(review.song_id)
+        options(joinedload(Review.song), joinedload(Review.reviewer)).\
+        filter(ReviewShares.username == username)
+    page = keyset_paginate(shared_reviews, [Review.id], lambda review: [review.id],
+                           cursor=request.args.get('cursor'),
+                           per_page=requested_page_size(), descending=True)
     
+    if request.args.get('format') == 'json':
+        return page_to_json(page, review_to_dict)
     return render_template('shared_reviews.html', 
                            title="Reviews Shared With Me", 
-                           shared_reviews=shared_reviews)
+                           shared_reviews=page)
 
 # Route to get current server time (JSON)
 @app.route('/current-time')
@@ -207,14 +253,14 @@ def current_time():
     now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     return jsonify({'time': now})
   
-# Route to share a review with another user
+# Route to share reviews with one or more other users
 @app.route('/share', methods=['GET', 'POST'])
 @login_required
 def share():
     username = current_user.get_id()
-    user = User.query.filter_by(username=username).first()
     
-    reviews = Review.query.filter_by(username=username).order_by(Review.id.desc()).all()
+    reviews = Review.query.options(joinedload(Review.song)).\
+        filter_by(username=username).order_by(Review.id.desc()).all()
 
     form = ReviewSendForm()
     
@@ -225,16 +271,25 @@ def share():
 
     if form.validate_on_submit():
         try:
-            review_id = int(form.review.data)
-            new_share = ReviewShares(review_id=review_id, username=form.recipient_username.data)
-            db.session.add(new_share)
-            db.session.commit()
-            flash('Review shared successfully!')
-        except Exception as e:
+            results = share_reviews(username, [int(review_id) for review_id in form.review.data],
+                                    parse_recipients(form.recipient_username.data))
+        except ShareError as e:
             flash(f'Error sharing review: {str(e)}')
+            return redirect(url_for('share'))
+        # One message per outcome, naming the recipients it applies to
+        by_status = {}
+        for result in results:
+            by_status.setdefault(result['status'], []).append(result['recipient'])
+        noun = 'Review' if len(form.review.data) == 1 else 'Reviews'
+        if 'shared' in by_status:
+            flash(f"{noun} shared successfully with {', '.join(by_status['shared'])}!")
+        if 'already_shared' in by_status:
+            flash(f"Already shared with {', '.join(by_status['already_shared'])}.")
+        if 'not_found' in by_status:
+            flash(f"No user named {', '.join(by_status['not_found'])}.")
         return redirect(url_for('share'))
     
     return render_template("share.html", title="Share", 
-                           user=user,
+                           user=current_user,
                            reviews=reviews,
                            form=form)
\ No newline at end of file
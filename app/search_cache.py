@@ -0,0 +1,71 @@
+from flask import g
+from app import app, db
+from app.cache import Cache, register_cache_metrics
+from app.cache.backends import MemoryBackend
+from app.cache.invalidation import data_versions
+from app.models import Song
+from app.pagination import Page, keyset_paginate
+from app.search_index import song_search_query, song_fts
+from app.suggestions import normalize
+
+# Pages of search results as song ids, most recently used kept. Kept apart
+# from the shared cache so popular searches can't evict other entries.
+search_results = Cache(MemoryBackend(maxsize=app.config['SEARCH_CACHE_SIZE']),
+                       default_ttl=app.config['SEARCH_CACHE_TTL'])
+register_cache_metrics('search', search_results)
+
+
+# Catalog generation: the 'song' data version, bumped in the database by every
+# committed song insert/update/delete and by bulk imports, whichever process
+# made them. Keys include it, so a catalog change makes every older entry
+# unreachable (they age out of the LRU). A conditional page has already read
+# it for its ETag in this request.
+def catalog_generation():
+    versions = g.get('data_versions', {})
+    return versions['song'] if 'song' in versions else data_versions(['song'])['song']
+
+
+def search_cache_key(query, cursor, per_page, generation):
+    return f'{generation}|{per_page}|{cursor or ""}|{normalize(query)}'
+
+
+def search_page(query, cursor=None, per_page=20, columns=None):
+    """Return a Page of Songs matching `query`, best BM25 rank first.
+
+    With `columns` (Song columns, including one labelled 'id') the page holds
+    plain rows of those columns instead of Songs. A cached page holds only
+    ids and cursors; its songs are loaded with a single IN query in the
+    cached order.
+    """
+    key = search_cache_key(query, cursor, per_page, catalog_generation())
+    entry = search_results.get(key)
+    if entry is not None:
+        ids, next_cursor, prev_cursor = entry
+        return Page(_load_in_order(ids, columns), next_cursor, prev_cursor)
+
+    matches = song_search_query(query, *(columns or ()))
+    if matches is None:
+        return Page([])
+    # Keyset on (BM25 rank, id) keeps relevance order across pages
+    if columns:
+        page = keyset_paginate(matches, [song_fts.c.rank, Song.id], lambda row: [row.rank, row.id],
+                               cursor=cursor, per_page=per_page)
+        ids = [row.id for row in page.items]
+        page.items = [tuple(row)[:-1] for row in page.items]
+    else:
+        page = keyset_paginate(matches, [song_fts.c.rank, Song.id], lambda row: [row.rank, row.Song.id],
+                               cursor=cursor, per_page=per_page)
+        page.items = [song for song, rank in page.items]
+        ids = [song.id for song in page.items]
+    search_results.set(key, (ids, page.next_cursor, page.prev_cursor))
+    return page
+
+
+def _load_in_order(ids, columns=None):
+    if not ids:
+        return []
+    if columns:
+        rows = {row.id: tuple(row) for row in db.session.query(*columns).filter(Song.id.in_(ids))}
+    else:
+        rows = {song.id: song for song in Song.query.filter(Song.id.in_(ids))}
+    return [rows[song_id] for song_id in ids if song_id in rows]
@@ -0,0 +1,86 @@
+import re
+from sqlalchemy import DDL, column, event, table, text
+from app import db
+from app.models import Song
+
+# External-content FTS5 table mirroring Song.title / Song.artist. The rows
+# live in `song`; the index only stores the tokens, keyed by rowid = song.id.
+FTS_TABLE = 'song_fts'
+
+CREATE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS song_fts USING fts5("
+    "title, artist, content='song', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+
+# Triggers keep the index in step with every write to `song`, whether it
+# comes from add_song(), a CLI command or a raw SQL session.
+CREATE_FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS song_fts_ai AFTER INSERT ON song BEGIN "
+    "INSERT INTO song_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS song_fts_ad AFTER DELETE ON song BEGIN "
+    "INSERT INTO song_fts(song_fts, rowid, title, artist) VALUES ('delete', old.id, old.title, old.artist); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS song_fts_au AFTER UPDATE OF title, artist ON song BEGIN "
+    "INSERT INTO song_fts(song_fts, rowid, title, artist) VALUES ('delete', old.id, old.title, old.artist); "
+    "INSERT INTO song_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist); "
+    "END",
+]
+
+DROP_FTS_TABLE = "DROP TABLE IF EXISTS song_fts"
+
+# Create/drop the index alongside the song table so db.create_all() and
+# db.drop_all() (used by init-db and the tests) produce the same schema as
+# the migrations.
+event.listen(Song.__table__, 'after_create', DDL(DROP_FTS_TABLE).execute_if(dialect='sqlite'))
+event.listen(Song.__table__, 'after_create', DDL(CREATE_FTS_TABLE).execute_if(dialect='sqlite'))
+for _trigger in CREATE_FTS_TRIGGERS:
+    event.listen(Song.__table__, 'after_create', DDL(_trigger).execute_if(dialect='sqlite'))
+event.listen(Song.__table__, 'before_drop', DDL(DROP_FTS_TABLE).execute_if(dialect='sqlite'))
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# Turn free text into an FTS5 MATCH expression: every word must match as a
+# prefix of some token in the title or artist. Words are quoted so user input
+# can never be parsed as FTS5 query syntax.
+def build_match_query(query):
+    tokens = _TOKEN_RE.findall(query or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+# Lightweight handle on the FTS table for use in ORM queries; `rank` is the
+# hidden BM25 score column (lower is better).
+song_fts = table(FTS_TABLE, column('rowid'), column('rank'))
+
+
+# Query of (Song, rank) rows matching `query`, or None when there is nothing
+# to search for. Pass Song columns as `entities` to select plain rows of
+# them instead of Songs. Callers add ordering (rank, Song.id) and limits.
+def song_search_query(query, *entities):
+    match = build_match_query(query)
+    if not match:
+        return None
+    return db.session.query(*(entities or (Song,)), song_fts.c.rank).\
+        join(song_fts, song_fts.c.rowid == Song.id).\
+        filter(text('song_fts MATCH :match')).params(match=match)
+
+
+# Return Songs matching `query`, best BM25 rank first.
+def search_songs(query, limit=None):
+    results = song_search_query(query)
+    if results is None:
+        return []
+    results = results.order_by(song_fts.c.rank, Song.id)
+    if limit:
+        results = results.limit(limit)
+    return [song for song, rank in results]
+
+
+# Rebuild the whole index from the song table (after bulk loads or if the
+# index was created on top of an existing catalog).
+def rebuild_search_index():
+    db.session.execute(text("INSERT INTO song_fts(song_fts) VALUES ('rebuild')"))
+    db.session.execute(text("INSERT INTO song_fts(song_fts) VALUES ('optimize')"))
+    db.session.commit()
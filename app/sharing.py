@@ -0,0 +1,64 @@
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.cache.invalidation import record_tags
+from app.models import User, Review, ReviewShares
+
+
+class ShareError(ValueError):
+    """A share rejected before it was written; `field` names the bad input."""
+
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+
+
+def parse_recipients(text):
+    """Split a comma- or space-separated list of usernames, dropping repeats."""
+    return list(dict.fromkeys(text.replace(',', ' ').split()))
+
+
+def share_reviews(owner, review_ids, recipients):
+    """Share some of `owner`'s reviews with each of `recipients` and commit.
+
+    Raises ShareError unless every review is the owner's. The recipients
+    are checked with one IN query and every missing (review, recipient)
+    pair is written with one INSERT ... ON CONFLICT DO NOTHING, so shares
+    that already exist are left alone. Returns one result dict per distinct
+    recipient, in order, with a `status` of shared, already_shared or
+    not_found and the ids of the reviews newly shared with them.
+    """
+    review_ids = list(dict.fromkeys(review_ids))
+    recipients = list(dict.fromkeys(recipients))
+    if not review_ids:
+        raise ShareError('review_id', 'Choose a review to share.')
+    if not recipients:
+        raise ShareError('recipient', 'Enter at least one recipient.')
+    owned = db.session.query(Review.id).filter(Review.id.in_(review_ids), Review.username == owner)
+    if len({review_id for review_id, in owned}) != len(review_ids):
+        raise ShareError('review_id', 'Review not found.')
+    known = {username for username, in db.session.query(User.username).filter(User.username.in_(recipients))}
+
+    shared = {}
+    pairs = [{'review_id': review_id, 'username': recipient}
+             for recipient in recipients if recipient in known for review_id in review_ids]
+    if pairs:
+        statement = sqlite_insert(ReviewShares.__table__).on_conflict_do_nothing(
+            index_elements=['username', 'review_id'],
+        ).returning(ReviewShares.review_id, ReviewShares.username)
+        # Only the inserted pairs come back
+        for review_id, username in db.session.execute(statement, pairs):
+            shared.setdefault(username, []).append(review_id)
+        # Core inserts skip the ORM events, so record the cache tags here
+        if shared:
+            record_tags(db.session, ['share'] + [f'share:user:{username}' for username in shared])
+    db.session.commit()
+
+    results = []
+    for recipient in recipients:
+        if recipient not in known:
+            results.append({'recipient': recipient, 'status': 'not_found', 'review_ids': []})
+        elif recipient in shared:
+            results.append({'recipient': recipient, 'status': 'shared', 'review_ids': sorted(shared[recipient])})
+        else:
+            results.append({'recipient': recipient, 'status': 'already_shared', 'review_ids': []})
+    return results
@@ -0,0 +1,132 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from flask import has_request_context, request
+from sqlalchemy import event
+
+# Only statements SQLite can EXPLAIN without side effects get a plan
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+# Keep numbers/None (ids, limits: useful when reading a plan) and hide the
+# contents of strings and blobs, which can hold user input or password hashes
+def redact(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__} len={len(value)}>'
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return f'<{type(value).__name__}>'
+
+
+class SlowQueryLog:
+    """Log statements slower than `threshold_ms` to a rotating JSONL file.
+
+    Timing happens on the request thread; the EXPLAIN QUERY PLAN and the
+    file write happen on a background thread so a slow query does not get
+    slower by being logged. If the queue is full the entry is dropped and
+    counted in `dropped`.
+    """
+
+    def __init__(self, engine, threshold_ms, path, max_bytes=10 * 1024 * 1024, backups=5, queue_size=1000):
+        self.engine = engine
+        self.threshold = threshold_ms / 1000
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                           encoding='utf-8', delay=True)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def install(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before)
+        event.listen(self.engine, 'after_cursor_execute', self._after)
+        event.listen(self.engine, 'handle_error', self._error)
+        return self
+
+    def remove(self):
+        event.remove(self.engine, 'before_cursor_execute', self._before)
+        event.remove(self.engine, 'after_cursor_execute', self._after)
+        event.remove(self.engine, 'handle_error', self._error)
+        self.flush()
+        self.handler.close()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_slowlog_started', []).append(time.perf_counter())
+
+    def _error(self, exception_context):
+        timers = exception_context.connection.info.get('_slowlog_started') if exception_context.connection else None
+        if timers:
+            timers.pop()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['_slowlog_started'].pop()
+        # The worker's own EXPLAINs must never be logged (or re-explained)
+        if elapsed < self.threshold or statement.lstrip().upper().startswith('EXPLAIN'):
+            return
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'duration_ms': round(elapsed * 1000, 3),
+            'endpoint': (request.endpoint or 'unmatched') if has_request_context() else None,
+            'method': request.method if has_request_context() else None,
+            'sql': statement,
+            'params': redact(parameters),
+            'executemany': executemany,
+        }
+        # Raw parameters travel with the entry for EXPLAIN but are never written
+        explain_parameters = parameters[0] if executemany and parameters else parameters
+        try:
+            self.queue.put_nowait((entry, statement, explain_parameters))
+        except queue.Full:
+            with self._worker_lock:
+                self.dropped += 1
+            return
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                    self._worker.start()
+
+    def explain(self, statement, parameters):
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        with self.engine.connect() as connection:
+            rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters or ()).fetchall()
+        return [row[-1] for row in rows]
+
+    def _run(self):
+        while True:
+            entry, statement, parameters = self.queue.get()
+            try:
+                try:
+                    entry['plan'] = self.explain(statement, parameters)
+                except Exception as error:
+                    entry['plan'] = None
+                    entry['plan_error'] = str(error)
+                self.handler.handle(logging.makeLogRecord({'msg': json.dumps(entry), 'levelno': logging.WARNING}))
+            finally:
+                self.queue.task_done()
+
+    # Block until every queued entry has been explained and written
+    def flush(self):
+        self.queue.join()
+
+
+def install_slow_query_log(engine, config):
+    """Attach a SlowQueryLog to `engine` unless SLOW_QUERY_LOG is empty."""
+    if not config.get('SLOW_QUERY_LOG') or config.get('SLOW_QUERY_MS') is None:
+        return None
+    return SlowQueryLog(engine, config['SLOW_QUERY_MS'], config['SLOW_QUERY_LOG'],
+                        max_bytes=config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                        backups=config.get('SLOW_QUERY_LOG_BACKUPS', 5)).install()
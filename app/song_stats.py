@@ -0,0 +1,82 @@
+from sqlalchemy import DDL, bindparam, case, event, func, update
+from app import db
+from app.cache.invalidation import record_tags
+from app.models import Song, Review
+
+STAR_VALUES = (1, 2, 3, 4, 5)
+
+
+# SET clause that adds (sign=+1) or removes (sign=-1) one rating held in
+# `row.rating` from a song's aggregates. In SQLite every right-hand side sees
+# the pre-update column values, so rating_avg is computed from them directly.
+def _apply_rating_sql(row, sign):
+    op = '+' if sign > 0 else '-'
+    histogram = ', '.join(
+        f"rating_{star} = rating_{star} {op} ({row}.rating = {star})" for star in STAR_VALUES
+    )
+    return (
+        f"UPDATE song SET rating_count = rating_count {op} 1, "
+        f"rating_sum = rating_sum {op} {row}.rating, {histogram}, "
+        f"rating_avg = CASE WHEN rating_count {op} 1 > 0 "
+        f"THEN (rating_sum {op} {row}.rating) * 1.0 / (rating_count {op} 1) END "
+        f"WHERE id = {row}.song_id;"
+    )
+
+
+# Triggers run inside the writing transaction, so aggregates can never drift
+# from the review rows no matter which code path wrote them.
+CREATE_STATS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS review_stats_ai AFTER INSERT ON review BEGIN "
+    + _apply_rating_sql('new', +1) + " END",
+    "CREATE TRIGGER IF NOT EXISTS review_stats_ad AFTER DELETE ON review BEGIN "
+    + _apply_rating_sql('old', -1) + " END",
+    "CREATE TRIGGER IF NOT EXISTS review_stats_au AFTER UPDATE OF rating, song_id ON review BEGIN "
+    + _apply_rating_sql('old', -1) + " " + _apply_rating_sql('new', +1) + " END",
+]
+
+for _trigger in CREATE_STATS_TRIGGERS:
+    event.listen(Review.__table__, 'after_create', DDL(_trigger).execute_if(dialect='sqlite'))
+
+
+# Recompute every song's aggregates from the review table, `chunk_size` song
+# ids per transaction so writers are never blocked for long. Yields the number
+# of songs processed after each chunk.
+def rebuild_song_stats(chunk_size=1000):
+    max_id = db.session.query(func.max(Song.id)).scalar() or 0
+    set_stats = update(Song).where(Song.id == bindparam('song_id')).values(
+        rating_count=bindparam('count'),
+        rating_sum=bindparam('total'),
+        rating_avg=bindparam('avg'),
+        **{f'rating_{star}': bindparam(f'r{star}') for star in STAR_VALUES},
+    )
+
+    processed = 0
+    for low in range(1, max_id + 1, chunk_size):
+        high = low + chunk_size - 1
+        aggregates = db.session.query(
+            Review.song_id,
+            func.count(Review.id),
+            func.sum(Review.rating),
+            *[func.sum(case((Review.rating == star, 1), else_=0)) for star in STAR_VALUES],
+        ).filter(Review.song_id.between(low, high)).group_by(Review.song_id).all()
+        by_song = {row[0]: row[1:] for row in aggregates}
+
+        song_ids = [row[0] for row in db.session.query(Song.id).filter(Song.id.between(low, high))]
+        if not song_ids:
+            continue
+        params = []
+        for song_id in song_ids:
+            count, total, *histogram = by_song.get(song_id, (0, 0, 0, 0, 0, 0, 0))
+            params.append({
+                'song_id': song_id,
+                'count': count,
+                'total': total,
+                'avg': total / count if count else None,
+                **{f'r{star}': histogram[star - 1] for star in STAR_VALUES},
+            })
+        # Core executemany; skips ORM bookkeeping for the whole chunk
+        db.session.connection().execute(set_stats, params)
+        record_tags(db.session, ['song:stats', 'leaderboard'])
+        db.session.commit()
+        processed += len(song_ids)
+        yield processed
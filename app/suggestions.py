@@ -0,0 +1,234 @@
+import threading
+import unicodedata
+from flask import current_app
+from sortedcontainers import SortedList
+from sqlalchemy import DDL, event, func
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.cache.invalidation import data_versions
+from app.models import Song, SongChange
+
+
+# Casefold, strip accents and collapse whitespace so "Beyoncé " matches "beyonce"
+def normalize(value):
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+# Triggers logging title/artist edits and deletions to song_change, so any
+# process can find the songs changed since its index was last refreshed
+CREATE_CHANGE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS song_change_au AFTER UPDATE OF title, artist ON song BEGIN "
+    "INSERT INTO song_change (song_id) VALUES (new.id); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS song_change_ad AFTER DELETE ON song BEGIN "
+    "INSERT INTO song_change (song_id) VALUES (old.id); "
+    "END",
+]
+
+for _trigger in CREATE_CHANGE_TRIGGERS:
+    event.listen(Song.__table__, 'after_create', DDL(_trigger).execute_if(dialect='sqlite'))
+
+
+class SongPrefixIndex:
+    """In-memory prefix index over normalized song titles and artists.
+
+    Entries are (normalized key, song id) pairs in a sorted list, so a prefix
+    lookup is one bisect followed by a short forward scan. The index is built
+    from the database on first use in each worker and then kept current from
+    this process's committed ORM writes. It remembers the catalog generation
+    (the 'song' data version) it reflects, and each lookup compares that with
+    the database: when songs were written by another worker, import-songs or
+    seed-db, a background thread reads just the songs added since (ids above
+    the highest indexed one) and those logged in song_change, while lookups
+    keep answering from the current entries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = SortedList()
+        self._songs = {}
+        self._built = False
+        self._generation = None
+        self._max_id = 0
+        self._last_change = 0
+        # Bumped by every build and invalidate, so a refresh that read the
+        # database before one of them never applies its stale rows
+        self._epoch = 0
+        self._refresher = None
+
+    def _keys(self, title, artist):
+        return {normalize(title), normalize(artist)} - {''}
+
+    def _add(self, song_id, title, artist):
+        if song_id in self._songs:
+            self._remove(song_id)
+        self._songs[song_id] = (title, artist)
+        self._max_id = max(self._max_id, song_id)
+        for key in self._keys(title, artist):
+            self._entries.add((key, song_id))
+
+    def _remove(self, song_id):
+        title, artist = self._songs.pop(song_id, (None, None))
+        if title is None:
+            return
+        for key in self._keys(title, artist):
+            self._entries.discard((key, song_id))
+
+    def build(self):
+        # Query under the lock so a commit applied concurrently is either
+        # already in the rows or applied after the build finishes. The
+        # generation, rows and change log position come from one read
+        # transaction, so they describe the same snapshot.
+        with self._lock:
+            generation = data_versions(['song'])['song']
+            last_change = db.session.query(func.max(SongChange.id)).scalar() or 0
+            rows = db.session.query(Song.id, Song.title, Song.artist).all()
+            self._entries = SortedList()
+            self._songs = {}
+            self._max_id = 0
+            for song_id, title, artist in rows:
+                self._add(song_id, title, artist)
+            self._built = True
+            self._generation = generation
+            self._last_change = last_change
+            self._epoch += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = SortedList()
+            self._songs = {}
+            self._built = False
+            self._generation = None
+            self._max_id = 0
+            self._last_change = 0
+            self._epoch += 1
+
+    def refresh(self):
+        """Apply the songs added, edited or deleted since the index was built.
+
+        Reads only the delta, outside the lock, so lookups keep being served
+        meanwhile. Applying a change twice is harmless: every entry is
+        replaced with the song's current title and artist, or removed.
+        """
+        with self._lock:
+            if not self._built:
+                return
+            epoch, max_id, last_change = self._epoch, self._max_id, self._last_change
+        generation = data_versions(['song'])['song']
+        added = db.session.query(Song.id, Song.title, Song.artist).filter(Song.id > max_id).all()
+        changed = db.session.query(SongChange.id, SongChange.song_id, Song.title, Song.artist).\
+            outerjoin(Song, Song.id == SongChange.song_id).\
+            filter(SongChange.id > last_change).order_by(SongChange.id).all()
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            for change_id, song_id, title, artist in changed:
+                if title is None:
+                    self._remove(song_id)
+                else:
+                    self._add(song_id, title, artist)
+                self._last_change = max(self._last_change, change_id)
+            for song_id, title, artist in added:
+                self._add(song_id, title, artist)
+            self._generation = max(self._generation, generation)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._run_refresh, args=(current_app._get_current_object(),),
+                                               name='song-suggestions-refresh', daemon=True)
+            self._refresher.start()
+
+    def _run_refresh(self, flask_app):
+        with flask_app.app_context():
+            try:
+                self.refresh()
+            finally:
+                db.session.remove()
+
+    # Apply one committed transaction's song changes; `generation` is the
+    # catalog generation it committed. Only the next generation after the
+    # indexed one is applied in place: a gap means another process wrote
+    # songs too, and the next lookup refreshes from the database.
+    def apply(self, changes, generation):
+        with self._lock:
+            if not self._built or generation is None or generation != self._generation + 1:
+                return
+            for action, song_id, title, artist in changes:
+                if action == 'add':
+                    self._add(song_id, title, artist)
+                else:
+                    self._remove(song_id)
+            self._generation = generation
+
+    def suggest(self, query, limit=8):
+        prefix = normalize(query)
+        if not prefix or limit <= 0:
+            return []
+        if not self._built:
+            self.build()
+        elif data_versions(['song'])['song'] != self._generation:
+            self._refresh_in_background()
+
+        results = []
+        seen = set()
+        with self._lock:
+            for key, song_id in self._entries.irange(minimum=(prefix,)):
+                if not key.startswith(prefix):
+                    break
+                if song_id in seen:
+                    continue
+                seen.add(song_id)
+                title, artist = self._songs[song_id]
+                results.append({'id': song_id, 'title': title, 'artist': artist})
+                if len(results) >= limit:
+                    break
+        return results
+
+
+song_suggestions = SongPrefixIndex()
+
+
+# Record Song writes on the session and apply them to the index only once the
+# transaction commits, so rolled-back inserts never show up as suggestions.
+def _record_change(action, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('suggestion_changes', []).append(
+            (action, target.id, target.title, target.artist))
+
+
+@event.listens_for(Song, 'after_insert')
+def _song_inserted(mapper, connection, target):
+    _record_change('add', target)
+
+
+@event.listens_for(Song, 'after_update')
+def _song_updated(mapper, connection, target):
+    _record_change('add', target)
+
+
+@event.listens_for(Song, 'after_delete')
+def _song_deleted(mapper, connection, target):
+    _record_change('remove', target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_changes(session):
+    changes = session.info.pop('suggestion_changes', None)
+    if changes:
+        song_suggestions.apply(changes, session.info.get('committed_versions', {}).get('song'))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('suggestion_changes', None)
+
+
+# A freshly created song table (init-db, tests) means any built index is stale
+@event.listens_for(Song.__table__, 'after_create')
+def _song_table_created(target, connection, **kw):
+    song_suggestions.invalidate()
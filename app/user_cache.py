@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+from app import app, db, login
+from app.models import User
+
+
+class UserIdentity(UserMixin):
+    """Detached stand-in for User that Flask-Login keeps as current_user.
+
+    It only carries the username, so it is safe to share between requests
+    and threads; code that needs the password hash loads the User row.
+    """
+
+    def __init__(self, username):
+        self.username = username
+
+    def get_id(self):
+        return self.username
+
+    def __repr__(self):
+        return f'<UserIdentity {self.username}>'
+
+
+class UserCache:
+    """Thread-safe LRU cache of UserIdentity objects with a time-to-live."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(username, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, username, identity):
+        with self._lock:
+            self._entries[username] = (identity, time.monotonic() + self.ttl)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return identity
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+
+
+# User loader callback for Flask-Login. Unknown usernames are not cached, so
+# an account created later (even by raw SQL) is found straight away.
+@login.user_loader
+def load_user(user):
+    identity = user_cache.get(user)
+    if identity is None:
+        username = db.session.query(User.username).filter_by(username=user).scalar()
+        if username is None:
+            return None
+        identity = user_cache.put(user, UserIdentity(username))
+    return identity
+
+
+# Drop the cached identity as soon as a write is flushed, and again after
+# the commit so a request that re-cached the old row in between is corrected
+def _record_change(target):
+    usernames = {target.username, *get_history(target, 'username').deleted}
+    for username in usernames:
+        user_cache.invalidate(username)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('user_cache_changes', set()).update(usernames)
+
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    _record_change(target)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    _record_change(target)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _record_change(target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    for username in session.info.pop('user_cache_changes', ()):
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('user_cache_changes', None)
+
+
+# A recreated user table (init-db, tests) starts with an empty cache
+@event.listens_for(User.__table__, 'after_create')
+def _user_table_created(target, connection, **kw):
+    user_cache.clear()
@@ -0,0 +1,146 @@
+"""CPU cost against bytes saved for gzip-compressing the app's responses.
+
+    python -m benchmarks.bench_compression                  # levels 1, 6 and 9
+    python -m benchmarks.bench_compression --levels 1-9 --iterations 200
+
+Renders the listing pages, search results and JSON endpoints from a
+synthetic 1k-review database (kept in benchmarks/data/ like the route
+benchmarks), then times GzipMiddleware on each body at every level. The
+bodies are rendered once and replayed, so the numbers are the
+compression cost alone.
+"""
+import argparse
+import os
+import sys
+import time
+import zlib
+
+from benchmarks.bench_routes import BENCH_DIR, SCALES
+
+# (name, path) of the responses compressed; per_page=100 gives long tables
+PAYLOADS = [
+    ('GET /my-reviews', '/my-reviews?per_page=100'),
+    ('GET /shared-reviews', '/shared-reviews?per_page=100'),
+    ('GET /search', '/search?q={term}&per_page=100'),
+    ('GET /dashboard', '/dashboard'),
+    ('GET /my-reviews (json)', '/my-reviews?per_page=100&format=json'),
+    ('GET /search (json)', '/search?q={term}&per_page=100&format=json'),
+    ('GET /current-time', '/current-time'),
+]
+
+
+def parse_levels(value):
+    levels = set()
+    for part in value.split(','):
+        start, _, end = part.strip().partition('-')
+        levels.update(range(int(start), int(end or start) + 1))
+    return sorted(level for level in levels if 1 <= level <= 9)
+
+
+def collect_payloads(flask_app, username, term):
+    """Render every payload as `username`; return {name: (content_type, body)}."""
+    from app.loadtest import logged_in_client
+
+    flask_app.config['WTF_CSRF_ENABLED'] = False
+    client = logged_in_client(flask_app, username)
+    payloads = {}
+    for name, path in PAYLOADS:
+        # No Accept-Encoding, so the middleware hands back the raw body
+        response = client.get(path.format(term=term))
+        if response.status_code != 200:
+            raise RuntimeError(f'{name} returned HTTP {response.status_code}')
+        payloads[name] = (response.content_type, response.get_data())
+    return payloads
+
+
+def measure_compression(payloads, levels, iterations=50, min_size=500):
+    """Gzip every payload through GzipMiddleware; return {name: {level: stats}}.
+
+    Stats are the raw and compressed sizes, the saving, and the median and
+    p95 time per response; bodies under `min_size` are reported as sent
+    uncompressed.
+    """
+    from app.compression import GzipMiddleware
+    from app.loadtest import percentile
+
+    results = {}
+    for name, (content_type, body) in payloads.items():
+        def app(environ, start_response, body=body, content_type=content_type):
+            start_response('200 OK', [('Content-Type', content_type), ('Content-Length', str(len(body)))])
+            return [body]
+
+        environ = {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip'}
+        results[name] = {}
+        for level in levels:
+            middleware = GzipMiddleware(app, min_size=min_size, level=level)
+            timings, output = [], b''
+            for _ in range(iterations):
+                started = time.perf_counter()
+                output = b''.join(middleware(environ, lambda status, headers, exc_info=None: None))
+                timings.append((time.perf_counter() - started) * 1e6)
+            timings.sort()
+            if output != body:
+                assert zlib.decompress(output, 31) == body
+            median = percentile(timings, 50)
+            results[name][level] = {
+                'raw_bytes': len(body),
+                'sent_bytes': len(output),
+                'saved_pct': round(100 * (1 - len(output) / len(body)), 1) if body else 0.0,
+                'p50_us': round(median, 1),
+                'p95_us': round(percentile(timings, 95), 1),
+                'mb_per_s': round(len(body) / median, 1) if median else 0.0,
+            }
+    return results
+
+
+def print_table(results):
+    print(f"{'response':<24} {'level':>5} {'raw B':>8} {'sent B':>8} {'saved':>6} "
+          f"{'p50 us':>8} {'p95 us':>8} {'MB/s':>7}")
+    for name, levels in results.items():
+        for level, stats in levels.items():
+            print(f"{name:<24} {level:>5} {stats['raw_bytes']:>8} {stats['sent_bytes']:>8} "
+                  f"{stats['saved_pct']:>5.1f}% {stats['p50_us']:>8.1f} {stats['p95_us']:>8.1f} "
+                  f"{stats['mb_per_s']:>7.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Measure gzip CPU time against bytes saved per response.')
+    parser.add_argument('--levels', default='1,6,9', help='Compression levels, e.g. 1,6,9 or 1-9.')
+    parser.add_argument('--iterations', type=int, default=50, help='Compressions timed per response and level.')
+    parser.add_argument('--min-size', type=int, default=500, help='Smallest body that is compressed.')
+    parser.add_argument('--username', default='user1', help='Generated user to render pages as.')
+    parser.add_argument('--term', default='midnight', help='Search term for /search.')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, 'data'),
+                        help='Where the benchmark database is kept between runs.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    levels = parse_levels(args.levels)
+    if not levels:
+        print('No compression levels between 1 and 9 given.', file=sys.stderr)
+        return 2
+    os.makedirs(args.data_dir, exist_ok=True)
+    db_path = os.path.join(os.path.abspath(args.data_dir), 'bench-1k.db')
+    os.environ.setdefault('DATABASE_URL', f'sqlite:///{db_path}')
+
+    from sqlalchemy import inspect
+    from app import app, db
+    from app.datagen import generate_dataset
+    from app.models import Song
+
+    with app.app_context():
+        if not inspect(db.engine).has_table('song') or not db.session.query(Song.id).first():
+            db.drop_all()
+            db.create_all()
+            generate_dataset(seed=1, progress=lambda message: print(f'  {message}', flush=True), **SCALES['1k'])
+        db.session.remove()
+
+    payloads = collect_payloads(app, args.username, args.term)
+    print_table(measure_compression(payloads, levels, args.iterations, args.min_size))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
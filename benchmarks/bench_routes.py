@@ -0,0 +1,267 @@
+"""Route-level latency and SQL statement benchmarks at several data scales.
+
+    python -m benchmarks.bench_routes                    # all scales, compare to the baseline
+    python -m benchmarks.bench_routes --scales 1k,100k --iterations 20
+    python -m benchmarks.bench_routes --update-baseline  # record a new baseline
+    python -m benchmarks.bench_routes --no-cache         # query cost with the caches off
+
+Each scale runs in its own process against its own SQLite file (selected
+with DATABASE_URL) and its own cache file (CACHE_SQLITE_PATH), so no scale
+is served another's cached pages. The databases are generated once with the
+seed-db data generator and reused on later runs. Requests go through the
+Flask test client, so the numbers cover routing, queries and template
+rendering but not the network. --no-cache switches the application and
+search caches off, measuring what each route costs in SQL at that scale;
+its results are compared against a separate baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# Data set sizes for `generate_dataset`, keyed by the number of reviews
+SCALES = {
+    '1k': {'users': 50, 'songs': 500, 'reviews': 1000, 'shares': 200},
+    '100k': {'users': 2000, 'songs': 20000, 'reviews': 100000, 'shares': 10000},
+    '1m': {'users': 20000, 'songs': 200000, 'reviews': 1000000, 'shares': 100000},
+}
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(latencies_ms, statement_counts):
+    from app.loadtest import percentile
+
+    ordered = sorted(latencies_ms)
+    summary = {f'p{pct}_ms': round(percentile(ordered, pct), 3) for pct in PERCENTILES}
+    summary['statements'] = max(statement_counts) if statement_counts else 0
+    summary['samples'] = len(ordered)
+    return summary
+
+
+# (name, method, path) for every benchmarked route
+def route_plan(term, song_id):
+    return [
+        ('GET /dashboard', 'GET', '/dashboard'),
+        ('GET /my-reviews', 'GET', '/my-reviews'),
+        ('GET /search', 'GET', f'/search?q={term}'),
+        ('GET /shared-reviews', 'GET', '/shared-reviews'),
+        ('GET /share', 'GET', '/share'),
+        ('POST /review/<id>', 'POST', f'/review/{song_id}'),
+    ]
+
+
+def measure_routes(flask_app, username, term, song_id, iterations=30, warmup=3):
+    """Time every route `iterations` times as `username`; return {route: summary}.
+
+    SQL statements are counted per request with a before_cursor_execute
+    listener; a route that answers with an error aborts the run rather than
+    being reported as a fast page.
+    """
+    from sqlalchemy import event
+    from app import db
+    from app.loadtest import logged_in_client
+
+    flask_app.config['WTF_CSRF_ENABLED'] = False
+    client = logged_in_client(flask_app, username)
+
+    with flask_app.app_context():
+        engine = db.engine
+    statements = [0]
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    results = {}
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        for name, method, path in route_plan(term, song_id):
+            latencies, counts = [], []
+            for iteration in range(warmup + iterations):
+                # Alternate ratings so every POST really updates the review
+                data = {'rating': str(iteration % 5 + 1), 'comment': 'Benchmark review'}
+                statements[0] = 0
+                started = time.perf_counter()
+                response = client.open(path, method=method, data=data if method == 'POST' else None)
+                elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{name} returned HTTP {response.status_code}')
+                if iteration >= warmup:
+                    latencies.append(elapsed)
+                    counts.append(statements[0])
+            results[name] = summarize(latencies, counts)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+    return results
+
+
+def compare(results, baseline, threshold=1.25, min_delta_ms=1.0):
+    """Return a message for every route that regressed against `baseline`.
+
+    A route regresses when its p95 grows past `threshold` times the baseline
+    (ignoring changes under `min_delta_ms`, which are timer noise) or when it
+    runs more SQL statements than before.
+    """
+    regressions = []
+    for scale, current in results.get('scales', {}).items():
+        previous = baseline.get('scales', {}).get(scale)
+        if not previous:
+            continue
+        for route, stats in current['routes'].items():
+            before = previous['routes'].get(route)
+            if not before:
+                continue
+            if stats['p95_ms'] > before['p95_ms'] * threshold and \
+                    stats['p95_ms'] - before['p95_ms'] > min_delta_ms:
+                regressions.append(f"{scale} {route}: p95 {before['p95_ms']:.2f}ms -> {stats['p95_ms']:.2f}ms")
+            if stats['statements'] > before['statements']:
+                regressions.append(f"{scale} {route}: {before['statements']} -> {stats['statements']} SQL statements")
+    return regressions
+
+
+# Runs inside the per-scale process: build (or reuse) the database and measure
+def run_worker(scale, rebuild, iterations, warmup, username, term, output, use_cache=True):
+    from contextlib import nullcontext
+    from sqlalchemy import inspect
+    from app import app, db
+    from app.datagen import generate_dataset
+    from app.models import Review, Song
+    from app.query_plans import caches_disabled
+
+    with app.app_context():
+        if rebuild or not inspect(db.engine).has_table('song') or not db.session.query(Song.id).first():
+            db.drop_all()
+            db.create_all()
+            created = generate_dataset(seed=1, progress=lambda message: print(f'  [{scale}] {message}', flush=True),
+                                       **SCALES[scale])
+            print(f"  [{scale}] generated in {created['seconds']:.1f}s", flush=True)
+        dataset = {'songs': db.session.query(Song).count(), 'reviews': db.session.query(Review).count()}
+        # The most reviewed song, so the POST updates a realistic row
+        song_id = db.session.query(Song.id).order_by(Song.rating_count.desc(), Song.id).limit(1).scalar()
+        db.session.remove()
+
+    with nullcontext() if use_cache else caches_disabled():
+        routes = measure_routes(app, username, term, song_id, iterations=iterations, warmup=warmup)
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump({'dataset': dataset, 'username': username, 'term': term, 'routes': routes}, handle)
+
+
+def run_scale(scale, args):
+    os.makedirs(args.data_dir, exist_ok=True)
+    db_path = os.path.join(os.path.abspath(args.data_dir), f'bench-{scale}.db')
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}',
+               CACHE_SQLITE_PATH=os.path.join(os.path.abspath(args.data_dir), f'bench-{scale}.cache.db'))
+    fd, output = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        command = [sys.executable, '-m', 'benchmarks.bench_routes', '--worker', scale,
+                   '--iterations', str(args.iterations), '--warmup', str(args.warmup),
+                   '--username', args.username, '--term', args.term, '--worker-output', output]
+        if args.rebuild:
+            command.append('--rebuild')
+        if args.no_cache:
+            command.append('--no-cache')
+        subprocess.run(command, cwd=REPO_DIR, env=env, check=True)
+        with open(output, encoding='utf-8') as handle:
+            return json.load(handle)
+    finally:
+        os.remove(output)
+
+
+def print_table(results):
+    print(f"{'scale':<6} {'route':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL':>5}")
+    for scale, current in results['scales'].items():
+        for route, stats in current['routes'].items():
+            print(f"{scale:<6} {route:<22} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                  f"{stats['p99_ms']:>9.2f} {stats['statements']:>5}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the main routes at several data scales.')
+    parser.add_argument('--scales', default=','.join(SCALES),
+                        help=f'Comma-separated scales to run ({", ".join(SCALES)}).')
+    parser.add_argument('--iterations', type=int, default=30, help='Measured requests per route.')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per route.')
+    parser.add_argument('--username', default='user10',
+                        help='Generated user to browse as (user1 writes the most reviews).')
+    parser.add_argument('--term', default='midnight', help='Search term for /search.')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, 'data'),
+                        help='Where the per-scale databases are kept between runs.')
+    parser.add_argument('--rebuild', action='store_true', help='Regenerate the databases.')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Switch the caches off, so every request runs its queries.')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results.json'),
+                        help='File the results of this run are written to.')
+    parser.add_argument('--baseline',
+                        help='Baseline to compare against, written if it does not exist (default '
+                             'baseline.json, or baseline-nocache.json with --no-cache).')
+    parser.add_argument('--update-baseline', action='store_true', help='Overwrite the baseline with this run.')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Fail when a p95 exceeds the baseline by this factor.')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='Ignore p95 increases smaller than this.')
+    parser.add_argument('--worker', choices=SCALES, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args.worker, args.rebuild, args.iterations, args.warmup,
+                   args.username, args.term, args.worker_output, use_cache=not args.no_cache)
+        return 0
+    if args.baseline is None:
+        args.baseline = os.path.join(BENCH_DIR, 'baseline-nocache.json' if args.no_cache else 'baseline.json')
+
+    scales = [scale.strip().lower() for scale in args.scales.split(',') if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        print(f'Unknown scale(s): {", ".join(unknown)}', file=sys.stderr)
+        return 2
+
+    results = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'iterations': args.iterations,
+            'cache': not args.no_cache,
+        },
+        'scales': {},
+    }
+    for scale in scales:
+        print(f'Benchmarking {scale}...', flush=True)
+        results['scales'][scale] = run_scale(scale, args)
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, indent=2)
+    print_table(results)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'Baseline written to {args.baseline}')
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for message in regressions:
+        print(f'REGRESSION {message}')
+    if regressions:
+        return 1
+    print('No regressions against the baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,10 @@
 import pytest
 import os
 import tempfile
+from sqlalchemy import event
 from app import app, db
+from app.cache import cache
+from app.search_cache import search_results
 from app.models import User, Song, Review
 from werkzeug.security import generate_password_hash
 
@@ -22,6 +25,9 @@ def flask_app():
         # Drop all tables first to ensure clean state
         db.drop_all()
         db.create_all()
+        # Cached values describe the previous test's database
+        cache.clear()
+        search_results.clear()
         
         # Add test data if needed
         seed_test_data()
@@ -73,4 +79,51 @@ def seed_test_data():
     for review in reviews:
         db.session.add(review)
     
-    db.session.commit()
\ No newline at end of file
+    db.session.commit()
+
+def log_in(client, username='testuser', password='testpassword'):
+    client.post('/login', data={'username': username, 'password': password})
+    return client
+
+@pytest.fixture(scope='function')
+def auth_client(client):
+    """A test client logged in as the seeded test user."""
+    return log_in(client)
+
+@pytest.fixture(scope='function')
+def make_auth_client(flask_app):
+    """Return a factory for extra test clients logged in as the seeded test user."""
+    return lambda: log_in(flask_app.test_client())
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while it is active."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture(scope='function')
+def count_queries(flask_app):
+    """Return a context manager factory that counts SQL statements."""
+    from contextlib import contextmanager
+
+    @contextmanager
+    def counting():
+        counter = QueryCounter()
+        with flask_app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', counter)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, 'before_cursor_execute', counter)
+
+    return counting
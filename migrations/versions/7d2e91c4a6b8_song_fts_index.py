@@ -0,0 +1,49 @@
+"""Song FTS index
+
+Revision ID: 7d2e91c4a6b8
+Revises: f3c0a0e799f7
+Create Date: 2025-06-02 10:14:37.418822
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e91c4a6b8'
+down_revision = 'f3c0a0e799f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE song_fts USING fts5("
+        "title, artist, content='song', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER song_fts_ai AFTER INSERT ON song BEGIN "
+        "INSERT INTO song_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER song_fts_ad AFTER DELETE ON song BEGIN "
+        "INSERT INTO song_fts(song_fts, rowid, title, artist) VALUES ('delete', old.id, old.title, old.artist); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER song_fts_au AFTER UPDATE OF title, artist ON song BEGIN "
+        "INSERT INTO song_fts(song_fts, rowid, title, artist) VALUES ('delete', old.id, old.title, old.artist); "
+        "INSERT INTO song_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist); "
+        "END"
+    )
+    # Index the songs that already exist
+    op.execute("INSERT INTO song_fts(song_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS song_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS song_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS song_fts_ai")
+    op.execute("DROP TABLE IF EXISTS song_fts")
@@ -0,0 +1,32 @@
+"""Unique share per review and recipient
+
+Revision ID: a4c7e2d9f136
+Revises: e7f2b9c4d815
+Create Date: 2025-06-12 16:42:08.903115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c7e2d9f136'
+down_revision = 'e7f2b9c4d815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the first share of each (review, recipient) pair; repeated posts
+    # and the review de-duplication in e7f2b9c4d815 can both leave copies
+    op.execute(
+        "DELETE FROM review_shares WHERE share_id NOT IN "
+        "(SELECT min(share_id) FROM review_shares GROUP BY username, review_id)"
+    )
+    op.drop_index('ix_review_shares_username_review_id', table_name='review_shares')
+    op.create_index('uq_review_shares_username_review_id', 'review_shares', ['username', 'review_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_review_shares_username_review_id', table_name='review_shares')
+    op.create_index('ix_review_shares_username_review_id', 'review_shares', ['username', 'review_id'], unique=False)
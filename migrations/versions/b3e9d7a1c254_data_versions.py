@@ -0,0 +1,27 @@
+"""Data version counters
+
+Revision ID: b3e9d7a1c254
+Revises: a4c7e2d9f136
+Create Date: 2025-06-16 11:05:52.174630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e9d7a1c254'
+down_revision = 'a4c7e2d9f136'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_version',
+                    sa.Column('tag', sa.String(length=100), nullable=False),
+                    sa.Column('version', sa.Integer(), nullable=False),
+                    sa.PrimaryKeyConstraint('tag'))
+
+
+def downgrade():
+    op.drop_table('data_version')
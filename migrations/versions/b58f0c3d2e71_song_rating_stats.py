@@ -0,0 +1,86 @@
+"""Song rating stats
+
+Revision ID: b58f0c3d2e71
+Revises: 7d2e91c4a6b8
+Create Date: 2025-06-03 16:42:08.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b58f0c3d2e71'
+down_revision = '7d2e91c4a6b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_1', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_2', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_3', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_4', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_5', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_avg', sa.Float(), nullable=True))
+        batch_op.create_index('ix_song_rating_avg_count', ['rating_avg', 'rating_count'], unique=False)
+
+    # Backfill from existing reviews before the triggers take over
+    op.execute(
+        "UPDATE song SET "
+        "rating_count = (SELECT count(*) FROM review WHERE review.song_id = song.id), "
+        "rating_sum = coalesce((SELECT sum(rating) FROM review WHERE review.song_id = song.id), 0), "
+        "rating_1 = (SELECT count(*) FROM review WHERE review.song_id = song.id AND rating = 1), "
+        "rating_2 = (SELECT count(*) FROM review WHERE review.song_id = song.id AND rating = 2), "
+        "rating_3 = (SELECT count(*) FROM review WHERE review.song_id = song.id AND rating = 3), "
+        "rating_4 = (SELECT count(*) FROM review WHERE review.song_id = song.id AND rating = 4), "
+        "rating_5 = (SELECT count(*) FROM review WHERE review.song_id = song.id AND rating = 5), "
+        "rating_avg = (SELECT avg(rating) FROM review WHERE review.song_id = song.id)"
+    )
+    op.execute(
+        'CREATE TRIGGER review_stats_ai AFTER INSERT ON review BEGIN UPDATE song SET rating_count = rating_count + 1, rating_sum = rating_sum + new.rating, rating_1 = rating_1 + (new.rating = 1), rating_2 = rating_2 + (new.rating = 2), rating_3 = rating_3 + (new.rating = 3), rating_4 = rating_4 + (new.rating = 4), rating_5 = rating_5 + (new.rating = 5), rating_avg = CASE WHEN rating_count + 1 > 0 THEN (rating_sum + new.rating) * 1.0 / (rating_count + 1) END WHERE id = new.song_id; END'
+    )
+    op.execute(
+        'CREATE TRIGGER review_stats_ad AFTER DELETE ON review BEGIN UPDATE song SET rating_count = rating_count - 1, rating_sum = rating_sum - old.rating, rating_1 = rating_1 - (old.rating = 1), rating_2 = rating_2 - (old.rating = 2), rating_3 = rating_3 - (old.rating = 3), rating_4 = rating_4 - (old.rating = 4), rating_5 = rating_5 - (old.rating = 5), rating_avg = CASE WHEN rating_count - 1 > 0 THEN (rating_sum - old.rating) * 1.0 / (rating_count - 1) END WHERE id = old.song_id; END'
+    )
+    op.execute(
+        'CREATE TRIGGER review_stats_au AFTER UPDATE OF rating, song_id ON review BEGIN UPDATE song SET rating_count = rating_count - 1, rating_sum = rating_sum - old.rating, rating_1 = rating_1 - (old.rating = 1), rating_2 = rating_2 - (old.rating = 2), rating_3 = rating_3 - (old.rating = 3), rating_4 = rating_4 - (old.rating = 4), rating_5 = rating_5 - (old.rating = 5), rating_avg = CASE WHEN rating_count - 1 > 0 THEN (rating_sum - old.rating) * 1.0 / (rating_count - 1) END WHERE id = old.song_id; UPDATE song SET rating_count = rating_count + 1, rating_sum = rating_sum + new.rating, rating_1 = rating_1 + (new.rating = 1), rating_2 = rating_2 + (new.rating = 2), rating_3 = rating_3 + (new.rating = 3), rating_4 = rating_4 + (new.rating = 4), rating_5 = rating_5 + (new.rating = 5), rating_avg = CASE WHEN rating_count + 1 > 0 THEN (rating_sum + new.rating) * 1.0 / (rating_count + 1) END WHERE id = new.song_id; END'
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS review_stats_au")
+    op.execute("DROP TRIGGER IF EXISTS review_stats_ad")
+    op.execute("DROP TRIGGER IF EXISTS review_stats_ai")
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.drop_index('ix_song_rating_avg_count')
+        batch_op.drop_column('rating_avg')
+        batch_op.drop_column('rating_5')
+        batch_op.drop_column('rating_4')
+        batch_op.drop_column('rating_3')
+        batch_op.drop_column('rating_2')
+        batch_op.drop_column('rating_1')
+        batch_op.drop_column('rating_sum')
+        batch_op.drop_column('rating_count')
+
+    # Dropping columns makes batch mode rebuild the song table, which takes
+    # the full-text index triggers with it
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS song_fts_ai AFTER INSERT ON song BEGIN "
+        "INSERT INTO song_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS song_fts_ad AFTER DELETE ON song BEGIN "
+        "INSERT INTO song_fts(song_fts, rowid, title, artist) VALUES ('delete', old.id, old.title, old.artist); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS song_fts_au AFTER UPDATE OF title, artist ON song BEGIN "
+        "INSERT INTO song_fts(song_fts, rowid, title, artist) VALUES ('delete', old.id, old.title, old.artist); "
+        "INSERT INTO song_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist); "
+        "END"
+    )
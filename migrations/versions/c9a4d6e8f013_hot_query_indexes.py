@@ -0,0 +1,34 @@
+"""Hot query indexes
+
+Revision ID: c9a4d6e8f013
+Revises: b58f0c3d2e71
+Create Date: 2025-06-05 11:27:53.160294
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9a4d6e8f013'
+down_revision = 'b58f0c3d2e71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (username, id) serves the newest-first listings; song_id and rating make
+    # it covering for the dashboard aggregates
+    op.create_index('ix_review_username_id', 'review', ['username', 'id', 'song_id', 'rating'], unique=False)
+    op.create_index('ix_review_username_song_id', 'review', ['username', 'song_id'], unique=False)
+    op.create_index('ix_review_song_id', 'review', ['song_id'], unique=False)
+    op.create_index('ix_review_shares_username_review_id', 'review_shares', ['username', 'review_id'], unique=False)
+    op.create_index('ix_song_title_artist', 'song', ['title', 'artist'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_song_title_artist', table_name='song')
+    op.drop_index('ix_review_shares_username_review_id', table_name='review_shares')
+    op.drop_index('ix_review_song_id', table_name='review')
+    op.drop_index('ix_review_username_song_id', table_name='review')
+    op.drop_index('ix_review_username_id', table_name='review')
@@ -0,0 +1,39 @@
+"""Song change log
+
+Revision ID: d6f2a8c4e913
+Revises: b3e9d7a1c254
+Create Date: 2025-06-18 09:41:27.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6f2a8c4e913'
+down_revision = 'b3e9d7a1c254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('song_change',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('song_id', sa.Integer(), nullable=False),
+                    sa.PrimaryKeyConstraint('id'))
+    op.execute(
+        "CREATE TRIGGER song_change_au AFTER UPDATE OF title, artist ON song BEGIN "
+        "INSERT INTO song_change (song_id) VALUES (new.id); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER song_change_ad AFTER DELETE ON song BEGIN "
+        "INSERT INTO song_change (song_id) VALUES (old.id); "
+        "END"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS song_change_ad")
+    op.execute("DROP TRIGGER IF EXISTS song_change_au")
+    op.drop_table('song_change')
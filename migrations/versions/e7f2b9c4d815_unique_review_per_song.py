@@ -0,0 +1,40 @@
+"""Unique review per user and song
+
+Revision ID: e7f2b9c4d815
+Revises: c9a4d6e8f013
+Create Date: 2025-06-09 10:14:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f2b9c4d815'
+down_revision = 'c9a4d6e8f013'
+branch_labels = None
+depends_on = None
+
+# Rows that lose to a newer review of the same song by the same user
+DUPLICATES = "SELECT id FROM review WHERE id NOT IN (SELECT max(id) FROM review GROUP BY username, song_id)"
+
+
+def upgrade():
+    # Keep each user's latest review of a song. Shares of the older copies
+    # move to the kept review; deleting the copies fires the rating triggers,
+    # so the song aggregates stop counting them.
+    op.execute(
+        "UPDATE review_shares SET review_id = ("
+        "SELECT max(kept.id) FROM review AS kept JOIN review AS old "
+        "ON kept.username = old.username AND kept.song_id = old.song_id "
+        "WHERE old.id = review_shares.review_id) "
+        f"WHERE review_id IN ({DUPLICATES})"
+    )
+    op.execute(f"DELETE FROM review WHERE id IN ({DUPLICATES})")
+    op.drop_index('ix_review_username_song_id', table_name='review')
+    op.create_index('uq_review_username_song_id', 'review', ['username', 'song_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_review_username_song_id', table_name='review')
+    op.create_index('ix_review_username_song_id', 'review', ['username', 'song_id'], unique=False)
@@ -0,0 +1,110 @@
+from app import db
+from app.models import User, ReviewShares
+
+
+def test_requires_login_with_json_401(client):
+    response = client.get('/api/v1/songs')
+    assert response.status_code == 401
+    assert response.get_json()['error']['status'] == 401
+
+
+def test_songs_list_search_and_batch(auth_client):
+    listing = auth_client.get('/api/v1/songs?per_page=2').get_json()
+    assert [song['id'] for song in listing['items']] == [1, 2]
+    rest = auth_client.get(f"/api/v1/songs?per_page=2&cursor={listing['next']}").get_json()
+    assert [song['id'] for song in rest['items']] == [3]
+    assert rest['next'] is None
+
+    found = auth_client.get('/api/v1/songs?q=test&per_page=5').get_json()
+    assert len(found['items']) == 3
+
+    batch = auth_client.get('/api/v1/songs?ids=3,1,99,3').get_json()
+    assert [song['id'] for song in batch['items']] == [3, 1]
+    assert batch['missing'] == [99]
+    assert auth_client.get('/api/v1/songs?ids=1,x').status_code == 400
+    # Past SQLite's 64-bit integers: rejected, not an OverflowError
+    too_big = auth_client.get('/api/v1/songs?ids=99999999999999999999')
+    assert too_big.status_code == 400
+    assert too_big.get_json()['error']['field'] == 'ids'
+
+
+def test_sparse_fieldsets_and_compact_json(auth_client):
+    response = auth_client.get('/api/v1/songs/1?fields=title')
+    assert response.get_json() == {'id': 1, 'title': 'Test Song 1'}
+    assert b' ' not in response.get_data().replace(b'Test Song 1', b'')
+    reviews = auth_client.get('/api/v1/reviews?fields=rating,song_title').get_json()['items']
+    assert reviews == [{'id': 2, 'rating': 3, 'song_title': 'Test Song 2'},
+                       {'id': 1, 'rating': 5, 'song_title': 'Test Song 1'}]
+    error = auth_client.get('/api/v1/songs?fields=title,password')
+    assert error.status_code == 400
+    assert error.get_json()['error']['field'] == 'fields'
+    assert auth_client.get('/api/v1/songs/99').status_code == 404
+
+
+def test_list_endpoints_select_columns_in_one_statement(auth_client, count_queries):
+    auth_client.get('/api/v1/reviews')
+    for path in ('/api/v1/reviews?fields=rating', '/api/v1/shares', '/api/v1/songs?ids=1,2,3'):
+        with count_queries() as counter:
+            assert auth_client.get(path).status_code == 200
+        # The ETag's version lookup, then one statement for the listing
+        assert counter.count == 2 and 'data_version' in counter.statements[0]
+
+
+def test_put_creates_then_updates_review(auth_client):
+    assert auth_client.get('/api/v1/songs/3/review').status_code == 404
+    created = auth_client.put('/api/v1/songs/3/review', json={'rating': 4, 'comment': 'Nice'})
+    assert created.status_code == 200
+    body = created.get_json()
+    assert body['rating'] == 4 and body['song_title'] == 'Test Song 3'
+
+    updated = auth_client.put('/api/v1/songs/3/review', json={'rating': 2})
+    assert updated.status_code == 200
+    assert updated.get_json()['id'] == body['id']
+    assert auth_client.get('/api/v1/songs/3/review').get_json()['rating'] == 2
+
+    invalid = auth_client.put('/api/v1/songs/3/review', json={'rating': 6})
+    assert invalid.status_code == 422
+    assert invalid.get_json()['error']['field'] == 'rating'
+    assert auth_client.put('/api/v1/songs/3/review', data='rating=4').status_code == 415
+    assert auth_client.put('/api/v1/songs/99/review', json={'rating': 4}).status_code == 404
+
+
+def test_share_and_list_shares(auth_client, flask_app):
+    with flask_app.app_context():
+        db.session.add(User(username='friend', password='x'))
+        db.session.add(ReviewShares(review_id=3, username='testuser'))
+        db.session.commit()
+
+    response = auth_client.post('/api/v1/shares', json={'review_id': 1, 'recipient': 'friend'})
+    assert response.status_code == 201
+    assert response.get_json()['results'] == [{'recipient': 'friend', 'status': 'shared', 'review_ids': [1]}]
+    with flask_app.app_context():
+        assert ReviewShares.query.filter_by(username='friend', review_id=1).count() == 1
+
+    # Several reviews and recipients at once; existing shares are reported, not repeated
+    response = auth_client.post('/api/v1/shares', json={'review_ids': [1, 2], 'recipients': ['friend', 'admin', 'nobody']})
+    assert response.status_code == 201
+    assert [(result['recipient'], result['status'], result['review_ids']) for result in response.get_json()['results']] == \
+        [('friend', 'shared', [2]), ('admin', 'shared', [1, 2]), ('nobody', 'not_found', [])]
+    again = auth_client.post('/api/v1/shares', json={'review_id': 1, 'recipient': 'friend'})
+    assert again.status_code == 200
+    assert again.get_json()['counts'] == {'already_shared': 1}
+
+    # Only the user's own reviews
+    assert auth_client.post('/api/v1/shares', json={'review_id': 3, 'recipient': 'friend'}).status_code == 422
+    invalid = auth_client.post('/api/v1/shares', json={'review_ids': [1], 'recipients': []})
+    assert invalid.get_json()['error']['field'] == 'recipients'
+    too_big = auth_client.post('/api/v1/shares', json={'review_ids': [99999999999999999999], 'recipients': ['admin']})
+    assert too_big.status_code == 422
+    assert too_big.get_json()['error']['field'] == 'review_ids'
+
+    shared = auth_client.get('/api/v1/shares').get_json()['items']
+    assert len(shared) == 1
+    assert shared[0]['reviewer'] == 'admin' and shared[0]['comment'] == 'Pretty good.'
+
+
+def test_song_etags_differ_per_song(auth_client):
+    first = auth_client.get('/api/v1/songs/1').get_etag()[0]
+    second = auth_client.get('/api/v1/songs/2').get_etag()[0]
+    assert first != second
+    assert auth_client.get('/api/v1/songs/1', headers={'If-None-Match': f'"{first}"'}).status_code == 304
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import re
+from app.assets import AssetManifest, assets, build_assets
+
+STYLE_URL = re.compile(r'/assets/style_Main\.[0-9a-f]{12}\.css')
+
+
+def source(filename):
+    with open(os.path.join(assets.static_folder, filename), 'rb') as handle:
+        return handle.read()
+
+
+def test_pages_link_hashed_assets_served_immutable(client):
+    page = client.get('/login').get_data(as_text=True)
+    url = STYLE_URL.search(page).group(0)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_data() == source('style_Main.css')
+    assert response.cache_control.max_age == 31536000
+    assert response.cache_control.immutable and response.cache_control.public
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_fresh_process_serves_hashed_urls(client, monkeypatch):
+    url = STYLE_URL.search(client.get('/login').get_data(as_text=True)).group(0)
+    # A restarted worker that has not rendered any page yet
+    monkeypatch.setattr('app.assets.assets', AssetManifest(assets.static_folder, assets.build_folder))
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_data() == source('style_Main.css')
+
+
+def test_unknown_or_stale_hash_is_not_found(client):
+    assert client.get('/assets/style_Main.000000000000.css').status_code == 404
+    assert client.get('/assets/style_Main.css').status_code == 404
+    assert client.get('/assets/../__init__.000000000000.py').status_code == 404
+    # Unhashed URLs keep working through the plain static route
+    assert client.get('/static/style_Main.css').status_code == 200
+
+
+def test_edited_file_gets_a_new_hash(tmp_path):
+    static = tmp_path / 'static'
+    static.mkdir()
+    script = static / 'app.js'
+    script.write_text('console.log(1);')
+    manifest = AssetManifest(str(static), str(tmp_path / 'build'))
+    first = manifest.hashed_name('app.js')
+    assert re.fullmatch(r'app\.[0-9a-f]{12}\.js', first)
+    assert manifest.source_for(first) == 'app.js'
+
+    script.write_text('console.log(22);')
+    second = manifest.hashed_name('app.js')
+    assert second != first
+    assert manifest.source_for(first) is None
+    assert manifest.hashed_name('missing.js') is None
+
+
+def test_build_writes_hashed_copies_and_gzip_variants(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(assets, 'build_folder', str(tmp_path))
+    mapping = build_assets(assets)
+    with open(tmp_path / 'manifest.json') as handle:
+        assert json.load(handle) == mapping
+    hashed = mapping['style_Main.css']
+    assert (tmp_path / hashed).read_bytes() == source('style_Main.css')
+    assert gzip.decompress((tmp_path / (hashed + '.gz')).read_bytes()) == source('style_Main.css')
+
+    compressed = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.mimetype == 'text/css'
+    assert gzip.decompress(compressed.get_data()) == source('style_Main.css')
+    plain = client.get(f'/assets/{hashed}')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data() == source('style_Main.css')
+
+
+def test_build_assets_command(runner, monkeypatch, tmp_path):
+    monkeypatch.setattr(assets, 'build_folder', str(tmp_path))
+    result = runner.invoke(args=['build-assets', '--gzip-level', '0'])
+    assert result.exit_code == 0, result.output
+    assert 'Built 2 assets' in result.output
+    assert not list(tmp_path.glob('*.gz'))
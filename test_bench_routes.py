@@ -0,0 +1,35 @@
+from app.query_plans import caches_disabled
+from benchmarks.bench_routes import compare, measure_routes, route_plan
+
+
+def _results(p95, statements):
+    return {'scales': {'1k': {'routes': {'GET /dashboard': {'p95_ms': p95, 'statements': statements}}}}}
+
+
+def test_compare_flags_latency_and_statement_regressions():
+    baseline = _results(10.0, 4)
+    assert compare(_results(12.0, 4), baseline, threshold=1.25) == []
+    assert len(compare(_results(13.0, 4), baseline, threshold=1.25)) == 1
+    assert len(compare(_results(10.0, 5), baseline)) == 1
+
+
+def test_compare_ignores_noise_and_unknown_scales():
+    assert compare(_results(0.3, 2), _results(0.1, 2), threshold=1.25, min_delta_ms=1.0) == []
+    assert compare(_results(99.0, 9), {'scales': {}}) == []
+
+
+def test_measure_routes_covers_every_route(flask_app):
+    results = measure_routes(flask_app, 'testuser', 'test', 1, iterations=2, warmup=1)
+    assert set(results) == {name for name, method, path in route_plan('test', 1)}
+    for stats in results.values():
+        assert stats['samples'] == 2
+        assert stats['statements'] > 0
+        assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+
+
+def test_measure_routes_with_the_caches_off(flask_app):
+    cached = measure_routes(flask_app, 'testuser', 'test', 1, iterations=2, warmup=1)
+    with caches_disabled():
+        uncached = measure_routes(flask_app, 'testuser', 'test', 1, iterations=2, warmup=1)
+    # Warm dashboard counters and leaderboard no longer hide their queries
+    assert uncached['GET /dashboard']['statements'] > cached['GET /dashboard']['statements']
@@ -0,0 +1,158 @@
+import os
+import subprocess
+import sys
+import pytest
+from app import db
+from app.cache import Cache, cache, create_backend
+from app.cache.backends import MISSING, MemoryBackend, NullBackend, SQLiteBackend
+from app.cache.invalidation import data_versions
+from app.models import Review
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend(maxsize=3)
+    return SQLiteBackend(str(tmp_path / 'cache.db'), maxsize=3, prune_every=1)
+
+
+def test_backend_ttl_and_eviction(backend):
+    backend.set('expired', 1, ttl=-1)
+    assert backend.get('expired') is MISSING
+    for key in 'abcd':
+        backend.set(key, key.upper(), ttl=60)
+    assert backend.get('d') == 'D'
+    assert backend.get('a') is MISSING
+    assert backend.evictions >= 1
+    assert len(backend) == 3
+
+
+def test_cached_values_and_tag_invalidation(backend):
+    local = Cache(backend)
+    calls = []
+
+    @local.cached(key='total:{user}', tags=('review:user:{user}',))
+    def total(user, bonus=0):
+        calls.append(user)
+        return None if user == 'nobody' else len(calls) + bonus
+
+    assert total('ann') == total('ann') == 1
+    assert total('nobody') is None and total('nobody') is None
+    assert calls == ['ann', 'nobody']
+
+    local.invalidate('review:user:bob')
+    assert total('ann') == 1
+    local.invalidate('review:user:ann')
+    assert total('ann') == 3
+    assert local.info()['hits'] == 3
+    assert local.info()['misses'] == 3
+
+
+def test_write_during_compute_invalidates_the_new_entry():
+    local = Cache(MemoryBackend())
+
+    @local.cached(tags=('song',))
+    def slow_read():
+        # A write commits while the value is being computed
+        local.invalidate('song')
+        return 'old'
+
+    assert slow_read() == 'old'
+    assert local.get(slow_read.cache_key(), MISSING) is MISSING
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'shared.db')
+    first, second = Cache(SQLiteBackend(path)), Cache(SQLiteBackend(path))
+    first.set('key', {'value': 1}, tags=('song',))
+    assert second.get('key') == {'value': 1}
+    second.invalidate('song')
+    assert first.get('key') is None
+
+
+def test_null_backend_never_hits():
+    local = Cache(NullBackend())
+    local.set('key', 1)
+    assert local.get('key') is None
+
+
+def test_default_backend_is_shared_between_workers(tmp_path):
+    config = {'CACHE_SQLITE_PATH': str(tmp_path / 'cache.db'), 'SQLALCHEMY_DATABASE_URI': 'sqlite:///app.db'}
+    # Two workers build their own backend from the same config
+    first, second = Cache(create_backend(config)), Cache(create_backend(config))
+    assert first.backend is not second.backend
+    assert isinstance(first.backend.backend, SQLiteBackend)
+    first.set('dashboard-stats:ann', (1, 2, 3), tags=('review:user:ann',))
+    assert second.get('dashboard-stats:ann') == (1, 2, 3)
+    second.invalidate('review:user:ann')
+    assert first.get('dashboard-stats:ann') is None
+
+
+def test_databases_sharing_a_cache_file_never_cross_hit(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    small = Cache(create_backend({'CACHE_SQLITE_PATH': path, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///small.db'}))
+    large = Cache(create_backend({'CACHE_SQLITE_PATH': path, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///large.db'}))
+    large.set('dashboard-stats:ann', (190, 190, 26), tags=('review:user:ann',))
+    assert small.get('dashboard-stats:ann') is None
+    small.set('dashboard-stats:ann', (1, 1, 1), tags=('review:user:ann',))
+    assert large.get('dashboard-stats:ann') == (190, 190, 26)
+
+    # Tag versions are per database too
+    small.invalidate('review:user:ann')
+    assert large.get('dashboard-stats:ann') == (190, 190, 26)
+    assert small.backend.tag_versions(['review:user:ann']) == {'review:user:ann': 1}
+    assert large.backend.tag_versions(['review:user:ann']) == {'review:user:ann': 0}
+
+
+def test_processes_on_different_databases_use_different_namespaces(tmp_path):
+    def namespace(database):
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp_path / database}')
+        return subprocess.run([sys.executable, '-c', 'from app.cache import cache; print(cache.backend.prefix)'],
+                              cwd=os.path.dirname(os.path.abspath(__file__)), env=env, check=True,
+                              capture_output=True, text=True).stdout.strip()
+
+    assert namespace('small.db') != namespace('large.db')
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend({'CACHE_BACKEND': 'redis'})
+
+
+def test_dashboard_counters_cached_until_review_commit(auth_client, flask_app, count_queries):
+    auth_client.get('/dashboard')
+    with count_queries() as warm:
+        auth_client.get('/dashboard')
+    # only the ETag's version lookup and the recent reviews; counters and
+    # leaderboard come from the cache
+    assert warm.count == 2
+
+    response = auth_client.post('/review/3', data={'rating': '4', 'comment': 'New'})
+    assert response.status_code == 302
+    page = auth_client.get('/dashboard').get_data(as_text=True)
+    assert '<div class="stat-value">3</div>' in page
+
+
+def test_rolled_back_writes_do_not_invalidate(flask_app):
+    with flask_app.app_context():
+        before = cache.backend.tag_versions(['review:user:admin'])
+        db.session.add(Review(rating=2, comment='', username='admin', song_id=3))
+        db.session.flush()
+        db.session.rollback()
+        assert cache.backend.tag_versions(['review:user:admin']) == before
+
+        assert data_versions(['review:user:admin']) == {'review:user:admin': 1}
+
+        db.session.add(Review(rating=2, comment='', username='admin', song_id=3))
+        db.session.commit()
+        assert cache.backend.tag_versions(['review:user:admin']) != before
+        # The database copy of the version moves in the same transaction
+        assert data_versions(['review:user:admin']) == {'review:user:admin': 2}
+
+
+def test_cache_counters_in_metrics(auth_client):
+    auth_client.get('/dashboard')
+    auth_client.get('/dashboard')
+    page = auth_client.get('/metrics').get_data(as_text=True)
+    assert 'flask_cache_hits_total' in page
+    assert 'flask_cache_entries' in page
@@ -0,0 +1,109 @@
+import gzip
+from flask import Flask, Response
+from app.compression import GzipMiddleware, accepts_gzip
+from benchmarks.bench_compression import measure_compression, parse_levels
+
+PAGE = ('<tr><td>Song</td><td>Artist</td><td>5</td></tr>\n' * 200).encode()
+
+
+def make_client(min_size=500, level=6):
+    app = Flask('compression_test')
+
+    @app.route('/page')
+    def page():
+        response = Response(PAGE, content_type='text/html; charset=utf-8')
+        response.set_etag('abc')
+        response.vary.add('Cookie')
+        return response
+
+    @app.route('/small')
+    def small():
+        return {'time': 'now'}
+
+    @app.route('/image')
+    def image():
+        return Response(PAGE, content_type='image/png')
+
+    @app.route('/encoded')
+    def encoded():
+        return Response(gzip.compress(PAGE), content_type='text/html', headers={'Content-Encoding': 'gzip'})
+
+    @app.route('/stream')
+    def stream():
+        return Response((PAGE[i:i + 1000] for i in range(0, len(PAGE), 1000)), content_type='text/html')
+
+    app.wsgi_app = GzipMiddleware(app.wsgi_app, min_size=min_size, level=level)
+    return app.test_client()
+
+
+def test_accepts_gzip():
+    assert accepts_gzip('gzip, deflate, br')
+    assert accepts_gzip('br;q=1.0, gzip;q=0.8')
+    assert accepts_gzip('*')
+    assert not accepts_gzip('')
+    assert not accepts_gzip('identity')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('gzip;q=0, *')
+
+
+def test_large_response_is_gzipped():
+    response = make_client().get('/page', headers={'Accept-Encoding': 'gzip'})
+    body = response.get_data()
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) == len(body) < len(PAGE)
+    assert gzip.decompress(body) == PAGE
+    assert set(response.vary) == {'Cookie', 'Accept-Encoding'}
+    assert response.headers['ETag'] == 'W/"abc"'
+
+
+def test_uncompressed_responses_still_vary():
+    client = make_client()
+    for path, headers in (('/page', {}), ('/page', {'Accept-Encoding': 'gzip;q=0'}),
+                          ('/small', {'Accept-Encoding': 'gzip'})):
+        response = client.get(path, headers=headers)
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.vary
+    assert client.get('/page').headers['ETag'] == '"abc"'
+
+
+def test_skips_binary_and_encoded_responses():
+    client = make_client()
+    image = client.get('/image', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in image.headers and 'Vary' not in image.headers
+    assert image.get_data() == PAGE
+    encoded = client.get('/encoded', headers={'Accept-Encoding': 'gzip'})
+    assert gzip.decompress(encoded.get_data()) == PAGE
+
+
+def test_streamed_response_is_compressed_incrementally():
+    response = make_client().get('/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    chunks = list(response.response)
+    # One flushed chunk per streamed chunk, plus the gzip trailer
+    assert len(chunks) == len(PAGE) // 1000 + 2
+    assert gzip.decompress(b''.join(chunks)) == PAGE
+
+
+def test_level_zero_disables_compression():
+    response = make_client(level=0).get('/page', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_app_pages_are_compressed_and_revalidate(auth_client):
+    response = auth_client.get('/dashboard', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'Dashboard' in gzip.decompress(response.get_data())
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    revalidated = auth_client.get('/dashboard', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+
+def test_measure_compression_reports_savings():
+    assert parse_levels('1,6-7,12') == [1, 6, 7]
+    results = measure_compression({'page': ('text/html', PAGE), 'tiny': ('application/json', b'{}')},
+                                  levels=[1, 9], iterations=3)
+    assert results['page'][9]['sent_bytes'] < len(PAGE)
+    assert results['page'][1]['saved_pct'] > 50
+    assert results['tiny'][1]['sent_bytes'] == 2
@@ -0,0 +1,95 @@
+from app import db
+from app.cache import cache
+from app.cache.backends import NullBackend
+from app.models import ReviewShares
+
+
+def _revalidate(client, path, etag):
+    return client.get(path, headers={'If-None-Match': f'"{etag}"'})
+
+
+def test_pages_send_private_validators(auth_client):
+    for path in ('/dashboard', '/my-reviews', '/shared-reviews', '/search?q=test'):
+        response = auth_client.get(path)
+        assert response.status_code == 200
+        assert response.get_etag()[0]
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+        assert 'Cookie' in response.headers['Vary']
+
+
+def test_matching_etag_returns_304_with_one_version_lookup(auth_client, count_queries):
+    etag = auth_client.get('/dashboard').get_etag()[0]
+    with count_queries() as counter:
+        response = _revalidate(auth_client, '/dashboard', etag)
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.get_etag()[0] == etag
+    assert counter.count == 1
+    assert 'data_version' in counter.statements[0]
+
+
+def test_write_on_another_worker_changes_the_etag(auth_client, monkeypatch):
+    etag = auth_client.get('/my-reviews').get_etag()[0]
+    # Another worker's commit never reaches this process's cache backend
+    with monkeypatch.context() as patch:
+        patch.setattr(cache, 'invalidate', lambda *tags: None)
+        auth_client.post('/review/3', data={'rating': '2', 'comment': 'From worker B'})
+    auth_client.get('/dashboard')  # consume the flash
+    response = _revalidate(auth_client, '/my-reviews', etag)
+    assert response.status_code == 200
+    assert 'From worker B' in response.get_data(as_text=True)
+
+
+def test_validators_do_not_depend_on_the_cache_backend(auth_client, monkeypatch):
+    monkeypatch.setattr(cache, 'backend', NullBackend())
+    etag = auth_client.get('/my-reviews').get_etag()[0]
+    assert etag
+    assert _revalidate(auth_client, '/my-reviews', etag).status_code == 304
+    assert _revalidate(auth_client, '/my-reviews', 'anything').status_code == 200
+
+
+def test_review_changes_the_etag(auth_client):
+    etag = auth_client.get('/my-reviews').get_etag()[0]
+    auth_client.post('/review/3', data={'rating': '2', 'comment': 'Meh'})
+    # The redirect target shows the flash, so it is rendered without an ETag
+    flashed = _revalidate(auth_client, '/my-reviews', etag)
+    assert flashed.status_code == 200
+    assert flashed.get_etag()[0] is None
+    assert 'Your review has been saved!' in flashed.get_data(as_text=True)
+
+    response = _revalidate(auth_client, '/my-reviews', etag)
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+    assert 'Meh' in response.get_data(as_text=True)
+
+
+def test_etag_depends_on_query_string(auth_client):
+    first = auth_client.get('/search?q=test').get_etag()[0]
+    assert _revalidate(auth_client, '/search?q=song', first).status_code == 200
+    assert _revalidate(auth_client, '/search?q=test', first).status_code == 304
+
+
+def test_added_song_invalidates_search(auth_client):
+    etag = auth_client.get('/search?q=test').get_etag()[0]
+    auth_client.post('/add-song', data={'title': 'Test Song 4', 'artist': 'New Artist'})
+    auth_client.get('/dashboard')  # consume the flash
+    response = _revalidate(auth_client, '/search?q=test', etag)
+    assert response.status_code == 200
+    assert 'Test Song 4' in response.get_data(as_text=True)
+
+
+def test_new_share_invalidates_shared_reviews(auth_client, flask_app):
+    etag = auth_client.get('/shared-reviews').get_etag()[0]
+    with flask_app.app_context():
+        db.session.add(ReviewShares(review_id=3, username='testuser'))
+        db.session.commit()
+    response = _revalidate(auth_client, '/shared-reviews', etag)
+    assert response.status_code == 200
+    assert 'Pretty good.' in response.get_data(as_text=True)
+
+
+def test_etags_are_per_user(client, auth_client):
+    etag = auth_client.get('/dashboard').get_etag()[0]
+    client.get('/logout')
+    client.post('/login', data={'username': 'admin', 'password': 'adminpassword'})
+    assert _revalidate(client, '/dashboard', etag).status_code == 200
@@ -0,0 +1,89 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app import app, db
+from app.engine import install_sqlite_pragmas, sqlite_pragmas
+
+
+def make_engine(path, config, **options):
+    engine = create_engine(f'sqlite:///{path}', **options)
+    install_sqlite_pragmas(engine, config)
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE IF NOT EXISTS item (id INTEGER PRIMARY KEY, value TEXT)'))
+    return engine
+
+
+def test_app_connections_are_tuned(flask_app):
+    with flask_app.app_context():
+        conn = db.session.connection()
+        assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == app.config['SQLITE_BUSY_TIMEOUT_MS']
+        assert conn.exec_driver_sql('PRAGMA cache_size').scalar() == app.config['SQLITE_CACHE_SIZE']
+
+
+def test_unset_pragmas_are_skipped():
+    assert sqlite_pragmas({'SQLITE_JOURNAL_MODE': 'WAL'}) == [('journal_mode', 'WAL')]
+
+
+def hold_read_transaction_while_writing(engine):
+    reader = engine.raw_connection()
+    try:
+        cursor = reader.cursor()
+        cursor.execute('BEGIN')
+        cursor.execute('SELECT count(*) FROM item').fetchall()
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO item (value) VALUES ('x')"))
+    finally:
+        reader.rollback()
+        reader.close()
+
+
+def test_rollback_journal_writer_is_locked_out_by_reader(tmp_path):
+    # The old setup: an open read transaction makes the committing writer fail
+    engine = make_engine(tmp_path / 'stock.db',
+                         {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_BUSY_TIMEOUT_MS': 0},
+                         connect_args={'timeout': 0})
+    with pytest.raises(OperationalError, match='database is locked'):
+        hold_read_transaction_while_writing(engine)
+
+
+def test_wal_writer_commits_while_reader_is_open(tmp_path):
+    engine = make_engine(tmp_path / 'tuned.db', app.config)
+    hold_read_transaction_while_writing(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT count(*) FROM item')).scalar() == 1
+
+
+def test_concurrent_readers_and_writers_do_not_lock(tmp_path):
+    engine = make_engine(tmp_path / 'stress.db', app.config, pool_size=16, max_overflow=0)
+    errors = []
+    writes_per_thread = 100
+
+    def writer(n):
+        try:
+            for i in range(writes_per_thread):
+                with engine.begin() as conn:
+                    conn.execute(text('INSERT INTO item (value) VALUES (:v)'), {'v': f'{n}-{i}'})
+        except Exception as exc:
+            errors.append(exc)
+
+    def reader():
+        try:
+            for _ in range(writes_per_thread):
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT count(*), max(id) FROM item')).fetchall()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+    threads += [threading.Thread(target=reader) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT count(*) FROM item')).scalar() == 6 * writes_per_thread
@@ -0,0 +1,57 @@
+import json
+from app import db
+from app.importer import import_songs, save_checkpoint
+from app.models import Song
+from app.search_index import search_songs
+
+
+def write_jsonl(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding='utf-8')
+
+
+def test_import_csv_dedupes_against_catalog(runner, flask_app, tmp_path):
+    source = tmp_path / 'songs.csv'
+    source.write_text(
+        'Title,Artist\n'
+        'Test Song 1,Test Artist 1\n'  # already in the catalog
+        'Yesterday,The Beatles\n'
+        'Yesterday,The Beatles\n'      # repeated in the file
+        ',Nobody\n'                    # invalid
+        'Help!,The Beatles\n',
+        encoding='utf-8')
+    result = runner.invoke(args=['import-songs', str(source), '--batch-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 2 songs (2 duplicates, 1 invalid records skipped).' in result.output
+    assert 'records/s' in result.output
+    with flask_app.app_context():
+        assert Song.query.count() == 5
+        assert [s.title for s in search_songs('beatles yest')] == ['Yesterday']
+
+
+def test_import_resumes_from_checkpoint(flask_app, tmp_path):
+    source = tmp_path / 'songs.jsonl'
+    write_jsonl(source, [{'title': f'Imported {i}', 'artist': 'Bulk'} for i in range(10)])
+    checkpoint = str(tmp_path / 'songs.checkpoint')
+    with flask_app.app_context():
+        # Pretend a previous run committed the first 6 records and then crashed
+        import_songs(str(source), batch_size=6, checkpoint_path=checkpoint)
+        db.session.execute(Song.__table__.delete().where(Song.title.in_(['Imported 8', 'Imported 9'])))
+        db.session.commit()
+        save_checkpoint(checkpoint, {'source': str(source.resolve()), 'records': 6,
+                                     'inserted': 6, 'duplicates': 0, 'invalid': 0})
+
+        state = import_songs(str(source), batch_size=3, checkpoint_path=checkpoint)
+        assert state['resumed_from'] == 6
+        assert state['inserted'] == 8
+        assert state['duplicates'] == 2
+        assert Song.query.filter_by(artist='Bulk').count() == 10
+
+
+def test_batches_bound_memory(flask_app, tmp_path):
+    source = tmp_path / 'many.jsonl'
+    write_jsonl(source, [{'title': f'Song {i}', 'artist': f'Artist {i % 50}'} for i in range(2500)])
+    batches = []
+    with flask_app.app_context():
+        state = import_songs(str(source), batch_size=1000, progress=lambda s, rate: batches.append(s['records']))
+    assert batches == [1000, 2000, 2500]
+    assert state['inserted'] == 2500
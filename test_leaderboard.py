@@ -0,0 +1,103 @@
+import threading
+from app import app, db
+from app.cache import cache
+from app.leaderboard import LeaderboardEntry, compute_leaderboard, could_move, top_songs
+from app.models import User, Review
+
+
+def _entry(song_id, avg, count):
+    return LeaderboardEntry(song_id, f'Song {song_id}', 'Artist', avg, count)
+
+
+def _leaderboard_version():
+    return cache.backend.tag_versions(['leaderboard'])['leaderboard']
+
+
+def test_could_move_rules():
+    snapshot = [_entry(1, 5.0, 3), _entry(2, 4.0, 2)]
+    assert could_move(snapshot, 1, 1.0, 4, size=2, min_reviews=1)          # already listed
+    assert could_move(snapshot, 9, 4.5, 2, size=2, min_reviews=1)          # beats the last entry
+    assert not could_move(snapshot, 9, 3.0, 9, size=2, min_reviews=1)      # below the last entry
+    assert not could_move(snapshot, 9, 5.0, 1, size=2, min_reviews=2)      # too few reviews
+    assert could_move(snapshot, 9, 1.0, 1, size=3, min_reviews=1)          # free slot
+
+
+def test_min_reviews_and_size(flask_app, monkeypatch):
+    with flask_app.app_context():
+        # Song 2 has a single review; song 1 has two
+        assert [entry.id for entry in compute_leaderboard(5, 1)] == [1, 2]
+        assert [entry.id for entry in compute_leaderboard(5, 2)] == [1]
+        assert [entry.id for entry in compute_leaderboard(1, 1)] == [1]
+
+    monkeypatch.setitem(app.config, 'LEADERBOARD_MIN_REVIEWS', 2)
+    with flask_app.test_request_context():
+        assert [entry.id for entry in top_songs()] == [1]
+
+
+def test_single_review_songs_are_excluded_by_default(flask_app):
+    with flask_app.app_context():
+        db.session.add(User(username='third', password='x'))
+        db.session.add(Review(rating=4, comment='', username='third', song_id=1))
+        # One 5-star rating is not enough to top the chart
+        db.session.add(Review(rating=5, comment='', username='third', song_id=3))
+        db.session.commit()
+        assert app.config['LEADERBOARD_MIN_REVIEWS'] == 3
+        assert [entry.id for entry in top_songs()] == [1]
+
+
+# The seeded songs have one or two reviews, so the tests below lower the threshold
+def test_only_ratings_that_can_move_the_top_invalidate(flask_app, monkeypatch):
+    monkeypatch.setitem(app.config, 'LEADERBOARD_SIZE', 1)
+    monkeypatch.setitem(app.config, 'LEADERBOARD_MIN_REVIEWS', 1)
+    with flask_app.app_context():
+        assert [entry.id for entry in top_songs()] == [1]
+        version = _leaderboard_version()
+
+        # A low rating on a song outside the top 1 cannot move it
+        db.session.add(Review(rating=1, comment='', username='admin', song_id=3))
+        db.session.commit()
+        assert _leaderboard_version() == version
+
+        # A rating on the listed song can (song 1 drops to 2.5, song 2 is 4.0)
+        db.session.add(Review(rating=5, comment='', username='admin', song_id=2))
+        db.session.get(Review, 1).rating = 1
+        db.session.commit()
+        assert _leaderboard_version() == version + 1
+        assert [entry.id for entry in top_songs()] == [2]
+
+
+def test_dashboard_shows_updated_leaderboard_after_review(auth_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'LEADERBOARD_MIN_REVIEWS', 1)
+    page = auth_client.get('/dashboard').get_data(as_text=True)
+    assert '1. Test Song 1' in page
+    auth_client.post('/review/3', data={'rating': '5', 'comment': 'Best'})
+    auth_client.post('/review/1', data={'rating': '1', 'comment': 'Changed my mind'})
+    page = auth_client.get('/dashboard').get_data(as_text=True)
+    assert '1. Test Song 3' in page
+
+
+def test_concurrent_views_rebuild_once(flask_app, monkeypatch):
+    calls = []
+    real = compute_leaderboard
+
+    def counting(*args):
+        calls.append(args)
+        return real(*args)
+
+    monkeypatch.setattr('app.leaderboard.compute_leaderboard', counting)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def view():
+        with flask_app.app_context():
+            barrier.wait()
+            results.append(top_songs())
+
+    threads = [threading.Thread(target=view) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result == results[0] for result in results)
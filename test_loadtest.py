@@ -0,0 +1,62 @@
+from werkzeug.security import generate_password_hash
+from app import db
+from app.loadtest import EndpointStats, InProcessTransport, percentile, run_load_test
+from app.models import User, ReviewShares
+
+ENDPOINTS = {'GET /login', 'POST /login', 'GET /search', 'GET /review/<id>', 'POST /review/<id>',
+             'GET /share', 'POST /share', 'GET /dashboard'}
+
+
+def _add_load_users(count):
+    password = generate_password_hash('loadpass')
+    for n in range(1, count + 1):
+        db.session.add(User(username=f'load{n}', password=password))
+    db.session.commit()
+
+
+def test_endpoint_summary_histogram():
+    stats = EndpointStats()
+    stats.latencies_ms = [1.0, 7.0, 7.5, 20000.0]
+    stats.errors = 1
+    summary = stats.summary()
+    assert summary['requests'] == 4
+    assert summary['error_rate'] == 0.25
+    assert summary['histogram']['<=5ms'] == 1
+    assert summary['histogram']['<=10ms'] == 2
+    assert summary['histogram']['>5000ms'] == 1
+    assert summary['max_ms'] == 20000.0
+
+
+def test_load_test_runs_scripted_mix_in_process(flask_app, monkeypatch):
+    # Exercise the CSRF token handling the real app uses
+    monkeypatch.setitem(flask_app.config, 'WTF_CSRF_ENABLED', True)
+    with flask_app.app_context():
+        _add_load_users(3)
+
+    report = run_load_test(lambda: InProcessTransport(flask_app), ['load1', 'load2', 'load3'], 'loadpass',
+                           ['test song'], users=3, iterations=2)
+
+    assert report['errors'] == 0
+    assert set(report['endpoints']) == ENDPOINTS
+    assert report['endpoints']['GET /dashboard']['requests'] == 6
+    assert report['throughput'] > 0
+    assert report['endpoints']['POST /share']['requests'] == 6
+    # A virtual user that reviews the same song twice shares the same review twice; that is stored once
+    with flask_app.app_context():
+        assert 3 <= ReviewShares.query.filter(ReviewShares.username.like('load%')).count() <= 6
+
+
+def test_load_test_counts_failed_logins(flask_app):
+    report = run_load_test(lambda: InProcessTransport(flask_app), ['testuser'], 'wrong-password',
+                           ['test'], users=2, iterations=1)
+    assert report['endpoints']['POST /login']['errors'] == 2
+    assert 'GET /dashboard' not in report['endpoints']
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
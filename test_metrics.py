@@ -0,0 +1,84 @@
+import re
+import threading
+from app.metrics import MetricsRegistry
+
+
+def _sample(text, name, **labels):
+    """Value of the sample `name{labels}` in a Prometheus text page (0 if absent)."""
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}{{{re.escape(wanted)}}} (\S+)$', text, re.M) if labels \
+        else re.search(rf'^{re.escape(name)} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_endpoint_reports_requests_and_sql(auth_client):
+    before = auth_client.get('/metrics').get_data(as_text=True)
+    auth_client.get('/dashboard')
+    auth_client.get('/dashboard')
+    response = auth_client.get('/metrics')
+    after = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert '# TYPE flask_http_request_duration_seconds histogram' in after
+
+    def delta(name, **labels):
+        return _sample(after, name, **labels) - _sample(before, name, **labels)
+
+    assert delta('flask_http_requests_total', endpoint='dashboard', method='GET', status='200') == 2
+    assert delta('flask_http_request_duration_seconds_count', endpoint='dashboard') == 2
+    assert delta('flask_http_request_duration_seconds_bucket', endpoint='dashboard', le='+Inf') == 2
+    # 4 statements (see test_query_counts.py) plus the user lookup the first
+    # time; the second request gets the counters and leaderboard from the cache
+    assert delta('flask_db_statements_total', endpoint='dashboard') == 7
+    assert delta('flask_db_statements_per_request_count', endpoint='dashboard') == 2
+    assert delta('flask_db_statements_per_request_bucket', endpoint='dashboard', le='8') == 2
+    assert delta('flask_db_statement_seconds_total', endpoint='dashboard') > 0
+    assert _sample(after, 'flask_db_pool_checkouts_total') > 0
+    assert 'flask_db_pool_checked_out' in after
+
+
+def test_unknown_paths_share_one_label(client):
+    client.get('/no-such-page')
+    page = client.get('/metrics').get_data(as_text=True)
+    assert _sample(page, 'flask_http_requests_total', endpoint='unmatched', method='GET', status='404') >= 1
+    assert 'no-such-page' not in page
+
+
+def test_counters_are_exact_across_threads():
+    registry = MetricsRegistry()
+
+    def work():
+        for _ in range(10000):
+            registry.inc('flask_db_statements_total', (('endpoint', 'x'),))
+            registry.observe('flask_http_request_duration_seconds', (('endpoint', 'x'),), 0.003)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    page = registry.render()
+    assert _sample(page, 'flask_db_statements_total', endpoint='x') == 80000
+    assert _sample(page, 'flask_http_request_duration_seconds_bucket', endpoint='x', le='0.005') == 80000
+    assert _sample(page, 'flask_http_request_duration_seconds_count', endpoint='x') == 80000
+
+
+def test_finished_threads_are_folded_into_the_totals():
+    registry = MetricsRegistry()
+
+    def request():
+        registry.inc('flask_db_statements_total', (('endpoint', 'x'),))
+        registry.observe('flask_http_request_duration_seconds', (('endpoint', 'x'),), 0.003)
+
+    # Thread-per-request: every request runs on a new thread
+    for _ in range(300):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+
+    page = registry.render()
+    assert _sample(page, 'flask_db_statements_total', endpoint='x') == 300
+    assert _sample(page, 'flask_http_request_duration_seconds_count', endpoint='x') == 300
+    assert len(registry._shards) <= 1
@@ -0,0 +1,76 @@
+from app import db
+from app.models import Song, Review
+from app.pagination import decode_cursor, encode_cursor
+
+
+def add_reviews(flask_app, count):
+    with flask_app.app_context():
+        songs = [Song(title=f'Paged Song {i}', artist='Paged Artist') for i in range(count)]
+        db.session.add_all(songs)
+        db.session.flush()
+        db.session.add_all(Review(rating=3, comment=f'c{i}', username='testuser', song_id=song.id)
+                           for i, song in enumerate(songs))
+        db.session.commit()
+
+
+def walk(client, url):
+    ids, cursor, pages = [], None, 0
+    while True:
+        data = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        ids.extend(item['id'] for item in data['items'])
+        pages += 1
+        cursor = data['next']
+        if not cursor:
+            return ids, pages, data
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('next', [1.5, 7])) == ('next', [1.5, 7])
+    assert decode_cursor('not-a-cursor!') == (None, None)
+    assert decode_cursor(None) == (None, None)
+    for key in ([{'a': 1}], [[1, 2]], [True], [2 ** 70]):
+        assert decode_cursor(encode_cursor('next', key)) == (None, None)
+
+
+def test_crafted_cursors_fall_back_to_the_first_page(auth_client):
+    first = auth_client.get('/my-reviews?format=json').get_json()['items']
+    for key in ([{'a': 1}], [[1, 2]], [1, 2, 3], [2 ** 70]):
+        cursor = encode_cursor('next', key)
+        assert auth_client.get(f'/api/v1/reviews?cursor={cursor}').status_code == 200
+        response = auth_client.get(f'/my-reviews?format=json&cursor={cursor}')
+        assert response.status_code == 200
+        assert response.get_json()['items'] == first
+
+
+def test_my_reviews_keyset_pages(auth_client, flask_app):
+    add_reviews(flask_app, 23)
+    ids, pages, last = walk(auth_client, '/my-reviews?format=json&per_page=10')
+    assert pages == 3
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == len(set(ids)) == 25
+
+    # Walking back from the last page returns the previous page in display order
+    previous = auth_client.get(f'/my-reviews?format=json&per_page=10&cursor={last["prev"]}').get_json()
+    assert [item['id'] for item in previous['items']] == ids[10:20]
+    assert previous['next'] and previous['prev']
+
+
+def test_search_pages_keep_rank_order(auth_client, flask_app):
+    add_reviews(flask_app, 12)
+    ids, pages, _ = walk(auth_client, '/search?q=paged&format=json&per_page=5')
+    assert pages == 3
+    assert len(ids) == len(set(ids)) == 12
+    first = auth_client.get('/search?q=paged&format=json&per_page=50').get_json()
+    assert [item['id'] for item in first['items']] == ids
+
+
+def test_html_listing_links_to_next_page(auth_client, flask_app):
+    add_reviews(flask_app, 5)
+    page = auth_client.get('/my-reviews?per_page=3').get_data(as_text=True)
+    assert 'Older' in page and 'cursor=' in page and 'per_page=3' in page
+    assert 'Paged Song 4' in page and 'Paged Song 1' not in page
+
+
+def test_shared_reviews_json(auth_client):
+    data = auth_client.get('/shared-reviews?format=json').get_json()
+    assert data == {'items': [], 'next': None, 'prev': None}
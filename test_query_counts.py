@@ -0,0 +1,63 @@
+from app import db
+from app.cache import cache
+from app.models import Song, Review, ReviewShares
+
+
+def add_reviews(flask_app, username, count):
+    with flask_app.app_context():
+        songs = [Song(title=f'Bulk Song {i}', artist=f'Bulk Artist {i % 7}') for i in range(count)]
+        db.session.add_all(songs)
+        db.session.flush()
+        db.session.add_all(Review(rating=1 + i % 5, comment='', username=username, song_id=song.id)
+                           for i, song in enumerate(songs))
+        db.session.commit()
+
+
+def test_dashboard_statement_count_is_constant(auth_client, flask_app, count_queries):
+    # The first request after login fills the user loader cache; the review
+    # counters are measured uncached (test_cache.py covers the cached path)
+    auth_client.get('/dashboard')
+    cache.clear()
+    with count_queries() as small:
+        response = auth_client.get('/dashboard')
+    assert response.status_code == 200
+
+    add_reviews(flask_app, 'testuser', 200)
+    cache.clear()
+    with count_queries() as large:
+        response = auth_client.get('/dashboard')
+    page = response.get_data(as_text=True)
+
+    # ETag versions, aggregate stats, recent reviews (with songs), leaderboard
+    assert small.count == large.count == 4
+    assert '<div class="stat-value">202</div>' in page
+    assert '<div class="stat-value">9</div>' in page
+
+
+def share_reviews(flask_app, owner, recipient):
+    with flask_app.app_context():
+        shared = {review_id for review_id, in db.session.query(ReviewShares.review_id).filter_by(username=recipient)}
+        for review in Review.query.filter_by(username=owner):
+            if review.id not in shared:
+                db.session.add(ReviewShares(review_id=review.id, username=recipient))
+        db.session.commit()
+
+
+def test_listing_pages_do_not_lazy_load_songs(auth_client, flask_app, count_queries):
+    share_reviews(flask_app, 'admin', 'testuser')
+    pages = ['/my-reviews', '/shared-reviews', '/share']
+    auth_client.get('/dashboard')
+    with count_queries() as before:
+        for page in pages:
+            assert auth_client.get(page).status_code == 200
+
+    add_reviews(flask_app, 'testuser', 50)
+    add_reviews(flask_app, 'admin', 50)
+    share_reviews(flask_app, 'admin', 'testuser')
+    with count_queries() as after:
+        responses = [auth_client.get(page) for page in pages]
+
+    assert before.count == after.count
+    assert 'Bulk Song 49' in responses[0].get_data(as_text=True)
+    assert 'Bulk Song 49' in responses[1].get_data(as_text=True)
+    assert 'Bulk Song 49' in responses[2].get_data(as_text=True)
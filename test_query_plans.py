@@ -0,0 +1,34 @@
+from app import db
+from app.models import ReviewShares
+from app.query_plans import capture_route_queries, full_scans
+
+
+def test_full_scan_detection():
+    assert full_scans(['SCAN review']) == ['SCAN review']
+    assert full_scans([
+        'SEARCH review USING COVERING INDEX ix_review_username_id (username=?)',
+        'SCAN song USING INDEX ix_song_rating_avg_count',
+        'SCAN song_fts VIRTUAL TABLE INDEX 0:M3',
+        'SCAN CONSTANT ROW',
+        'USE TEMP B-TREE FOR ORDER BY',
+    ]) == []
+
+
+def test_hot_routes_use_indexes(flask_app, runner):
+    with flask_app.app_context():
+        db.session.add(ReviewShares(review_id=3, username='testuser'))
+        db.session.commit()
+    result = runner.invoke(args=['check-query-plans', '--username', 'testuser', '--verbose'])
+    assert result.exit_code == 0, result.output
+    assert 'FULL SCAN' not in result.output
+    assert '/shared-reviews' in result.output
+    assert 'All ' in result.output
+
+
+def test_cached_routes_still_run_their_queries(auth_client, flask_app):
+    # Warm the dashboard counters and leaderboard in the (shared) cache
+    auth_client.get('/dashboard')
+    with flask_app.app_context():
+        statements = [sql for sql, params in capture_route_queries('testuser')['/dashboard']]
+    assert any('count(DISTINCT' in sql for sql in statements)
+    assert any('rating_avg DESC' in sql for sql in statements)
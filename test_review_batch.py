@@ -0,0 +1,92 @@
+from app import db
+from app.leaderboard import top_songs
+from app.models import Song, Review
+
+
+def add_songs(flask_app, count):
+    with flask_app.app_context():
+        songs = [Song(title=f'Batch Song {i}', artist='Batch Artist') for i in range(count)]
+        db.session.add_all(songs)
+        db.session.commit()
+        return [song.id for song in songs]
+
+
+def test_batch_reports_every_item(auth_client, flask_app):
+    response = auth_client.post('/api/v1/reviews/batch', json={'reviews': [
+        {'song_id': 3, 'rating': 1},
+        {'song_id': 1, 'rating': 2, 'comment': 'Changed my mind'},
+        {'song_id': 2, 'rating': 3, 'comment': "It's okay."},
+        {'song_id': 99, 'rating': 4},
+        {'song_id': 3, 'rating': 5, 'comment': 'Grew on me'},
+        {'song_id': 'x', 'rating': 5},
+        {'song_id': 2, 'rating': 0},
+        # Past SQLite's 64-bit integers: this item is invalid, the batch still runs
+        {'song_id': 99999999999999999999, 'rating': 5},
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    statuses = [result['status'] for result in body['results']]
+    assert statuses == ['superseded', 'updated', 'unchanged', 'not_found', 'created', 'invalid', 'invalid', 'invalid']
+    assert body['results'][6]['field'] == 'rating'
+    assert body['results'][7]['field'] == 'song_id'
+    assert body['counts'] == {'superseded': 1, 'updated': 1, 'unchanged': 1, 'not_found': 1,
+                              'created': 1, 'invalid': 3}
+
+    with flask_app.app_context():
+        created = db.session.get(Review, body['results'][4]['review_id'])
+        assert (created.username, created.song_id, created.rating) == ('testuser', 3, 5)
+        assert db.session.get(Review, 1).rating == 2
+        # The rating triggers updated the aggregates in the same transaction
+        song = db.session.get(Song, 3)
+        assert (song.rating_count, song.rating_avg) == (1, 5.0)
+        assert db.session.get(Song, 1).rating_sum == 6
+
+
+def test_batch_invalidates_cached_pages(auth_client, flask_app, monkeypatch):
+    monkeypatch.setitem(flask_app.config, 'LEADERBOARD_MIN_REVIEWS', 1)
+    auth_client.get('/dashboard')
+    assert 'Test Song 3' not in auth_client.get('/api/v1/reviews').get_data(as_text=True)
+    auth_client.post('/api/v1/reviews/batch', json={'reviews': [{'song_id': 3, 'rating': 5}]})
+    assert 'Test Song 3' in auth_client.get('/api/v1/reviews').get_data(as_text=True)
+    # The new 5-star song tops the leaderboard snapshot taken before the batch
+    with flask_app.app_context():
+        assert top_songs()[0].id == 3
+
+
+def test_batch_statement_count_is_constant(auth_client, flask_app, count_queries):
+    song_ids = add_songs(flask_app, 60)
+    auth_client.get('/api/v1/reviews')
+
+    def batch(ids, rating):
+        with count_queries() as counter:
+            response = auth_client.post('/api/v1/reviews/batch',
+                                        json={'reviews': [{'song_id': i, 'rating': rating} for i in ids]})
+        assert response.status_code == 200
+        return counter.count
+
+    # Inserts, then updates, of 10 and of 50 reviews
+    assert batch(song_ids[:10], 4) == batch(song_ids[10:], 4)
+    assert batch(song_ids[:10], 2) == batch(song_ids[10:], 2)
+
+
+def test_batch_rejects_malformed_requests(auth_client):
+    assert auth_client.post('/api/v1/reviews/batch', json={'reviews': {}}).status_code == 400
+    too_many = [{'song_id': 1, 'rating': 5}] * 1001
+    assert auth_client.post('/api/v1/reviews/batch', json={'reviews': too_many}).status_code == 413
+
+
+def test_import_reviews_command(runner, flask_app, tmp_path):
+    source = tmp_path / 'history.csv'
+    source.write_text('song_id,rating,comment\n3,4,Imported\n1,5,Great song!\n42,3,\n2,nope,\n'
+                      '99999999999999999999,5,\n')
+    result = runner.invoke(args=['import-reviews', 'admin', str(source), '--batch-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert '1 created, 2 invalid, 1 not_found, 1 updated' in result.output
+    # Line numbers count the CSV header, as an editor does
+    assert 'line 5: invalid' in result.output
+    assert 'line 4: not_found' in result.output
+    assert 'line 6: invalid' in result.output
+    with flask_app.app_context():
+        assert Review.query.filter_by(username='admin').count() == 2
+
+    assert runner.invoke(args=['import-reviews', 'nobody', str(source)]).exit_code != 0
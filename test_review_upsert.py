@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import pytest
+from app import db
+from app.models import Song, Review
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_in_parallel(calls):
+    barrier = threading.Barrier(len(calls))
+    responses = [None] * len(calls)
+
+    def worker(index, call):
+        barrier.wait()
+        responses[index] = call()
+
+    threads = [threading.Thread(target=worker, args=(index, call)) for index, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def test_parallel_submits_leave_one_review(flask_app, make_auth_client):
+    clients = [make_auth_client() for _ in range(8)]
+    responses = run_in_parallel([
+        lambda client=client, rating=index % 5 + 1: client.post('/review/3', data={'rating': str(rating),
+                                                                                 'comment': 'Race'})
+        for index, client in enumerate(clients)])
+    assert [response.status_code for response in responses] == [302] * 8
+
+    with flask_app.app_context():
+        reviews = Review.query.filter_by(username='testuser', song_id=3).all()
+        assert len(reviews) == 1
+        song = db.session.get(Song, 3)
+        assert (song.rating_count, song.rating_sum) == (1, reviews[0].rating)
+
+
+def test_parallel_batches_upsert_the_same_songs(flask_app, make_auth_client):
+    clients = [make_auth_client() for _ in range(4)]
+    batch = {'reviews': [{'song_id': song_id, 'rating': 4} for song_id in (1, 2, 3)]}
+    responses = run_in_parallel([lambda client=client: client.post('/api/v1/reviews/batch', json=batch)
+                                 for client in clients])
+    assert [response.status_code for response in responses] == [200] * 4
+
+    with flask_app.app_context():
+        assert Review.query.filter_by(username='testuser').count() == 3
+        assert [song.rating_count for song in Song.query.order_by(Song.id)] == [2, 1, 1]
+
+
+def test_second_submit_updates_in_place(auth_client, flask_app):
+    auth_client.post('/review/3', data={'rating': '2', 'comment': 'First'})
+    response = auth_client.post('/review/3', data={'rating': '4', 'comment': 'Second'}, follow_redirects=True)
+    assert 'Your review has been saved!' in response.get_data(as_text=True)
+    with flask_app.app_context():
+        review = Review.query.filter_by(username='testuser', song_id=3).one()
+        assert (review.rating, review.comment) == (4, 'Second')
+        assert db.session.get(Song, 3).rating_sum == 4
+
+
+def flask_db(database, *args):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'server.py', 'db', *args],
+                   cwd=REPO_DIR, env=env, check=True, capture_output=True)
+
+
+def test_migration_keeps_latest_review_and_moves_shares(tmp_path):
+    database = tmp_path / 'migrate.db'
+    flask_db(database, 'upgrade', 'c9a4d6e8f013')
+    with sqlite3.connect(database) as connection:
+        connection.executescript(
+            "INSERT INTO user VALUES ('u', 'x'), ('v', 'x');"
+            "INSERT INTO song (id, title, artist) VALUES (1, 'Song', 'Artist');"
+            "INSERT INTO review (id, rating, comment, username, song_id) "
+            "VALUES (1, 5, '', 'u', 1), (2, 1, '', 'u', 1), (3, 3, '', 'v', 1);"
+            "INSERT INTO review_shares (review_id, username) VALUES (1, 'v'), (3, 'u');")
+
+    flask_db(database, 'upgrade')
+    with sqlite3.connect(database) as connection:
+        assert connection.execute('SELECT id FROM review ORDER BY id').fetchall() == [(2,), (3,)]
+        assert connection.execute('SELECT review_id FROM review_shares ORDER BY share_id').fetchall() == [(2,), (3,)]
+        assert connection.execute('SELECT rating_count, rating_sum FROM song').fetchone() == (2, 4)
+        with pytest.raises(sqlite3.IntegrityError):
+            connection.execute("INSERT INTO review (rating, username, song_id) VALUES (4, 'u', 1)")
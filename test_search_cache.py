@@ -0,0 +1,61 @@
+from app.cache import cache
+from app.cache.backends import NullBackend
+from app.search_cache import search_results
+
+
+def _titles(response):
+    return [song['title'] for song in response.get_json()['items']]
+
+
+def test_repeated_search_hydrates_ids_with_one_query(auth_client, count_queries):
+    auth_client.get('/dashboard')
+    first = auth_client.get('/search?q=test song&format=json')
+    hits = search_results.info()['hits']
+    with count_queries() as repeat:
+        second = auth_client.get('/search?q=test song&format=json')
+
+    assert _titles(first) == _titles(second) == ['Test Song 1', 'Test Song 2', 'Test Song 3']
+    # The ETag's versions (reused for the catalog generation), then the songs by id
+    assert len(repeat.statements) == 2
+    assert 'data_version' in repeat.statements[0]
+    assert ' IN (' in repeat.statements[1]
+    assert 'song_fts' not in repeat.statements[1]
+    assert search_results.info()['hits'] == hits + 1
+
+
+def test_normalized_queries_share_an_entry(auth_client):
+    auth_client.get('/search?q=Test Song&format=json')
+    misses = search_results.info()['misses']
+    response = auth_client.get('/search?q=  TEST   song &format=json')
+    assert search_results.info()['misses'] == misses
+    assert len(_titles(response)) == 3
+
+
+def test_cursor_pages_are_cached_separately(auth_client):
+    first = auth_client.get('/search?q=test&per_page=2&format=json').get_json()
+    second = auth_client.get(f"/search?q=test&per_page=2&cursor={first['next']}&format=json").get_json()
+    again = auth_client.get(f"/search?q=test&per_page=2&cursor={first['next']}&format=json").get_json()
+    assert [song['title'] for song in second['items']] == ['Test Song 3']
+    assert again == second
+
+
+def test_added_song_appears_in_cached_search(auth_client):
+    assert len(_titles(auth_client.get('/search?q=test&format=json'))) == 3
+    auth_client.post('/add-song', data={'title': 'Test Song 4', 'artist': 'New Artist'})
+    assert 'Test Song 4' in _titles(auth_client.get('/search?q=test&format=json'))
+
+
+def test_song_added_elsewhere_appears_without_shared_cache(auth_client, monkeypatch):
+    # The null backend never sees tag bumps, like another worker's memory backend
+    monkeypatch.setattr(cache, 'backend', NullBackend())
+    assert len(_titles(auth_client.get('/search?q=test&format=json'))) == 3
+    auth_client.post('/add-song', data={'title': 'Test Song 4', 'artist': 'New Artist'})
+    assert 'Test Song 4' in _titles(auth_client.get('/search?q=test&format=json'))
+
+
+def test_search_cache_stats_in_metrics(auth_client):
+    auth_client.get('/search?q=test')
+    auth_client.get('/search?q=test')
+    page = auth_client.get('/metrics').get_data(as_text=True)
+    assert f'flask_cache_hits_total{{cache="search"}} {search_results.info()["hits"]}' in page
+    assert 'flask_cache_entries{cache="search"} 1' in page
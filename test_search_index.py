@@ -0,0 +1,53 @@
+from sqlalchemy import text
+from app import db
+from app.models import Song
+from app.search_index import build_match_query, search_songs
+
+
+def test_match_query_quotes_tokens():
+    assert build_match_query('queen "bo*') == '"queen"* "bo"*'
+    assert build_match_query('  ') == ''
+
+
+def test_index_follows_song_writes(flask_app):
+    with flask_app.app_context():
+        song = Song(title='Bohemian Rhapsody', artist='Queen')
+        db.session.add(song)
+        db.session.commit()
+        assert [s.title for s in search_songs('bohem')] == ['Bohemian Rhapsody']
+
+        song.title = 'Somebody to Love'
+        db.session.commit()
+        assert search_songs('bohem') == []
+        assert [s.title for s in search_songs('queen some')] == ['Somebody to Love']
+
+        db.session.delete(song)
+        db.session.commit()
+        assert search_songs('queen') == []
+
+
+def test_results_ranked_by_relevance(flask_app):
+    with flask_app.app_context():
+        db.session.add_all([
+            Song(title='Love Song', artist='Someone Else'),
+            Song(title='Love Love Love', artist='Love'),
+        ])
+        db.session.commit()
+        assert search_songs('love')[0].title == 'Love Love Love'
+
+
+def test_rebuild_command(flask_app, runner):
+    with flask_app.app_context():
+        db.session.execute(text("INSERT INTO song_fts(song_fts) VALUES ('delete-all')"))
+        db.session.commit()
+        assert search_songs('test') == []
+    result = runner.invoke(args=['rebuild-search-index'])
+    assert 'Rebuilt the search index for 3 songs' in result.output
+    with flask_app.app_context():
+        assert len(search_songs('test')) == 3
+
+
+def test_search_route_uses_index(auth_client):
+    response = auth_client.get('/search?q=artist 2')
+    assert b'Test Song 2' in response.data
+    assert b'Test Song 1' not in response.data
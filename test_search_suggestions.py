@@ -0,0 +1,93 @@
+from sqlalchemy import text
+from app import db
+from app.importer import import_songs
+from app.models import Song
+from app.suggestions import SongPrefixIndex, normalize, song_suggestions
+
+
+def test_normalize():
+    assert normalize('  Beyoncé   Knowles ') == 'beyonce knowles'
+
+
+def test_prefix_matches_title_and_artist(flask_app):
+    with flask_app.app_context():
+        index = SongPrefixIndex()
+        titles = [s['title'] for s in index.suggest('test song')]
+        assert titles == ['Test Song 1', 'Test Song 2', 'Test Song 3']
+        assert [s['title'] for s in index.suggest('TEST ARTIST 2')] == ['Test Song 2']
+        assert index.suggest('zzz') == []
+        assert len(index.suggest('test', limit=2)) == 2
+
+
+def test_route_returns_suggestions(auth_client):
+    response = auth_client.get('/search-suggestions?q=test%20song%203')
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'suggestions': [{'id': 3, 'title': 'Test Song 3', 'artist': 'Test Artist 3'}]
+    }
+    assert auth_client.get('/search-suggestions').get_json() == {'suggestions': []}
+
+
+def test_add_song_updates_index_incrementally(auth_client, flask_app):
+    with flask_app.app_context():
+        song_suggestions.suggest('test')
+        assert song_suggestions._built
+
+    auth_client.post('/add-song', data={'artist': 'Queen', 'title': 'Bohemian Rhapsody'})
+    suggestions = auth_client.get('/search-suggestions?q=que').get_json()['suggestions']
+    assert [s['title'] for s in suggestions] == ['Bohemian Rhapsody']
+
+
+def test_rolled_back_insert_is_not_suggested(flask_app):
+    with flask_app.app_context():
+        song_suggestions.suggest('test')
+        db.session.add(Song(title='Never Committed', artist='Ghost'))
+        db.session.flush()
+        db.session.rollback()
+        assert song_suggestions.suggest('never') == []
+
+
+def suggest_after_refresh(query):
+    # The first lookup notices the new generation and refreshes in the background
+    song_suggestions.suggest(query)
+    song_suggestions._refresher.join(5)
+    return [s['title'] for s in song_suggestions.suggest(query)]
+
+
+def test_songs_written_outside_the_orm_are_suggested(flask_app, tmp_path, monkeypatch):
+    source = tmp_path / 'catalog.csv'
+    source.write_text('title,artist\nZebra Crossing,Imported Band\n')
+    with flask_app.app_context():
+        song_suggestions.suggest('test')
+        generation = song_suggestions._generation
+        builds = []
+        monkeypatch.setattr(song_suggestions, 'build', lambda: builds.append(1))
+        # Core inserts, as another worker's import would make them
+        import_songs(str(source))
+        assert suggest_after_refresh('zebra') == ['Zebra Crossing']
+        assert song_suggestions._generation == generation + 1
+        # Only the new song was read: no full rebuild
+        assert builds == []
+
+
+def test_edits_and_deletes_by_other_processes_are_applied(flask_app):
+    with flask_app.app_context():
+        song_suggestions.suggest('test')
+        # Raw SQL bypasses this process's ORM events, like another worker
+        db.session.execute(text("UPDATE song SET title = 'Renamed Tune' WHERE id = 1"))
+        db.session.execute(text("DELETE FROM song WHERE id = 2"))
+        db.session.execute(text("UPDATE data_version SET version = version + 1 WHERE tag = 'song'"))
+        db.session.commit()
+        assert suggest_after_refresh('renamed') == ['Renamed Tune']
+        assert [s['title'] for s in song_suggestions.suggest('test song')] == ['Test Song 3']
+
+
+def test_own_commits_keep_the_index_without_rebuilding(flask_app, monkeypatch):
+    with flask_app.app_context():
+        song_suggestions.suggest('test')
+        builds = []
+        monkeypatch.setattr(song_suggestions, 'build', lambda: builds.append(1))
+        db.session.add(Song(title='Local Hero', artist='Mark Knopfler'))
+        db.session.commit()
+        assert [s['title'] for s in song_suggestions.suggest('local')] == ['Local Hero']
+        assert builds == []
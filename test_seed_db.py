@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.datagen import generate_dataset
+from app.models import User, Song, Review, ReviewShares
+from app.search_index import search_songs
+
+
+def snapshot():
+    return (
+        db.session.query(Song.id, Song.title, Song.artist).order_by(Song.id).all(),
+        db.session.query(Review.id, Review.rating, Review.username, Review.song_id).order_by(Review.id).all(),
+        db.session.query(ReviewShares.review_id, ReviewShares.username).order_by(ReviewShares.share_id).all(),
+    )
+
+
+def reset():
+    db.drop_all()
+    db.create_all()
+
+
+def test_same_seed_gives_same_data(flask_app):
+    with flask_app.app_context():
+        reset()
+        generate_dataset(users=30, songs=200, reviews=800, shares=100, seed=7, batch_size=128)
+        first = snapshot()
+        reset()
+        generate_dataset(users=30, songs=200, reviews=800, shares=100, seed=7, batch_size=128)
+        assert snapshot() == first
+        reset()
+        generate_dataset(users=30, songs=200, reviews=800, shares=100, seed=8, batch_size=128)
+        assert snapshot() != first
+
+
+def test_generated_data_is_skewed_and_consistent(flask_app):
+    with flask_app.app_context():
+        reset()
+        counts = generate_dataset(users=100, songs=500, reviews=3000, shares=300, seed=1, batch_size=500)
+        assert counts['reviews'] == 3000 and counts['shares'] == 300
+
+        per_user = [n for _, n in db.session.query(Review.username, func.count()).group_by(Review.username)]
+        # Heavy-tailed reviewers: the busiest user writes far more than average
+        assert max(per_user) > 3 * sum(per_user) / len(per_user)
+
+        # No duplicate (user, song) reviews and no self-shares
+        assert db.session.query(Review.username, Review.song_id).distinct().count() == 3000
+        assert db.session.query(ReviewShares).join(Review, Review.id == ReviewShares.review_id).\
+            filter(Review.username == ReviewShares.username).count() == 0
+
+        # Aggregates, full-text index and insert triggers are all in place afterwards
+        assert db.session.query(func.sum(Song.rating_sum)).scalar() == \
+            db.session.query(func.sum(Review.rating)).scalar()
+        song = db.session.get(Song, 1)
+        assert song in search_songs(song.title)
+        reviewed = {name for name, in db.session.query(Review.username).filter_by(song_id=song.id)}
+        newcomer = next(f'user{n}' for n in range(1, 101) if f'user{n}' not in reviewed)
+        db.session.add(Review(rating=5, username=newcomer, song_id=song.id, comment=None))
+        db.session.commit()
+        db.session.refresh(song)
+        assert song.rating_count == db.session.query(Review).filter_by(song_id=song.id).count()
+
+
+def test_failed_run_keeps_the_insert_triggers(flask_app):
+    with flask_app.app_context():
+        db.session.add(User(username='user2', password='x'))
+        db.session.commit()
+        with pytest.raises(IntegrityError):
+            generate_dataset(users=3, songs=5, reviews=5, seed=1)
+        triggers = {name for name, in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+        assert {'song_fts_ai', 'review_stats_ai'} <= triggers
+        assert db.session.query(Song).count() == 3
+
+
+def test_seed_command(runner, flask_app):
+    result = runner.invoke(args=['seed-db', '--users', '5', '--songs', '20', '--reviews', '40',
+                                 '--shares', '10', '--user-prefix', 'bench'])
+    assert result.exit_code == 0, result.output
+    assert 'Generated 5 users, 20 songs, 40 reviews and 10 shares' in result.output
+    with flask_app.app_context():
+        assert User.query.filter(User.username.like('bench%')).count() == 5
+
+    result = runner.invoke(args=['seed-db', '--users', '5', '--user-prefix', 'bench'])
+    assert result.exit_code != 0
+    assert 'already exist' in result.output
+
+    # Any clash is caught up front, not just on PREFIX1
+    with flask_app.app_context():
+        db.session.add(User(username='solo3', password='x'))
+        db.session.commit()
+    result = runner.invoke(args=['seed-db', '--users', '5', '--user-prefix', 'solo'])
+    assert result.exit_code != 0
+    assert "'solo3'" in result.output
+    with flask_app.app_context():
+        assert User.query.filter(User.username.like('solo%')).count() == 1
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from app import db
+from app.models import User, ReviewShares
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def add_users(flask_app, names):
+    with flask_app.app_context():
+        db.session.add_all([User(username=name, password='x') for name in names])
+        db.session.commit()
+
+
+def test_share_with_several_recipients(auth_client, flask_app):
+    response = auth_client.post('/share', data={'review': ['1', '2'], 'recipient_username': 'admin, nobody admin'},
+                                follow_redirects=True)
+    page = response.get_data(as_text=True)
+    assert 'Reviews shared successfully with admin!' in page
+    assert 'No user named nobody.' in page
+    with flask_app.app_context():
+        assert sorted(share.review_id for share in ReviewShares.query.filter_by(username='admin')) == [1, 2]
+
+    # Sharing again reports the existing share instead of adding a copy
+    response = auth_client.post('/share', data={'review': '1', 'recipient_username': 'admin'}, follow_redirects=True)
+    assert 'Already shared with admin.' in response.get_data(as_text=True)
+    with flask_app.app_context():
+        assert ReviewShares.query.filter_by(username='admin').count() == 2
+
+
+def test_share_rejects_other_users_reviews(auth_client, flask_app):
+    response = auth_client.post('/share', data={'review': '3', 'recipient_username': 'admin'}, follow_redirects=True)
+    assert response.status_code == 200
+    with flask_app.app_context():
+        assert ReviewShares.query.count() == 0
+
+
+def test_share_statement_count_is_constant(auth_client, flask_app, count_queries):
+    names = [f'friend{i}' for i in range(40)]
+    add_users(flask_app, names)
+    auth_client.get('/api/v1/reviews')
+
+    def share(recipients):
+        with count_queries() as counter:
+            response = auth_client.post('/api/v1/shares', json={'review_ids': [1, 2], 'recipients': recipients})
+        assert response.status_code == 201
+        return counter.count
+
+    assert share(names[:2]) == share(names[2:])
+
+
+def test_shared_page_shows_new_shares(auth_client, flask_app):
+    add_users(flask_app, ['friend'])
+    assert auth_client.get('/api/v1/shares').get_json()['items'] == []
+    with flask_app.app_context():
+        db.session.add(ReviewShares(review_id=3, username='testuser'))
+        db.session.commit()
+    assert len(auth_client.get('/api/v1/shares').get_json()['items']) == 1
+
+
+def flask_db(database, *args):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'server.py', 'db', *args],
+                   cwd=REPO_DIR, env=env, check=True, capture_output=True)
+
+
+def test_migration_drops_duplicate_shares(tmp_path):
+    database = tmp_path / 'migrate.db'
+    flask_db(database, 'upgrade', 'e7f2b9c4d815')
+    with sqlite3.connect(database) as connection:
+        connection.executescript(
+            "INSERT INTO user VALUES ('u', 'x'), ('v', 'x');"
+            "INSERT INTO song (id, title, artist) VALUES (1, 'Song', 'Artist');"
+            "INSERT INTO review (id, rating, comment, username, song_id) VALUES (1, 5, '', 'u', 1);"
+            "INSERT INTO review_shares (share_id, review_id, username) VALUES (1, 1, 'v'), (2, 1, 'v'), (3, 1, 'u');")
+
+    flask_db(database, 'upgrade')
+    with sqlite3.connect(database) as connection:
+        assert connection.execute('SELECT share_id FROM review_shares ORDER BY share_id').fetchall() == [(1,), (3,)]
+        with pytest.raises(sqlite3.IntegrityError):
+            connection.execute("INSERT INTO review_shares (review_id, username) VALUES (1, 'v')")
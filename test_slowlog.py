@@ -0,0 +1,62 @@
+import json
+from sqlalchemy import text
+from app import db
+from app.slowlog import SlowQueryLog, redact
+
+
+def _entries(path):
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_redact_hides_strings_but_keeps_numbers():
+    assert redact(('secret', 5, None, 2.5, b'xy')) == ['<str len=6>', 5, None, 2.5, '<bytes len=2>']
+    assert redact({'username': 'testuser', 'limit': 20}) == {'username': '<str len=8>', 'limit': 20}
+
+
+def test_slow_statements_are_logged_with_endpoint_and_plan(auth_client, flask_app, tmp_path):
+    path = tmp_path / 'slow.jsonl'
+    with flask_app.app_context():
+        slow_log = SlowQueryLog(db.engine, 0, str(path)).install()
+    try:
+        auth_client.get('/my-reviews')
+        slow_log.flush()
+    finally:
+        slow_log.remove()
+
+    entries = [entry for entry in _entries(path) if entry['endpoint'] == 'my_reviews']
+    review_query = next(entry for entry in entries if 'FROM review' in entry['sql'])
+    assert review_query['method'] == 'GET'
+    assert review_query['duration_ms'] >= 0
+    assert review_query['plan'] and any('review' in step for step in review_query['plan'])
+    # The username parameter is redacted, numeric limits are kept
+    assert '<str len=8>' in review_query['params']
+    assert 'testuser' not in path.read_text()
+    assert not any(entry['sql'].startswith('EXPLAIN') for entry in entries)
+
+
+def test_fast_statements_are_not_logged(flask_app, tmp_path):
+    path = tmp_path / 'slow.jsonl'
+    with flask_app.app_context():
+        slow_log = SlowQueryLog(db.engine, 60000, str(path)).install()
+        try:
+            db.session.execute(text('SELECT 1'))
+            slow_log.flush()
+        finally:
+            slow_log.remove()
+    assert not path.exists()
+
+
+def test_statements_outside_requests_have_no_endpoint(flask_app, tmp_path):
+    path = tmp_path / 'slow.jsonl'
+    with flask_app.app_context():
+        slow_log = SlowQueryLog(db.engine, 0, str(path)).install()
+        try:
+            db.session.execute(text('SELECT count(*) FROM song WHERE title = :title'), {'title': 'x'})
+            slow_log.flush()
+        finally:
+            slow_log.remove()
+    entry = _entries(path)[-1]
+    assert entry['endpoint'] is None
+    assert entry['params'] == ['<str len=1>']
+    assert entry['plan']
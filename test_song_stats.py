@@ -0,0 +1,59 @@
+from sqlalchemy import update
+from app import app, db
+from app.models import Song, Review
+
+
+def stats(song_id):
+    song = db.session.get(Song, song_id)
+    db.session.refresh(song)
+    return (song.rating_count, song.rating_sum,
+            [song.rating_1, song.rating_2, song.rating_3, song.rating_4, song.rating_5],
+            song.rating_avg)
+
+
+def test_seeded_reviews_are_aggregated(flask_app):
+    with flask_app.app_context():
+        assert stats(1) == (2, 9, [0, 0, 0, 1, 1], 4.5)
+        assert stats(2) == (1, 3, [0, 0, 1, 0, 0], 3.0)
+        assert stats(3) == (0, 0, [0, 0, 0, 0, 0], None)
+
+
+def test_update_and_delete_adjust_aggregates(flask_app):
+    with flask_app.app_context():
+        review = Review.query.filter_by(username='admin', song_id=1).first()
+        review.rating = 1
+        db.session.commit()
+        assert stats(1) == (2, 6, [1, 0, 0, 0, 1], 3.0)
+
+        db.session.delete(review)
+        db.session.commit()
+        assert stats(1) == (1, 5, [0, 0, 0, 0, 1], 5.0)
+
+
+def test_review_route_updates_aggregates(auth_client, flask_app):
+    auth_client.post('/review/3', data={'rating': '2', 'comment': 'meh'})
+    auth_client.post('/review/1', data={'rating': '3', 'comment': 'changed my mind'})
+    with flask_app.app_context():
+        assert stats(3) == (1, 2, [0, 1, 0, 0, 0], 2.0)
+        assert stats(1) == (2, 7, [0, 0, 1, 1, 0], 3.5)
+
+
+def test_rebuild_command_recomputes_drifted_stats(flask_app, runner):
+    with flask_app.app_context():
+        db.session.execute(update(Song).values(rating_count=99, rating_sum=0, rating_avg=0.0))
+        db.session.commit()
+
+    result = runner.invoke(args=['rebuild-song-stats', '--chunk-size', '2'])
+    assert 'Rebuilt rating stats for 3 songs.' in result.output
+    with flask_app.app_context():
+        assert stats(1) == (2, 9, [0, 0, 0, 1, 1], 4.5)
+        assert stats(3) == (0, 0, [0, 0, 0, 0, 0], None)
+
+
+def test_dashboard_leaderboard_uses_aggregates(auth_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'LEADERBOARD_MIN_REVIEWS', 1)
+    response = auth_client.get('/dashboard')
+    page = response.get_data(as_text=True)
+    assert '1. Test Song 1' in page
+    assert '4.5 ★' in page
+    assert '2. Test Song 2' in page
@@ -0,0 +1,67 @@
+from app import db
+from app.models import User
+from app.user_cache import UserCache, UserIdentity, user_cache
+
+
+def _user_queries(counter):
+    return [statement for statement in counter.statements if 'FROM user' in statement]
+
+
+def test_loader_queries_the_user_once(auth_client, count_queries):
+    with count_queries() as first:
+        auth_client.get('/my-reviews')
+    with count_queries() as second:
+        auth_client.get('/my-reviews')
+        auth_client.get('/share')
+        auth_client.get('/dashboard')
+
+    assert len(_user_queries(first)) == 1
+    assert _user_queries(second) == []
+    assert isinstance(user_cache.get('testuser'), UserIdentity)
+
+
+def test_user_changes_invalidate_the_cache(auth_client, flask_app):
+    auth_client.get('/dashboard')
+    assert user_cache.get('testuser') is not None
+
+    with flask_app.app_context():
+        user = db.session.get(User, 'testuser')
+        user.password = 'changed'
+        db.session.commit()
+    assert user_cache.get('testuser') is None
+
+
+
+def test_deleted_user_is_logged_out(client, flask_app):
+    with flask_app.app_context():
+        db.session.add(User(username='leaving', password='x'))
+        db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = 'leaving'
+    assert client.get('/dashboard').status_code == 200
+    assert user_cache.get('leaving') is not None
+
+    with flask_app.app_context():
+        db.session.delete(db.session.get(User, 'leaving'))
+        db.session.commit()
+    assert user_cache.get('leaving') is None
+    assert client.get('/dashboard').status_code == 302
+
+
+def test_unknown_users_are_not_cached(client, flask_app):
+    with client.session_transaction() as session:
+        session['_user_id'] = 'ghost'
+    assert client.get('/dashboard').status_code == 302
+    assert user_cache.get('ghost') is None
+
+
+def test_cache_expires_and_evicts():
+    cache = UserCache(maxsize=2, ttl=60)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, UserIdentity(name))
+    assert cache.get('a') is None
+    assert cache.get('c').username == 'c'
+
+    expired = UserCache(maxsize=2, ttl=-1)
+    expired.put('a', UserIdentity('a'))
+    assert expired.get('a') is None